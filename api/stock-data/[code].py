@@ -1,16 +1,222 @@
 from http.server import BaseHTTPRequestHandler
-import json
-import yfinance as yf
-import pandas as pd
-from datetime import datetime, timedelta
-import pytz
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
 import os
 import urllib.parse
+import sys
+import time
+
+# 공용 Python 모듈(python-server/)을 import 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'python-server'))
+
+# 콜드 스타트에는 표준 라이브러리 기반 모듈만 import 합니다.
+# yfinance/pandas/numpy(수백 ms)는 yfinance 업스트림이나 지표 계산이 필요한 요청에서 처음 한 번만 import 합니다.
+from chart_arrays import load_chart_arrays, meta_to_info
+from instrumentation import UPSTREAM_ATTEMPTS, RequestTimer, get_logger, stage
+from http_cache import cache_control, encode_body, http_date, is_not_modified, make_etag
+from metadata import MetadataCache, extract_metadata
+from response_body import (
+    RESPONSE_FORMATS, body_version, cached_body_prefix, dumps, encode_payload, finish_cached_body,
+    pack_cached_body, with_cache_info,
+)
+from snapshot_store import SnapshotStore
+from symbol_resolver import SymbolResolver
 
 # Vercel Python Runtime은 app/api/**/*.py 경로에 있는 .py 파일을 Python Serverless Function으로 자동으로 빌드합니다.
 
+log = get_logger('vercel')
+
+# 업스트림 조회 방식: chart(기본, chart API JSON 을 pandas 없이 바로 배열로 변환) / yfinance(/tmp 캔들 저장소 증분 조회)
+# 지표(indicators=)를 요청하면 pandas 가 필요하므로 방식과 관계없이 yfinance 경로를 사용합니다.
+UPSTREAM_MODE = os.getenv('STOCK_VERCEL_UPSTREAM', 'chart').lower()
+UPSTREAM_TIMEOUT = float(os.getenv('STOCK_UPSTREAM_TIMEOUT_SECONDS', 5))
+
+# 종목별 일봉 기준 시계열 길이 - 짧은 period 와 주봉/월봉은 기준 시계열에서 만듦 (none 이면 사용 안 함)
+BASE_PERIOD = os.getenv('STOCK_BASE_PERIOD', '2y').lower()
+
+@lru_cache(maxsize=None)
+def heavy():
+    """yfinance 경로에 필요한 모듈과 /tmp 캔들·지표 저장소 (처음 필요할 때 한 번만 import/생성)"""
+    import yfinance as yf
+    from candle_store import CandleStore
+    from candles import hist_to_candles, hist_to_columns
+    from indicators import IndicatorStore, build_indicators, parse_indicators
+
+    # 캔들 저장소는 쓰기 가능한 /tmp 에 둡니다 (웜 인스턴스가 살아있는 동안 유지, 새 봉만 증분 조회)
+    try:
+        candle_store = CandleStore(os.getenv('STOCK_CANDLE_STORE_PATH', '/tmp/vibe_fs_candles.sqlite'))
+    except Exception as e:
+        log.warning("Candle store disabled: %s", e)
+        candle_store = None
+
+    return SimpleNamespace(
+        yf=yf,
+        candle_store=candle_store,
+        # 일봉 기술적 지표도 같은 /tmp 저장소에 두고 새 봉만 이어서 계산
+        indicator_store=IndicatorStore(candle_store) if candle_store is not None else None,
+        hist_to_candles=hist_to_candles,
+        hist_to_columns=hist_to_columns,
+        build_indicators=build_indicators,
+        parse_indicators=parse_indicators,
+    )
+
+def load_history(ticker, yahoo_symbol, period, interval):
+    """히스토리 조회 (캔들 저장소가 있으면 증분 조회 후 period 만큼 잘라서 반환)"""
+    candle_store = heavy().candle_store
+    if candle_store is None:
+        return ticker.history(period=period, interval=interval)
+    if BASE_PERIOD != 'none':
+        return candle_store.load_derived_history(ticker, yahoo_symbol, period, interval, BASE_PERIOD)
+    return candle_store.load_history(ticker, yahoo_symbol, period, interval)
+
+# CDN(Vercel Edge) 캐시 시간 - 같은 URL 반복 요청은 함수 실행 없이 CDN 이 응답
+CDN_MAX_AGE = int(os.getenv('STOCK_CDN_MAX_AGE_SECONDS', 900))
+CDN_STALE_WHILE_REVALIDATE = int(os.getenv('STOCK_CDN_STALE_SECONDS', 3600))
+
+# 인코딩된 응답 본문 스냅샷 (/tmp) - 웜 인스턴스는 CDN 미스(조건부 요청, 다른 쿼리 순서 등)에도 업스트림 조회 없이 응답
+# (STOCK_SNAPSHOT_TTL_SECONDS=0 이면 사용 안 함)
+snapshot_store = None
+SNAPSHOT_TTL = float(os.getenv('STOCK_SNAPSHOT_TTL_SECONDS', CDN_MAX_AGE))
+if SNAPSHOT_TTL > 0:
+    try:
+        snapshot_store = SnapshotStore(os.getenv('STOCK_SNAPSHOT_DIR', '/tmp/vibe_fs_snapshots'), ttl_seconds=SNAPSHOT_TTL)
+    except Exception as e:
+        log.warning("Snapshot store disabled: %s", e)
+
+# 종목코드 -> .KS/.KQ 접미사 해석기 (웜 인스턴스 동안 /tmp 에 유지)
+try:
+    symbol_resolver = SymbolResolver(os.getenv('STOCK_SYMBOL_CACHE_PATH', '/tmp/vibe_fs_symbols.sqlite'))
+except Exception as e:
+    log.warning("Symbol cache file disabled: %s", e)
+    symbol_resolver = SymbolResolver()
+
+# 종목 메타데이터(회사명/통화/시장) 캐시 - ticker.info 는 하루 단위로만 다시 조회
+try:
+    metadata_cache = MetadataCache(path=os.getenv('STOCK_INFO_CACHE_PATH', '/tmp/vibe_fs_metadata.sqlite'))
+except Exception as e:
+    log.warning("Metadata cache file disabled: %s", e)
+    metadata_cache = MetadataCache()
+
+def fetch_history_with_retry(yahoo_symbol, load, max_retries=2):
+    """히스토리 데이터 조회 (실패 시 1회 재시도, 데이터가 없으면 빈 결과)
+
+    load() 는 DataFrame 또는 ChartArrays 를 반환 (둘 다 empty / len 지원)
+    """
+    hist = None
+    
+    for attempt in range(max_retries):
+        try:
+            log.debug("Attempt %d/%d to fetch data for %s", attempt + 1, max_retries, yahoo_symbol)
+            
+            # 업스트림 히스토리 데이터 조회 (yfinance 경로는 저장소가 있으면 새 봉만 증분 조회)
+            with stage('history_fetch'):
+                hist = load()
+            
+            if not hist.empty:
+                UPSTREAM_ATTEMPTS.inc('ok')
+                log.debug("Fetched %d data points for %s", len(hist), yahoo_symbol)
+                break
+            else:
+                UPSTREAM_ATTEMPTS.inc('empty')
+                log.debug("No data returned for %s", yahoo_symbol)
+                
+        except Exception as e:
+            UPSTREAM_ATTEMPTS.inc('error')
+            log.warning("Attempt %d/%d for %s failed: %s", attempt + 1, max_retries, yahoo_symbol, e)
+            if attempt == max_retries - 1:
+                raise e
+            
+            # 잠시 대기 후 재시도
+            time.sleep(0.5)
+    
+    return hist
+
+def chart_metadata(yahoo_symbol, meta):
+    """chart 응답 meta 로 메타데이터 구성 (캐시에 있으면 캐시 우선, 회사명이 있으면 캐시에 저장)"""
+    metadata = metadata_cache.get(yahoo_symbol)
+    if metadata is not None:
+        return metadata
+    metadata = extract_metadata(meta_to_info(meta, yahoo_symbol))
+    if meta.get('longName') or meta.get('shortName'):
+        metadata_cache.set(yahoo_symbol, metadata)
+    return metadata
+
+def fetch_chart_data(stock_code, period, interval, fmt):
+    """chart 경로 - (심볼, 메타데이터, 캔들 데이터, 개수), 데이터가 없으면 None"""
+    # .KS/.KQ 탐색은 한 번만 시도 (잘못된 접미사의 빈 결과를 다시 조회하지 않음)
+    max_retries = 1 if symbol_resolver.needs_probe(stock_code) else 2
+    
+    def fetch_history(symbol):
+        return fetch_history_with_retry(
+            symbol, lambda: load_chart_arrays(symbol, period, interval, timeout=UPSTREAM_TIMEOUT), max_retries
+        )
+    
+    # 접미사를 알면 한 번만 조회, 모르면 .KS(코스피)/.KQ(코스닥)를 동시에 조회
+    yahoo_symbol, arrays = symbol_resolver.fetch_first_available(stock_code, fetch_history)
+    if arrays is None:
+        return None
+    
+    # 종목 정보는 chart 응답 meta 에 들어있으므로 ticker.info 를 따로 조회하지 않음
+    metadata = chart_metadata(yahoo_symbol, arrays.meta)
+    with stage('conversion'):
+        candle_data = arrays.to_columns() if fmt == 'columnar' else arrays.to_candles()
+    return yahoo_symbol, metadata, candle_data, len(arrays), None
+
+def fetch_yfinance_data(stock_code, period, interval, fmt, indicator_names):
+    """yfinance 경로 - chart 경로와 같은 형태에 지표(없으면 None)를 더해 반환"""
+    modules = heavy()
+    tickers = {}
+    
+    # 심볼을 알고 있으면 종목 정보(info)를 history 와 동시에 조회 (메타데이터 캐시에 있으면 생략)
+    metadata_future = None
+    symbols = symbol_resolver.candidates(stock_code)
+    if len(symbols) == 1:
+        tickers[symbols[0]] = modules.yf.Ticker(symbols[0])
+        metadata_future = metadata_cache.load_async(symbols[0], tickers[symbols[0]])
+    
+    # .KS/.KQ 탐색은 한 번만 시도 (잘못된 접미사의 빈 결과를 다시 조회하지 않음)
+    max_retries = 1 if len(symbols) > 1 else 2
+    
+    def fetch_history(symbol):
+        # yfinance로 데이터 가져오기
+        ticker = tickers.setdefault(symbol, modules.yf.Ticker(symbol))
+        return fetch_history_with_retry(symbol, lambda: load_history(ticker, symbol, period, interval), max_retries)
+    
+    # 접미사를 알면 한 번만 조회, 모르면 .KS(코스피)/.KQ(코스닥)를 동시에 조회
+    yahoo_symbol, hist = symbol_resolver.fetch_first_available(stock_code, fetch_history)
+    if hist is None:
+        return None
+    
+    # 주식 정보 가져오기 (메타데이터 캐시 우선)
+    if metadata_future is not None and yahoo_symbol == symbols[0]:
+        with stage('info_wait'):
+            metadata = metadata_future.result()
+    else:
+        metadata = metadata_cache.load(yahoo_symbol, tickers[yahoo_symbol])
+    
+    # 데이터 변환 (컬럼 단위 벡터 연산)
+    with stage('conversion'):
+        if fmt == 'columnar':
+            # 캔들 객체 배열 대신 time/open/high/low/close/volume/adj_close 병렬 배열
+            candle_data = modules.hist_to_columns(hist)
+            total_count = len(candle_data['time'])
+        else:
+            candle_data = modules.hist_to_candles(hist)
+            total_count = len(candle_data)
+    
+    indicators = None
+    if indicator_names:
+        with stage('indicators'):
+            indicators = modules.build_indicators(
+                hist, indicator_names, modules.indicator_store, yahoo_symbol, interval
+            )
+    return yahoo_symbol, metadata, candle_data, total_count, indicators
+
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
+        # 요청 전체/단계별 시간 - Server-Timing 헤더와 요청 요약 로그로 남김 (함수 인스턴스별 /metrics 는 두지 않음)
+        self.request_timer = RequestTimer('/api/stock-data/<stock_code>', **{'http.request.method': 'GET'})
         try:
             # URL에서 종목코드 추출
             path_parts = self.path.split('/')
@@ -31,99 +237,47 @@ class handler(BaseHTTPRequestHandler):
             query_params = self.parse_query_params()
             period = query_params.get('period', '3mo')
             interval = query_params.get('interval', '1d')
-            
-            print(f"Vercel: Fetching data for {stock_code} (period: {period}, interval: {interval})")
-            
-            # 한국 주식의 경우 .KS 또는 .KQ 접미사 추가
-            if stock_code.isdigit() and len(stock_code) == 6:
-                yahoo_symbol = f"{stock_code}.KS"
-            else:
-                yahoo_symbol = stock_code
-            
-            print(f"Creating ticker for {yahoo_symbol}")
-            
-            # yfinance로 데이터 가져오기
-            ticker = yf.Ticker(yahoo_symbol)
-            
-            # 주식 정보 가져오기
-            try:
-                info = ticker.info
-                company_name = info.get('longName') or info.get('shortName') or info.get('symbol', '알 수 없음')
-                print(f"Company name: {company_name}")
-                print(f"Market: {info.get('market', 'Unknown')}")
-                print(f"Currency: {info.get('currency', 'Unknown')}")
-            except Exception as e:
-                print(f"Failed to get company info: {e}")
-                company_name = '알 수 없음'
-                info = {}
-            
-            # 히스토리 데이터 가져오기 (재시도 로직 포함)
-            hist = None
-            max_retries = 2
-            
-            for attempt in range(max_retries):
+            fmt = query_params.get('format', 'candles').lower()
+            force_refresh = query_params.get('force_refresh', 'false').lower() == 'true'
+            if fmt not in RESPONSE_FORMATS:
+                self.send_error_response(400, f"format 은 {', '.join(RESPONSE_FORMATS)} 중 하나여야 합니다")
+                return
+            # 지표는 pandas 로 계산하므로 요청에 있을 때만 무거운 모듈을 불러옴
+            indicator_names = ()
+            if query_params.get('indicators'):
                 try:
-                    print(f"Attempt {attempt + 1}/{max_retries} to fetch data...")
-                    
-                    # yfinance 히스토리 데이터 조회
-                    hist = ticker.history(period=period, interval=interval)
-                    
-                    if not hist.empty:
-                        print(f"Successfully fetched {len(hist)} data points")
-                        print(f"Date range: {hist.index[0]} to {hist.index[-1]}")
-                        break
-                    else:
-                        print(f"No data returned for {yahoo_symbol}")
-                        
-                except Exception as e:
-                    print(f"Attempt {attempt + 1} failed: {str(e)}")
-                    if attempt == max_retries - 1:
-                        raise e
-                    
-                    # 잠시 대기 후 재시도
-                    import time
-                    time.sleep(0.5)
-            
-            if hist is None or hist.empty:
-                # .KQ (코스닥)으로 재시도
-                if yahoo_symbol.endswith('.KS'):
-                    kosdaq_symbol = yahoo_symbol.replace('.KS', '.KQ')
-                    print(f"Retrying with KOSDAQ symbol: {kosdaq_symbol}")
-                    
-                    try:
-                        ticker_kq = yf.Ticker(kosdaq_symbol)
-                        hist = ticker_kq.history(period=period, interval=interval)
-                        if not hist.empty:
-                            yahoo_symbol = kosdaq_symbol
-                            print(f"Successfully fetched KOSDAQ data: {len(hist)} points")
-                    except Exception as e:
-                        print(f"KOSDAQ retry failed: {str(e)}")
-                        pass
-                
-                if hist is None or hist.empty:
-                    self.send_error_response(404, f"종목코드 {stock_code}에 대한 데이터를 찾을 수 없습니다. KOSPI(.KS)와 KOSDAQ(.KQ) 모두 시도했습니다.")
+                    indicator_names = heavy().parse_indicators(query_params['indicators'])
+                except ValueError as e:
+                    self.send_error_response(400, str(e))
                     return
             
-            # 데이터 변환
-            candle_data = []
-            print("Converting data to candle format...")
+            # /tmp 스냅샷이 있으면 업스트림 조회/변환/직렬화 없이 저장된 본문 그대로 응답
+            snapshot_key = (stock_code, period, interval, fmt, indicator_names)
+            if snapshot_store is not None and not force_refresh:
+                with stage('cache_lookup'):
+                    snapshot = snapshot_store.get(snapshot_key)
+                if snapshot is not None:
+                    version, created_at, prefix = snapshot
+                    log.debug("Snapshot HIT for %s", stock_code)
+                    self.send_conditional_response(
+                        version, lambda: finish_cached_body(prefix, 0), created_at=created_at,
+                        max_age=min(CDN_MAX_AGE, created_at + SNAPSHOT_TTL - time.time()),
+                        compress_key=(snapshot_key, version),
+                    )
+                    return
             
-            for date, row in hist.iterrows():
-                try:
-                    candle_data.append({
-                        'time': date.strftime('%Y-%m-%d'),
-                        'open': round(float(row['Open']), 2) if pd.notna(row['Open']) else 0,
-                        'high': round(float(row['High']), 2) if pd.notna(row['High']) else 0,
-                        'low': round(float(row['Low']), 2) if pd.notna(row['Low']) else 0,
-                        'close': round(float(row['Close']), 2) if pd.notna(row['Close']) else 0,
-                        'volume': int(row['Volume']) if pd.notna(row['Volume']) else 0,
-                        'adj_close': round(float(row.get('Adj Close', row['Close'])), 2) if pd.notna(row.get('Adj Close', row['Close'])) else 0
-                    })
-                except Exception as e:
-                    print(f"Error processing row for {date}: {e}")
-                    continue
+            log.info("Fetching data for %s (period: %s, interval: %s)", stock_code, period, interval)
             
-            print(f"Successfully converted {len(candle_data)} data points")
+            use_chart = UPSTREAM_MODE == 'chart' and not indicator_names
+            if use_chart:
+                result = fetch_chart_data(stock_code, period, interval, fmt)
+            else:
+                result = fetch_yfinance_data(stock_code, period, interval, fmt, indicator_names)
+            if result is None:
+                self.send_error_response(404, f"종목코드 {stock_code}에 대한 데이터를 찾을 수 없습니다. KOSPI(.KS)와 KOSDAQ(.KQ) 모두 시도했습니다.")
+                return
+            yahoo_symbol, metadata, candle_data, total_count, indicators = result
+            log.debug("Converted %d data points to %s format", total_count, fmt)
             
             # 응답 데이터 구성
             response_data = {
@@ -131,31 +285,42 @@ class handler(BaseHTTPRequestHandler):
                 'data': {
                     'symbol': yahoo_symbol,
                     'stock_code': stock_code,
-                    'company_name': company_name,
+                    'company_name': metadata['company_name'],
                     'period': period,
                     'interval': interval,
+                    'format': fmt,
                     'candles': candle_data,
-                    'total_count': len(candle_data),
+                    'total_count': total_count,
                     'server': 'Vercel Python Runtime',
                     'yfinance_version': '0.2.64',
                     'timestamp': datetime.now().isoformat(),
                     'market_info': {
-                        'currency': info.get('currency', 'KRW') if info else 'KRW',
-                        'market': info.get('market', 'KRX') if info else 'KRX',
-                        'timezone': info.get('timeZoneFullName', 'Asia/Seoul') if info else 'Asia/Seoul'
-                    },
-                    'cache_info': {
-                        'from_cache': False,
-                        'note': 'Vercel runtime does not support persistent caching'
+                        'currency': metadata['currency'],
+                        'market': metadata['market'],
+                        'timezone': metadata['timezone']
                     }
                 }
             }
+            if indicators is not None:
+                response_data['data']['indicators'] = indicators
             
-            self.send_json_response(200, response_data)
+            # 본문 버전(ETag)은 생성 시각을 제외한 내용 해시 - 데이터가 같으면 304
+            with stage('serialization'):
+                payload = encode_payload(response_data)
+                timestamp = response_data['data']['timestamp']
+                version = body_version(payload, timestamp)
+                if snapshot_store is not None:
+                    snapshot_store.set(snapshot_key, pack_cached_body(cached_body_prefix(payload, timestamp), version, time.time()))
+            self.send_conditional_response(version, lambda: with_cache_info(payload, {
+                'from_cache': False,
+                'upstream': 'chart' if use_chart else 'yfinance',
+                'candle_store': 'tmp' if not use_chart and heavy().candle_store is not None else 'unused',
+                'note': 'Vercel runtime keeps candles and response snapshots in /tmp only while the instance is warm'
+            }))
             
         except Exception as e:
             error_message = f"데이터 조회 중 오류가 발생했습니다: {str(e)}"
-            print(f"Error: {error_message}")
+            log.exception("Error: %s", error_message)
             self.send_error_response(500, error_message)
     
     def parse_query_params(self):
@@ -179,13 +344,66 @@ class handler(BaseHTTPRequestHandler):
         """JSON 응답 전송"""
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_cors_headers()
+        self.send_timing_header(status_code)
         self.end_headers()
         
-        json_data = json.dumps(data, ensure_ascii=False, indent=2)
-        self.wfile.write(json_data.encode('utf-8'))
+        # 들여쓰기 없이 인코딩 (orjson 이 있으면 사용)
+        self.wfile.write(dumps(data))
+    
+    def send_conditional_response(self, version, body_fn, created_at=None, max_age=CDN_MAX_AGE, compress_key=None):
+        """ETag/Cache-Control 을 붙여 응답 (If-None-Match 가 같으면 304, Accept-Encoding 에 맞게 압축)
+
+        스냅샷 응답은 생성 시각(Last-Modified)과 남은 TTL(max-age)을 그대로 사용하고,
+        compress_key(스냅샷 키, 버전)가 있으면 스냅샷 옆에 저장된 압축 본문을 그대로 보냄
+        """
+        etag = make_etag(version)
+        headers = {
+            'ETag': etag,
+            'Last-Modified': http_date(created_at if created_at is not None else time.time()),
+            'Cache-Control': cache_control(max_age, CDN_STALE_WHILE_REVALIDATE),
+            'Vary': 'Accept-Encoding',
+        }
+        if is_not_modified(self.headers, etag, None):
+            self.send_response(304)
+            self.send_cors_headers()
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_timing_header(304)
+            self.end_headers()
+            return
+        
+        with stage('compression'):
+            compressed_cache = snapshot_store.compressed if compress_key is not None else None
+            body, encoding = encode_body(body_fn(), self.headers.get('Accept-Encoding'), compressed_cache, compress_key)
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_cors_headers()
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_timing_header(200)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_cors_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, If-None-Match')
+        self.send_header('Access-Control-Expose-Headers', 'ETag, Last-Modified, Server-Timing')
+    
+    def send_timing_header(self, status_code):
+        """요청 종료 기록 후 Server-Timing 헤더 전송 (요청당 한 번)"""
+        timer = getattr(self, 'request_timer', None)
+        if timer is None:
+            return
+        self.request_timer = None
+        timing = timer.finish(status_code)
+        log.info("GET %s %d (%s)", self.path, status_code, timing, extra={'status': status_code, 'timing': timing})
+        self.send_header('Server-Timing', timing)
+        self.send_header('Timing-Allow-Origin', '*')
     
     def send_error_response(self, status_code, message):
         """에러 응답 전송"""
@@ -203,7 +421,5 @@ class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         """CORS preflight 요청 처리"""
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_cors_headers()
         self.end_headers() 
\ No newline at end of file
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+sys.path.insert(0, BENCH_DIR)
+
+from stub_chart_server import start_stub_server
+from yahoo_chart import AsyncChartClient, chart_params, chart_to_history
+
+# 업스트림 조회 방식별 동시 처리량 비교 (로컬 스텁 서버 사용, 네트워크 불필요)
+#
+#   cd python-server && python benchmarks/async_fetch_bench.py --symbols 64 --latency-ms 100
+#
+# - sequential: 한 스레드에서 순서대로 블로킹 요청 (기존 미스 처리 1건 = 워커 스레드 1개 점유)
+# - threads:    gthread 워커 하나의 스레드 수(--threads)만큼 블로킹 요청을 동시에 수행
+# - async:      AsyncChartClient 하나(이벤트 루프 1개 + 커넥션 풀)로 모든 요청을 동시에 수행
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+
+def blocking_fetch(session, base_url, symbol, period):
+    response = session.get(f"{base_url}/v8/finance/chart/{symbol}", params=chart_params(period, '1d'), timeout=5)
+    response.raise_for_status()
+    return chart_to_history(response.json(), '1d')[0]
+
+
+def run_sequential(base_url, symbols, period):
+    with requests.Session() as session:
+        return [len(blocking_fetch(session, base_url, symbol, period)) for symbol in symbols]
+
+
+def run_threads(base_url, symbols, period, threads):
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(lambda symbol: len(blocking_fetch(session, base_url, symbol, period)), symbols))
+
+
+def run_async(client, symbols, period):
+    return [len(hist) if not isinstance(hist, Exception) else 0
+            for hist in client.fetch_many(symbols, period, '1d').values()]
+
+
+def measure(name, fn, symbol_count):
+    started = time.perf_counter()
+    rows = fn()
+    elapsed = time.perf_counter() - started
+    result = {
+        'scenario': name,
+        'symbols': symbol_count,
+        'seconds': round(elapsed, 3),
+        'fetches_per_second': round(symbol_count / elapsed, 1),
+        'rows': sum(rows),
+    }
+    print(f"{name:>10}: {result['seconds']:7.3f}s  {result['fetches_per_second']:8.1f} fetch/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Async upstream fetch benchmark')
+    parser.add_argument('--symbols', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--period', default='1y')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    os.environ['BENCH_UPSTREAM_LATENCY_MS'] = str(args.latency_ms)
+    server, base_url = start_stub_server()
+    symbols = [f"{100000 + i:06d}.KS" for i in range(args.symbols)]
+    client = AsyncChartClient(base_url=base_url, max_connections=max(args.symbols, 32))
+
+    try:
+        # 연결/스텁 응답 생성 워밍업
+        run_async(client, symbols, args.period)
+        results = [
+            measure('sequential', lambda: run_sequential(base_url, symbols, args.period), len(symbols)),
+            measure('threads', lambda: run_threads(base_url, symbols, args.period, args.threads), len(symbols)),
+            measure('async', lambda: run_async(client, symbols, args.period), len(symbols)),
+        ]
+    finally:
+        client.close()
+        server.shutdown()
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'latency_ms': args.latency_ms,
+        'threads': args.threads,
+        'period': args.period,
+        'results': results,
+        'client_stats': client.get_stats(),
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"async_fetch_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
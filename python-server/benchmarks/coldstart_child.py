@@ -0,0 +1,67 @@
+import time
+
+STARTED = time.perf_counter()
+
+import json
+import os
+import statistics
+import sys
+
+# suite.py 의 coldstart 섹션이 새 프로세스로 실행하는 Vercel 함수 콜드 스타트 측정
+# 모듈 로드 / 첫 응답 / 이후 웜 응답 시간을 JSON 한 줄로 출력합니다.
+#
+#   python benchmarks/coldstart_child.py <경로> <웜 요청 수>
+#
+# STOCK_VERCEL_UPSTREAM=yfinance 이면 가짜 yfinance(fake_upstream)를 설치하며,
+# 이때 yfinance/pandas import 도 측정 시간에 포함됩니다 (실제 함수도 같은 모듈을 불러오므로).
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+
+def elapsed_ms(since):
+    return round((time.perf_counter() - since) * 1000, 3)
+
+
+def main():
+    path, warm_requests = sys.argv[1], int(sys.argv[2])
+    if os.getenv('STOCK_VERCEL_UPSTREAM', 'chart').lower() == 'yfinance':
+        import fake_upstream
+
+        fake_upstream.install()
+
+    from vercel_client import VercelClient, load_handler_module
+
+    client = VercelClient(load_handler_module())
+    loaded_ms = elapsed_ms(STARTED)
+
+    started = time.perf_counter()
+    status, _, _ = client.get(path)
+    first_ms = elapsed_ms(started)
+    first_response_ms = elapsed_ms(STARTED)
+    modules = {name: name in sys.modules for name in ('pandas', 'numpy', 'yfinance')}
+
+    warm = []
+    refresh = []
+    for _ in range(warm_requests):
+        started = time.perf_counter()
+        client.get(path)
+        warm.append(time.perf_counter() - started)
+        # 스냅샷을 건너뛰고 업스트림까지 가는 웜 호출
+        started = time.perf_counter()
+        client.get(f"{path}&force_refresh=true")
+        refresh.append(time.perf_counter() - started)
+
+    print(json.dumps({
+        'status': status,
+        'module_load_ms': loaded_ms,
+        'first_request_ms': first_ms,
+        'first_response_ms': first_response_ms,
+        'warm_p50_ms': round(statistics.median(warm) * 1000, 3) if warm else None,
+        'warm_refresh_p50_ms': round(statistics.median(refresh) * 1000, 3) if refresh else None,
+        'imported': modules,
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+sys.path.insert(0, BENCH_DIR)
+
+from candle_store import CandleStore
+from resample import resample_ohlcv
+
+# 기준 일봉 시계열에서 만든(잘라내기/리샘플링) 결과와 업스트림 직접 조회 결과 비교
+#
+#   cd python-server && python benchmarks/compare_derived.py                 # yfinance 실제 조회 (네트워크 필요)
+#   cd python-server && python benchmarks/compare_derived.py --offline       # pandas resample 기준으로 벡터화 구현만 검증
+#
+# 불일치가 있으면 종료 코드 1 을 반환합니다.
+
+CASES = [
+    ('1mo', '1d'), ('3mo', '1d'), ('6mo', '1d'), ('1y', '1d'),
+    ('3mo', '1wk'), ('1y', '1wk'), ('2y', '1wk'),
+    ('1y', '1mo'), ('2y', '1mo'), ('5y', '1mo'),
+]
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+
+def compare_frames(expected, actual, rtol):
+    """두 history DataFrame 비교, 문제 목록 반환 (비어 있으면 일치)"""
+    problems = []
+    if len(expected) != len(actual):
+        problems.append(f"row count {len(actual)} != {len(expected)}")
+    common = expected.index.intersection(actual.index)
+    missing = expected.index.difference(actual.index)
+    if len(missing):
+        problems.append(f"missing bars: {[str(ts.date()) for ts in missing[:5]]}")
+    for name in PRICE_COLUMNS + ['Volume']:
+        e = expected.loc[common, name].to_numpy(dtype=np.float64)
+        a = actual.loc[common, name].to_numpy(dtype=np.float64)
+        bad = ~np.isclose(a, e, rtol=rtol, equal_nan=True)
+        if bad.any():
+            first = common[np.argmax(bad)]
+            problems.append(f"{name}: {int(bad.sum())} bars differ (first {first.date()}: {a[bad][0]} != {e[bad][0]})")
+    return problems
+
+
+def pandas_reference(daily, interval):
+    """pandas resample 로 만든 기준 결과 (벡터화 구현 검증용)"""
+    rule = 'W-MON' if interval == '1wk' else 'MS'
+    local = daily.tz_localize(None)
+    grouped = local.resample(rule, label='left', closed='left')
+    result = pd.DataFrame({
+        'Open': grouped['Open'].first(),
+        'High': grouped['High'].max(),
+        'Low': grouped['Low'].min(),
+        'Close': grouped['Close'].last(),
+        'Volume': grouped['Volume'].sum(),
+    }).dropna(subset=['Open'])
+    return result.tz_localize(daily.index.tz)
+
+
+def run_offline():
+    from fake_upstream import make_history
+
+    failures = 0
+    for rows in (5, 100, 1000, 6000):
+        daily = make_history('005930.KS', rows)[['Open', 'High', 'Low', 'Close', 'Volume']]
+        for interval in ('1wk', '1mo'):
+            problems = compare_frames(pandas_reference(daily, interval), resample_ohlcv(daily, interval), 1e-12)
+            failures += bool(problems)
+            print(f"{rows:>5} rows {interval:>4}: {'OK' if not problems else '; '.join(problems)}")
+    return failures
+
+
+def run_upstream(codes, rtol, base_period):
+    import yfinance as yf
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = CandleStore(os.path.join(data_dir, 'candles.sqlite'))
+        for symbol in codes:
+            ticker = yf.Ticker(symbol)
+            for period, interval in CASES:
+                direct = ticker.history(period=period, interval=interval)
+                derived = store.load_derived_history(ticker, symbol, period, interval, base_period)
+                direct = direct[direct['Close'].notna()]
+                problems = compare_frames(direct, derived, rtol)
+                failures += bool(problems)
+                print(f"{symbol} {period:>4} {interval:>4}: {'OK' if not problems else '; '.join(problems)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare derived candles with direct upstream candles')
+    parser.add_argument('--codes', nargs='+', default=['005930.KS', '035720.KS', '091990.KQ'])
+    parser.add_argument('--base-period', default='5y')
+    parser.add_argument('--rtol', type=float, default=1e-6)
+    parser.add_argument('--offline', action='store_true')
+    args = parser.parse_args()
+
+    failures = run_offline() if args.offline else run_upstream(args.codes, args.rtol, args.base_period)
+    print(f"{failures} mismatching case(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import os
+import random
+import threading
+import time
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# 벤치마크용 yfinance 대역(stand-in)
+# yf.Ticker / yf.download 를 결정적인 OHLCV 데이터를 돌려주는 가짜 구현으로 교체합니다.
+# - BENCH_UPSTREAM_LATENCY_MS: 업스트림 호출당 지연 (기본 100ms)
+# - BENCH_UPSTREAM_ERROR_RATE: 호출 실패 확률 (기본 0)
+# - BENCH_UPSTREAM_ERROR_MODE: 실패 형태 - raise(예외, 기본) / empty(빈 DataFrame, yfinance 의 '데이터 없음' 응답)
+# - BENCH_KOSDAQ_CODES: .KQ 로만 데이터가 있는 종목코드 (쉼표 구분)
+# - BENCH_FIXTURES_DIR: 녹화된 OHLCV 픽스처(<심볼>.csv) 디렉터리 (기본 benchmarks/fixtures, 픽스처가 없는 심볼은 합성 데이터)
+#
+# 픽스처 녹화 (실제 yfinance 조회, 네트워크 필요):
+#   cd python-server && python benchmarks/fake_upstream.py 005930.KS 035720.KS 091990.KQ --period max
+
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126,
+    '1y': 252, '2y': 504, '5y': 1260, '10y': 2520, 'ytd': 200, 'max': 6000,
+}
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+calls = {'info': 0, 'history': 0, 'download': 0}
+_calls_lock = threading.Lock()
+
+
+def _count(name):
+    # 동시 미스 측정에서 호출 수를 정확히 세기 위해 잠금
+    with _calls_lock:
+        calls[name] += 1
+
+
+def _latency():
+    return float(os.getenv('BENCH_UPSTREAM_LATENCY_MS', 100)) / 1000
+
+
+def _maybe_fail(symbol):
+    """오류 주입 - raise 모드는 예외 발생, empty 모드는 True 반환 (호출자가 빈 응답을 돌려줌)"""
+    if random.random() >= float(os.getenv('BENCH_UPSTREAM_ERROR_RATE', 0)):
+        return False
+    if os.getenv('BENCH_UPSTREAM_ERROR_MODE', 'raise').lower() == 'empty':
+        return True
+    raise RuntimeError(f"fake upstream error for {symbol}")
+
+
+def _has_data(symbol):
+    code, _, suffix = symbol.partition('.')
+    kosdaq = set(filter(None, os.getenv('BENCH_KOSDAQ_CODES', '').split(',')))
+    if suffix == 'KS':
+        return code not in kosdaq
+    if suffix == 'KQ':
+        return code in kosdaq
+    return True
+
+
+def make_history(symbol, rows, end=None, freq='B'):
+    """종목별로 결정적인 OHLCV DataFrame 생성 (기본 영업일 일봉, freq='min' 등으로 분봉)"""
+    end = (end or pd.Timestamp.now(tz='Asia/Seoul')).normalize()
+    return _make_history(symbol, rows, end, freq).copy()
+
+
+@lru_cache(maxsize=256)
+def _make_history(symbol, rows, end, freq):
+    end = end.tz_localize(None)
+    if freq == 'B':
+        index = pd.bdate_range(end=end, periods=rows).tz_localize('Asia/Seoul')
+    else:
+        # 일봉 범위를 넘는 행 수(수만 개 이상)는 분봉 등 짧은 간격으로 생성
+        index = pd.date_range(end=end, periods=rows, freq=freq).tz_localize('Asia/Seoul')
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    close = np.maximum(1000, 50000 + np.cumsum(rng.normal(0, 500, rows))).round(0)
+    spread = rng.uniform(100, 800, rows).round(0)
+    return pd.DataFrame(
+        {
+            'Open': close + rng.uniform(-300, 300, rows).round(0),
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Volume': rng.integers(100_000, 5_000_000, rows),
+            'Dividends': 0.0,
+            'Stock Splits': 0.0,
+        },
+        index=pd.DatetimeIndex(index, name='Date'),
+    )
+
+
+@lru_cache(maxsize=256)
+def _load_fixture(path):
+    if not os.path.exists(path):
+        return None
+    hist = pd.read_csv(path, index_col=0)
+    hist.index = pd.DatetimeIndex(pd.to_datetime(hist.index, utc=True).tz_convert('Asia/Seoul'), name='Date')
+    return hist
+
+
+def fixture_path(symbol):
+    return os.path.join(os.getenv('BENCH_FIXTURES_DIR', FIXTURES_DIR), f"{symbol}.csv")
+
+
+def full_history(symbol):
+    """심볼의 전체 일봉 (녹화된 픽스처 우선, 없으면 합성 데이터)"""
+    fixture = _load_fixture(fixture_path(symbol))
+    if fixture is not None:
+        return fixture.copy()
+    return make_history(symbol, PERIOD_DAYS['max'])
+
+
+def upstream_source():
+    """픽스처 디렉터리에 녹화된 심볼 수 (결과 기록용)"""
+    directory = os.getenv('BENCH_FIXTURES_DIR', FIXTURES_DIR)
+    if not os.path.isdir(directory):
+        return {'fixtures': 0}
+    return {'fixtures': sum(1 for name in os.listdir(directory) if name.endswith('.csv'))}
+
+
+class FakeTicker:
+    def __init__(self, symbol, *args, **kwargs):
+        self.ticker = symbol
+
+    @property
+    def info(self):
+        _count('info')
+        time.sleep(_latency())
+        if _maybe_fail(self.ticker):
+            return {}
+        return {
+            'symbol': self.ticker,
+            'longName': f"Fake {self.ticker}",
+            'currency': 'KRW',
+            'market': 'kr_market',
+            'timeZoneFullName': 'Asia/Seoul',
+        }
+
+    def history(self, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        _count('history')
+        time.sleep(_latency())
+        if _maybe_fail(self.ticker) or not _has_data(self.ticker):
+            return pd.DataFrame()
+        hist = full_history(self.ticker)
+        if start is not None:
+            return hist[hist.index >= pd.Timestamp(start, tz='Asia/Seoul')]
+        return hist.iloc[-PERIOD_DAYS.get(period, 63):]
+
+
+def fake_download(tickers, period='1mo', interval='1d', group_by='column', **kwargs):
+    _count('download')
+    time.sleep(_latency())
+    symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+    # yf.download 는 종목별 실패를 예외 대신 결과에서 빠진 종목으로 돌려줌
+    error_rate = float(os.getenv('BENCH_UPSTREAM_ERROR_RATE', 0))
+    frames = {
+        symbol: full_history(symbol).iloc[-PERIOD_DAYS.get(period, 63):][['Open', 'High', 'Low', 'Close', 'Volume']]
+        for symbol in symbols if _has_data(symbol) and random.random() >= error_rate
+    }
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1)
+
+
+def install():
+    """yfinance 모듈의 Ticker/download 를 가짜 구현으로 교체"""
+    yf.Ticker = FakeTicker
+    yf.download = fake_download
+
+
+def record_fixtures(symbols, period='max'):
+    """실제 yfinance 로 일봉을 받아 픽스처 CSV 로 저장 (install() 전에 호출)"""
+    directory = os.getenv('BENCH_FIXTURES_DIR', FIXTURES_DIR)
+    os.makedirs(directory, exist_ok=True)
+    for symbol in symbols:
+        hist = yf.Ticker(symbol).history(period=period, interval='1d')
+        if hist.empty:
+            print(f"{symbol}: no data, skipped")
+            continue
+        hist.to_csv(fixture_path(symbol))
+        print(f"{symbol}: {len(hist)} rows -> {fixture_path(symbol)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Record OHLCV fixtures for the fake upstream')
+    parser.add_argument('symbols', nargs='+', help='Yahoo 심볼 (예: 005930.KS)')
+    parser.add_argument('--period', default='max')
+    args = parser.parse_args()
+    record_fixtures(args.symbols, args.period)
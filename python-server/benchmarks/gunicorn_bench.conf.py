@@ -0,0 +1,15 @@
+import os
+import sys
+
+# 벤치마크용 gunicorn 설정 - 운영 설정을 그대로 쓰고 워커 시작 시 가짜 업스트림 설치
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _here)
+
+with open(os.path.join(_here, '..', 'gunicorn.conf.py')) as f:
+    exec(f.read())
+
+
+def post_worker_init(worker):
+    import fake_upstream
+
+    fake_upstream.install()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+sys.path.insert(0, BENCH_DIR)
+
+from candle_store import CandleStore
+from fake_upstream import make_history
+from indicators import IndicatorStore, build_indicators, compute, compute_all, parse_indicators
+
+# 기술적 지표 계산 비용 측정 (period=max 수준의 일봉, 네트워크 불필요)
+#
+#   cd python-server && python benchmarks/indicators_bench.py --rows 6000 --appends 50
+#
+# - compute_full:   종가 배열로 요청 지표 전체를 처음부터 계산
+# - store_full:     저장소에 지표가 없을 때 (처음 계산 + SQLite 기록)
+# - store_append:   봉 하나 추가 후 갱신 (직전 상태에서 새 봉만 계산)
+# - response:       저장된 지표 조회 + 응답 형식(JSON 리스트) 변환
+# 증분 결과가 처음부터 계산한 값과 다르면 종료 코드 1 을 반환합니다.
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Technical indicator benchmark')
+    parser.add_argument('--rows', type=int, default=6000)
+    parser.add_argument('--appends', type=int, default=50)
+    parser.add_argument('--indicators', default='ma20,ma60,ema12,rsi,macd,bb')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    names = parse_indicators(args.indicators)
+    hist = make_history('005930.KS', args.rows + args.appends)
+    base, appended = hist.iloc[:args.rows], hist.iloc[args.rows:]
+    closes = base['Close'].to_numpy(dtype=np.float64)
+
+    results = {}
+    _, results['compute_full_ms'] = timed(lambda: compute_all(base, names), repeat=5)
+    for name in names:
+        _, results[f"compute_{name}_ms"] = timed(lambda: compute(name, closes), repeat=5)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        candle_store = CandleStore(os.path.join(data_dir, 'candles.sqlite'))
+        store = IndicatorStore(candle_store)
+        candle_store.write('005930.KS', '1d', base)
+
+        _, results['store_full_ms'] = timed(lambda: [store.update('005930.KS', '1d', name) for name in names])
+
+        append_ms = []
+        for i in range(len(appended)):
+            candle_store.write('005930.KS', '1d', appended.iloc[i:i + 1])
+            append_ms.append(timed(lambda: [store.update('005930.KS', '1d', name) for name in names])[1])
+        results['store_append_ms'] = {
+            'mean': round(float(np.mean(append_ms)), 3) if append_ms else None,
+            'p50': round(float(np.percentile(append_ms, 50)), 3) if append_ms else None,
+            'max': round(float(np.max(append_ms)), 3) if append_ms else None,
+        }
+
+        stored = candle_store.read('005930.KS', '1d')
+        _, results['response_ms'] = timed(
+            lambda: build_indicators(stored, names, store, '005930.KS', '1d'), repeat=5
+        )
+
+        # 증분 계산 결과 검증
+        incremental = store.load('005930.KS', '1d', names, stored.index)
+        expected = compute_all(stored, names)
+        mismatches = [
+            name for name in names
+            if not np.allclose(incremental[name], expected[name][:, :incremental[name].shape[1]],
+                               rtol=1e-9, equal_nan=True)
+        ]
+        store_stats = store.get_stats()
+
+    for key, value in results.items():
+        if isinstance(value, float):
+            results[key] = round(value, 3)
+        print(f"{key:>24}: {results[key]}")
+    print(f"incremental == full recompute: {not mismatches} {mismatches or ''}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'rows': args.rows,
+        'appends': args.appends,
+        'indicators': list(names),
+        'results': results,
+        'store_stats': store_stats,
+        'mismatches': mismatches,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"indicators_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
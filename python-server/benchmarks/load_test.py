@@ -0,0 +1,160 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# gunicorn 워커 수에 따른 처리량 측정 부하 테스트
+# 가짜 업스트림(fake_upstream.py)을 쓰므로 네트워크 없이 실행됩니다.
+#
+#   cd python-server && python benchmarks/load_test.py --workers 1 2 4
+#
+# 시나리오
+# - miss: force_refresh=true 로 매 요청마다 업스트림 조회 (업스트림 지연이 지배)
+# - hit:  캐시된 period=max 응답 반복 조회 (직렬화 CPU 가 지배)
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+CODES = ['005930', '000660', '035720', '035420', '051910', '005380', '068270', '105560']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, threads, port, data_dir, latency_ms):
+    env = dict(os.environ)
+    env.update({
+        'PYTHON_API_PORT': str(port),
+        'GUNICORN_WORKERS': str(workers),
+        'GUNICORN_THREADS': str(threads),
+        'GUNICORN_LOG_LEVEL': 'warning',
+        'BENCH_UPSTREAM_LATENCY_MS': str(latency_ms),
+        'STOCK_CANDLE_STORE_ENABLED': 'false',
+        'STOCK_SYMBOL_CACHE_PATH': os.path.join(data_dir, 'symbols.sqlite'),
+        'STOCK_INFO_CACHE_PATH': os.path.join(data_dir, 'metadata.sqlite'),
+        'STOCK_SCREENER_STORE_PATH': os.path.join(data_dir, 'screener.sqlite'),
+        'STOCK_PREFETCH_SCAN_SECONDS': '0',
+        # 서버 처리량을 재기 위해 업스트림 호출 한도는 끔 (가짜 업스트림)
+        'STOCK_UPSTREAM_RATE_PER_SECOND': '0',
+    })
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'benchmarks/gunicorn_bench.conf.py', 'stock_api:app'],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def run_load(port, paths, concurrency, duration):
+    """duration 초 동안 concurrency 개 클라이언트가 paths 를 순환 요청"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client(offset):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        i = offset
+        local = []
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', paths[i % len(paths)])
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[0] += 1
+            except OSError:
+                errors[0] += 1
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            local.append(time.perf_counter() - start)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='gunicorn worker scaling load test')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=1, help='워커당 스레드 수')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0, help='시나리오별 측정 시간(초)')
+    parser.add_argument('--latency-ms', type=float, default=100, help='가짜 업스트림 지연')
+    parser.add_argument('--output', default=None, help='결과 JSON 경로')
+    args = parser.parse_args()
+
+    scenarios = {
+        'miss': [f'/api/stock-data/{code}?period=1mo&force_refresh=true' for code in CODES],
+        'hit': [f'/api/stock-data/{code}?period=max' for code in CODES],
+    }
+
+    results = []
+    for workers in args.workers:
+        port = free_port()
+        with tempfile.TemporaryDirectory() as data_dir:
+            proc = start_server(workers, args.threads, port, data_dir, args.latency_ms)
+            try:
+                # 각 워커 캐시 예열 (hit 시나리오용, 프로세스 내 캐시는 워커별로 따로 채워짐)
+                run_load(port, scenarios['hit'], args.concurrency, 1.0 + workers)
+                for name, paths in scenarios.items():
+                    stats = run_load(port, paths, args.concurrency, args.duration)
+                    stats.update({'workers': workers, 'threads': args.threads, 'scenario': name})
+                    results.append(stats)
+                    print(f"workers={workers} threads={args.threads} {name:4s} "
+                          f"{stats['throughput_rps']:8.1f} req/s  p50={stats['p50_ms']}ms  "
+                          f"p99={stats['p99_ms']}ms  errors={stats['errors']}")
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"load_test-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump({
+            'benchmark': 'load_test',
+            'timestamp': datetime.now().isoformat(),
+            'cpu_count': os.cpu_count(),
+            'config': vars(args),
+            'results': results,
+        }, f, indent=2)
+    print(f"Saved results to {output}")
+
+
+if __name__ == '__main__':
+    main()
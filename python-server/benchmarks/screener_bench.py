@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+os.environ.setdefault('STOCK_LOG_LEVEL', 'WARNING')
+
+from response_body import dumps
+from screener import Screener, batch_metrics
+from symbol_resolver import SymbolResolver
+
+# 스크리너 갱신/조회 시간 측정
+#
+#   cd python-server && python benchmarks/screener_bench.py --stocks 2500 --workers 1 4 8
+#
+# - 가짜 일괄 조회(배치마다 --latency-ms 지연 + 결정적인 1년 일봉)로 상장 종목 전체 갱신 시간을 동시 배치 수별로 측정
+# - 배치 하나의 지표 계산 시간, 조회 종류별(정렬만, 시장+범위 필터, 종목 지정) 조회+결과 행 변환+JSON 인코딩 p50/p99 (마이크로초)
+# - 갱신 결과 종목 수가 전체와 다르면 종료 코드 1 을 반환합니다.
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+def make_download(rows, latency, kosdaq_every):
+    """yf.download(group_by='ticker') 형태의 가짜 일괄 조회 (kosdaq_every 번째 종목은 .KQ 로만 데이터가 있음)"""
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=rows).tz_localize('Asia/Seoul')
+
+    def history(symbol):
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        close = np.maximum(1000, 50000 + np.cumsum(rng.normal(0, 500, rows))).round(0)
+        spread = rng.uniform(100, 800, rows).round(0)
+        volume = rng.integers(10000, 5000000, rows).astype(np.float64)
+        return np.column_stack([close, close + spread, close - spread, close, volume])
+
+    def download(symbols):
+        time.sleep(latency)
+        found = []
+        for symbol in symbols:
+            code, _, suffix = symbol.partition('.')
+            kosdaq = int(code) % kosdaq_every == 0 if kosdaq_every else False
+            if (suffix == 'KQ') == kosdaq:
+                found.append(symbol)
+        if not found:
+            return pd.DataFrame()
+        values = np.hstack([history(symbol) for symbol in found])
+        columns = pd.MultiIndex.from_product([found, FIELDS])
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    return download
+
+
+def microseconds(timings):
+    timings = np.array(timings) * 1e6
+    return {
+        'p50_us': round(float(np.percentile(timings, 50)), 1),
+        'p99_us': round(float(np.percentile(timings, 99)), 1),
+        'max_us': round(float(timings.max()), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Screener refresh / query benchmark')
+    parser.add_argument('--stocks', type=int, default=2500)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--latency-ms', type=float, default=300, help='fake bulk download latency per batch')
+    parser.add_argument('--rows', type=int, default=252, help='daily rows per stock')
+    parser.add_argument('--kosdaq-every', type=int, default=3, help='every Nth code is KOSDAQ only (.KS miss)')
+    parser.add_argument('--queries', type=int, default=2000, help='queries per kind')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    companies = [{'stock_code': f"{i:06d}", 'corp_name': f"회사{i}"} for i in range(1, args.stocks + 1)]
+    download = make_download(args.rows, args.latency_ms / 1000, args.kosdaq_every)
+
+    symbols = [f"{i:06d}.KS" for i in range(1, args.batch_size + 1)]
+    data = download(symbols)
+    timings = []
+    for _ in range(50):
+        started = time.perf_counter()
+        batch_metrics(data, symbols)
+        timings.append(time.perf_counter() - started)
+    metrics_ms = round(float(np.median(timings)) * 1000, 2)
+
+    refresh = {}
+    screener = None
+    problems = []
+    for workers in args.workers:
+        # 접미사 캐시 없이 시작 - .KS 에 없는 종목은 배치마다 .KQ 재조회
+        screener = Screener(download, SymbolResolver(None), loader=lambda: companies,
+                            batch_size=args.batch_size, max_workers=workers, refresh_interval_seconds=0)
+        started = time.perf_counter()
+        count = screener.refresh()
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        screener.refresh()
+        warm = time.perf_counter() - started
+        refresh[str(workers)] = {'cold_seconds': round(cold, 2), 'resolved_seconds': round(warm, 2), 'stocks': count}
+        if count != args.stocks:
+            problems.append(f"workers={workers}: refreshed {count} of {args.stocks} stocks")
+
+    table = screener.table
+    rng = np.random.default_rng(5)
+    kinds = {
+        'sort_change_pct': lambda: dict(sort='change_pct'),
+        'sort_trade_value_asc': lambda: dict(sort='trade_value', descending=False),
+        'market_range_filter': lambda: dict(sort='volume', market='KOSDAQ',
+                                            filters={'position_52w': (0.8, None), 'change_pct': (0, None)}),
+        'deep_page': lambda: dict(sort='position_52w', offset=1000),
+        'codes': lambda: dict(codes=table.codes[rng.integers(0, len(table), 100)].tolist()),
+    }
+    latency = {}
+    for kind, make_query in kinds.items():
+        timings = []
+        for _ in range(args.queries):
+            query = make_query()
+            started = time.perf_counter()
+            total, positions = table.query(limit=args.limit, **query)
+            dumps(table.rows(positions))
+            timings.append(time.perf_counter() - started)
+        latency[kind] = microseconds(timings)
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'stocks': args.stocks,
+        'batch_size': args.batch_size,
+        'latency_ms': args.latency_ms,
+        'table_bytes': table.nbytes(),
+        'batch_metrics_ms': metrics_ms,
+        'refresh': refresh,
+        'limit': args.limit,
+        'query': latency,
+        'problems': problems,
+    }
+    print(f"{args.stocks} stocks, {args.batch_size} per batch, {args.latency_ms:g} ms per download, "
+          f"table {table.nbytes() / 1024:.0f} KiB, metrics {metrics_ms} ms per batch")
+    for workers, stats in refresh.items():
+        print(f"  workers {workers:>2}: refresh {stats['cold_seconds']:>6}s (suffixes resolved: {stats['resolved_seconds']}s)")
+    for kind, stats in latency.items():
+        print(f"{kind:>22}: p50 {stats['p50_us']:>7} us  p99 {stats['p99_us']:>7} us  max {stats['max_us']:>8} us")
+    for problem in problems:
+        print(f"PROBLEM: {problem}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"screener_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
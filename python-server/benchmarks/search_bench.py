@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+from company_search import CompanyIndex, choseong
+from corp_codes import load_companies
+
+# 회사 검색 인덱스 지연 시간 측정
+#
+#   cd python-server && python benchmarks/search_bench.py --companies 100000
+#
+# - downloads/corpCodes.json(또는 Postgres)이 있으면 실제 회사 목록, 없으면(--synthetic) 무작위 한글 회사명 사용
+# - 검색어 종류별(접두어, 부분 문자열, 초성, 오타, 종목코드) 1회 검색 시간 p50/p99 (마이크로초)
+# - 실제 목록에 들어 있는 회사를 찾지 못한 검색이 있으면 종료 코드 1 을 반환합니다.
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+
+def synthetic_companies(count, seed=7):
+    """무작위 한글 회사명 목록 (앞 2.5% 는 상장사)"""
+    rng = random.Random(seed)
+    syllables = [chr(code) for code in range(0xAC00, 0xD7A4, 37)]
+    suffixes = ['', '', '', '홀딩스', '전자', '바이오', '건설', '산업']
+    companies = []
+    for i in range(count):
+        name = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 5))) + rng.choice(suffixes)
+        companies.append({
+            'corp_code': f"{i:08d}",
+            'corp_name': name,
+            'corp_eng_name': None,
+            'stock_code': f"{i:06d}" if i < count // 40 else None,
+        })
+    return companies
+
+
+def typo(text, rng):
+    """한 글자를 다른 글자로 바꾼 검색어"""
+    position = rng.randrange(len(text))
+    return text[:position] + chr(0xAC00 + rng.randrange(11172)) + text[position + 1:]
+
+
+def make_queries(companies, count, rng):
+    """검색어 종류별 (검색어, 찾아야 하는 corp_code) 목록"""
+    named = [c for c in companies if len(c['corp_name']) >= 4]
+    listed = [c for c in companies if c.get('stock_code')]
+    queries = {name: [] for name in ('exact', 'prefix', 'substring', 'choseong', 'typo', 'stock_code')}
+    for _ in range(count):
+        company = rng.choice(named)
+        name = company['corp_name']
+        queries['exact'].append((name, company['corp_code']))
+        queries['prefix'].append((name[:2], None))
+        queries['substring'].append((name[1:3], None))
+        queries['choseong'].append((choseong(name), company['corp_code']))
+        queries['typo'].append((typo(name, rng), None))
+        if listed:
+            company = rng.choice(listed)
+            queries['stock_code'].append((company['stock_code'], company['corp_code']))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Company search latency benchmark')
+    parser.add_argument('--companies', type=int, default=100000, help='synthetic company count')
+    parser.add_argument('--synthetic', action='store_true', help='ignore corpCodes.json / Postgres')
+    parser.add_argument('--queries', type=int, default=2000, help='queries per kind')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    companies = [] if args.synthetic else load_companies()
+    source = 'corp_codes'
+    if not companies:
+        companies = synthetic_companies(args.companies)
+        source = 'synthetic'
+    index = CompanyIndex(companies)
+    rng = random.Random(11)
+
+    by_kind = {}
+    missed = 0
+    for kind, queries in make_queries(companies, args.queries, rng).items():
+        timings = []
+        for query, expected in queries:
+            started = time.perf_counter()
+            results = index.search(query, args.limit)
+            timings.append(time.perf_counter() - started)
+            # 완전 일치/초성/종목코드는 같은 이름이 limit 개를 넘지 않는 한 결과에 있어야 함
+            if expected is not None and expected not in {index.companies[doc_id]['corp_code'] for doc_id, _ in results}:
+                if kind != 'choseong' or len(results) < args.limit:
+                    missed += 1
+        timings = np.array(timings) * 1e6
+        by_kind[kind] = {
+            'queries': len(queries),
+            'p50_us': round(float(np.percentile(timings, 50)), 1),
+            'p99_us': round(float(np.percentile(timings, 99)), 1),
+            'max_us': round(float(timings.max()), 1),
+        }
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'source': source,
+        'companies': len(index),
+        'build_seconds': round(index.build_seconds, 3),
+        'limit': args.limit,
+        'latency': by_kind,
+        'missed': missed,
+    }
+    print(f"{len(index)} companies ({source}), index built in {index.build_seconds:.2f}s")
+    for kind, stats in by_kind.items():
+        print(f"{kind:>12}: p50 {stats['p50_us']:>7} us  p99 {stats['p99_us']:>7} us  max {stats['max_us']:>8} us")
+    print(f"{'missed':>12}: {missed}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"search_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    sys.exit(1 if missed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+from stream import StreamHub
+
+# 분봉 스트리밍 팬아웃 측정 (가짜 분봉 업스트림 사용, 네트워크 불필요)
+#
+#   cd python-server && python benchmarks/stream_bench.py --subscribers 500 --seconds 5
+#
+# - 폴링마다 마지막 봉 값이 바뀌고 --bar-every 번째 폴링마다 새 봉이 생기는 업스트림
+# - 구독자 스레드 N 개가 같은 종목을 구독하고, 받은 snapshot/bars 이벤트로 봉 목록을 재구성
+# - 업스트림 호출 수(구독자 수와 무관해야 함), 발행 -> 수신 지연 p50/p99, 최종 봉 목록 일치 여부 기록
+# 재구성한 봉 목록이 업스트림과 다르면 종료 코드 1 을 반환합니다.
+#
+#   cd python-server && python benchmarks/stream_bench.py --server --subscribers 500 --seconds 5
+#
+# --server: 스트리밍 서버(stream_server.py)를 별도 프로세스로 띄우고 구독자 N 개가 HTTP 로 구독 (aiohttp 필요)
+# - 서버 프로세스는 stock_api 의 StreamHub 업스트림만 가짜로 바꿔 실행
+# - 구독 전/중 서버 스레드 수(연결마다 늘지 않아야 함), 이벤트별 첫 구독자 ~ 마지막 구독자 수신 간격 p50/p99 기록
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+SERVER_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+
+
+class FakeIntradayUpstream:
+    """호출할 때마다 분봉이 진행되는 가짜 업스트림"""
+
+    def __init__(self, bar_every=5, latency_ms=20, start_bars=120):
+        self.bar_every = bar_every
+        self.latency = latency_ms / 1000
+        self.calls = 0
+        self.start = pd.Timestamp.now(tz='Asia/Seoul').floor('min') - pd.Timedelta(minutes=start_bars)
+        self.rng = np.random.default_rng(7)
+        self.close = 50000 + np.cumsum(self.rng.normal(0, 50, start_bars))
+        self.last = None
+        self.frozen = False
+
+    def fetch(self, stock_code, interval):
+        time.sleep(self.latency)
+        self.calls += 1
+        if self.frozen:
+            return self.last
+        if self.calls % self.bar_every == 0:
+            self.close = np.r_[self.close, self.close[-1]]
+        # 미완성 마지막 봉은 폴링마다 값이 바뀜
+        self.close = self.close.copy()
+        self.close[-1] += self.rng.normal(0, 20)
+        index = pd.date_range(self.start, periods=len(self.close), freq='min', name='Datetime')
+        hist = pd.DataFrame({
+            'Open': self.close - 5, 'High': self.close + 30, 'Low': self.close - 30,
+            'Close': self.close, 'Volume': np.full(len(self.close), 1000.0),
+        }, index=index)
+        self.last = hist
+        return hist
+
+
+def parse_events(buffer):
+    """SSE 버퍼에서 완성된 이벤트 (event, data, id) 목록과 남은 버퍼 반환"""
+    events = []
+    while b'\n\n' in buffer:
+        raw, buffer = buffer.split(b'\n\n', 1)
+        event, data, event_id = None, None, None
+        for line in raw.split(b'\n'):
+            if line.startswith(b'event: '):
+                event = line[7:].decode()
+            elif line.startswith(b'data: '):
+                data = json.loads(line[6:])
+            elif line.startswith(b'id: '):
+                event_id = line[4:].decode()
+        if event is not None:
+            events.append((event, data, event_id))
+    return events, buffer
+
+
+def apply_event(bars, event, data):
+    """snapshot/bars 이벤트를 봉 목록에 반영, 바뀐 봉 수 반환 (snapshot 은 None)"""
+    if event == 'snapshot':
+        bars.clear()
+    for bar in data['bars']:
+        bars[bar['time']] = bar['close']
+    return None if event == 'snapshot' else len(data['bars'])
+
+
+def subscriber(hub, key, stop, state):
+    bars = {}
+    buffer = b''
+    latencies = []
+    changed_counts = []
+    stream = hub.subscribe(key)
+    for chunk in stream:
+        received = time.perf_counter()
+        events, buffer = parse_events(buffer + chunk)
+        for event, data, _ in events:
+            changed = apply_event(bars, event, data)
+            if changed is not None:
+                changed_counts.append(changed)
+            latencies.append(received - state['published'])
+        if stop.is_set():
+            break
+    stream.close()
+    state['results'].append((bars, latencies))
+    state['changed_counts'].extend(changed_counts)
+
+
+def expected_bars(hist):
+    return {int(t // 10**9): round(float(c), 2) for t, c in zip(hist.index.as_unit('ns').asi8, hist['Close'])}
+
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    return {
+        'p50': round(float(np.percentile(values, 50)), 2) if len(values) else None,
+        'p99': round(float(np.percentile(values, 99)), 2) if len(values) else None,
+    }
+
+
+def run_in_process(args):
+    upstream = FakeIntradayUpstream(bar_every=args.bar_every)
+    state = {'published': time.perf_counter(), 'results': [], 'changed_counts': []}
+    lock = threading.Lock()
+
+    def fetch(stock_code, interval):
+        hist = upstream.fetch(stock_code, interval)
+        with lock:
+            state['published'] = time.perf_counter()
+        return hist
+
+    hub = StreamHub(fetch, poll_interval_seconds=args.poll_ms / 1000, idle_seconds=0, heartbeat_seconds=0.5,
+                    max_subscribers=args.subscribers)
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=subscriber, args=(hub, ('005930', '1m'), stop, state), daemon=True)
+        for _ in range(args.subscribers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+
+    # 업스트림 값을 고정하고 마지막 이벤트까지 전달될 때까지 잠시 대기
+    upstream.frozen = True
+    time.sleep(max(0.5, 3 * args.poll_ms / 1000))
+    stats = hub.get_stats()
+    channel_stats = next(iter(stats['by_channel'].values()))
+    stop.set()
+    hub.close()
+    for thread in threads:
+        thread.join(timeout=5)
+    elapsed = time.perf_counter() - started
+
+    expected = expected_bars(upstream.last)
+    mismatched = sum(1 for bars, _ in state['results'] if bars != expected)
+    latencies = [value for _, values in state['results'] for value in values]
+
+    report = {
+        'mode': 'in-process',
+        'timestamp': datetime.now().isoformat(),
+        'subscribers': args.subscribers,
+        'seconds': round(elapsed, 2),
+        'poll_ms': args.poll_ms,
+        'upstream_calls': upstream.calls,
+        'events_published': stats['events_published'],
+        'events_delivered': int(len(latencies)),
+        'bars_per_update_event': round(float(np.mean(state['changed_counts'])), 2) if state['changed_counts'] else None,
+        'fanout_latency_ms': percentiles(latencies),
+        'channel': channel_stats,
+        'subscribers_finished': len(state['results']),
+        'subscribers_mismatched': mismatched,
+    }
+    return report, bool(mismatched or len(state['results']) != args.subscribers)
+
+
+# ---------------------------------------------------------------------------
+# 실제 스트리밍 서버 프로세스 경유 (--server)
+
+def serve(args):
+    """벤치마크용 스트리밍 서버 프로세스 - stream_server 앱에 가짜 업스트림과 업스트림 고정용 경로만 추가"""
+    from aiohttp import web
+
+    import stream_server
+
+    upstream = FakeIntradayUpstream(bar_every=args.bar_every)
+    hub = stream_server.stream_hub
+    hub.fetch_fn = upstream.fetch
+    hub.poll_interval_seconds = args.poll_ms / 1000
+    hub.heartbeat_seconds = 0.5
+    hub.idle_seconds = 0
+
+    async def freeze(request):
+        # 업스트림 값을 고정하고 마지막 봉 목록 반환
+        upstream.frozen = True
+        return web.json_response({'calls': upstream.calls, 'bars': expected_bars(upstream.last)})
+
+    app = stream_server.make_app()
+    app.router.add_post('/bench/freeze', freeze)
+    web.run_app(app, host='127.0.0.1', port=args.port, print=None)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def http_json(port, method, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request(method, path)
+    return json.loads(conn.getresponse().read())
+
+
+def start_server(args, port, data_dir):
+    env = dict(os.environ)
+    env.update({
+        'STOCK_LOG_LEVEL': 'WARNING',
+        'STOCK_CANDLE_STORE_ENABLED': 'false',
+        'STOCK_SYMBOL_CACHE_PATH': os.path.join(data_dir, 'symbols.sqlite'),
+        'STOCK_INFO_CACHE_PATH': os.path.join(data_dir, 'metadata.sqlite'),
+        'STOCK_SCREENER_STORE_PATH': os.path.join(data_dir, 'screener.sqlite'),
+        'STOCK_STREAM_MAX_SUBSCRIBERS': str(args.subscribers),
+        'STOCK_UPSTREAM_RATE_PER_SECOND': '0',
+    })
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port),
+         '--poll-ms', str(args.poll_ms), '--bar-every', str(args.bar_every)],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            return proc, http_json(port, 'GET', '/health')
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('stream server did not start')
+
+
+async def http_subscriber(session, url, stop, state):
+    """HTTP 로 구독해 봉 목록 재구성 - (봉 목록, {이벤트 ID: 수신 시각}) 반환"""
+    bars = {}
+    arrivals = {}
+    buffer = b''
+    async with session.get(url) as response:
+        if response.status != 200:
+            state['rejected'] += 1
+            return None
+        async for chunk in response.content.iter_any():
+            received = time.perf_counter()
+            events, buffer = parse_events(buffer + chunk)
+            for event, data, event_id in events:
+                if event == 'snapshot' and not bars:
+                    state['connected'] += 1
+                changed = apply_event(bars, event, data)
+                if changed is not None:
+                    arrivals[event_id] = received
+                    state['changed_counts'].append(changed)
+            if stop.is_set():
+                break
+    return bars, arrivals
+
+
+async def drive_server(args, port):
+    from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+    url = f"http://127.0.0.1:{port}/api/stock-stream/005930?interval=1m"
+    stop = asyncio.Event()
+    state = {'connected': 0, 'rejected': 0, 'changed_counts': []}
+    async with ClientSession(connector=TCPConnector(limit=0), timeout=ClientTimeout(total=None)) as session:
+        started = time.perf_counter()
+        tasks = [asyncio.ensure_future(http_subscriber(session, url, stop, state)) for _ in range(args.subscribers)]
+        while state['connected'] + state['rejected'] < args.subscribers and time.perf_counter() - started < 30:
+            await asyncio.sleep(0.05)
+        connect_seconds = time.perf_counter() - started
+        health = await asyncio.to_thread(http_json, port, 'GET', '/health')
+        await asyncio.sleep(args.seconds)
+
+        # 업스트림 값을 고정하고 마지막 이벤트까지 전달될 때까지 잠시 대기
+        frozen = await asyncio.to_thread(http_json, port, 'POST', '/bench/freeze')
+        await asyncio.sleep(max(1.0, 3 * args.poll_ms / 1000))
+        stop.set()
+        results = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return state, results, connect_seconds, health, frozen, elapsed
+
+
+def run_server(args):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        proc, idle_health = start_server(args, port, data_dir)
+        try:
+            state, results, connect_seconds, health, frozen, elapsed = asyncio.run(drive_server(args, port))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    finished = [result for result in results if result is not None]
+    mismatched = sum(1 for bars, _ in finished if bars != {int(t): c for t, c in frozen['bars'].items()})
+    # 이벤트마다 첫 구독자 ~ 마지막 구독자 수신 간격 (같은 이벤트를 받은 구독자끼리)
+    by_event = {}
+    for _, arrivals in finished:
+        for event_id, received in arrivals.items():
+            by_event.setdefault(event_id, []).append(received)
+    spreads = [max(times) - min(times) for times in by_event.values() if len(times) == len(finished)]
+    stream_stats = health['stream_stats']
+
+    report = {
+        'mode': 'server',
+        'timestamp': datetime.now().isoformat(),
+        'subscribers': args.subscribers,
+        'seconds': round(elapsed, 2),
+        'poll_ms': args.poll_ms,
+        'connect_seconds': round(connect_seconds, 2),
+        'server_threads_idle': idle_health['threads'],
+        'server_threads_subscribed': health['threads'],
+        'server_subscribers': stream_stats['subscribers'],
+        'upstream_calls': frozen['calls'],
+        'events_delivered': sum(len(arrivals) for _, arrivals in finished),
+        'bars_per_update_event': round(float(np.mean(state['changed_counts'])), 2) if state['changed_counts'] else None,
+        'fanout_spread_ms': percentiles(spreads),
+        'subscribers_rejected': state['rejected'],
+        'subscribers_finished': len(finished),
+        'subscribers_mismatched': mismatched,
+    }
+    return report, bool(mismatched or len(finished) != args.subscribers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Intraday stream fan-out benchmark')
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--poll-ms', type=float, default=100)
+    parser.add_argument('--bar-every', type=int, default=5)
+    parser.add_argument('--server', action='store_true', help='subscribe over HTTP to stream_server.py in a child process')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+    report, failed = run_server(args) if args.server else run_in_process(args)
+    for key, value in report.items():
+        print(f"{key:>26}: {value}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"stream_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstream import PERIOD_DAYS, _has_data, full_history
+
+# Yahoo chart API(v8) 형식으로 가짜 데이터를 돌려주는 로컬 스텁 서버
+# STOCK_UPSTREAM=async + STOCK_CHART_BASE_URL=http://127.0.0.1:<port> 로 네트워크 없이 비동기 조회 경로를 측정
+#
+#   python benchmarks/stub_chart_server.py --port 8765 --latency-ms 100
+#
+# fake_upstream.py 와 같은 환경변수(BENCH_UPSTREAM_LATENCY_MS, BENCH_UPSTREAM_ERROR_RATE, BENCH_KOSDAQ_CODES)를 사용
+
+
+def chart_payload(symbol, hist):
+    """history DataFrame 을 chart API 응답 형식으로 변환 (일봉은 장 시작 시각 09:00 KST 기준)"""
+    timestamps = (hist.index.as_unit('ns').asi8 // 10**9 + 9 * 3600).tolist()
+    quote = {
+        'open': hist['Open'].tolist(),
+        'high': hist['High'].tolist(),
+        'low': hist['Low'].tolist(),
+        'close': hist['Close'].tolist(),
+        'volume': hist['Volume'].tolist(),
+    }
+    return {
+        'chart': {
+            'result': [{
+                'meta': {
+                    'symbol': symbol,
+                    'longName': f"Fake {symbol}",
+                    'currency': 'KRW',
+                    'exchangeTimezoneName': 'Asia/Seoul',
+                },
+                'timestamp': timestamps,
+                'indicators': {'quote': [quote], 'adjclose': [{'adjclose': quote['close']}]},
+            }],
+            'error': None,
+        }
+    }
+
+
+@lru_cache(maxsize=1024)
+def _range_body(symbol, range_):
+    # 스텁 서버의 CPU 사용이 측정을 왜곡하지 않도록 range 응답 본문은 재사용
+    hist = full_history(symbol).iloc[-PERIOD_DAYS.get(range_, 63):]
+    return json.dumps(chart_payload(symbol, hist)).encode()
+
+
+class StubChartHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubChartHandler.lock:
+            StubChartHandler.requests += 1
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        symbol = url.path.rsplit('/', 1)[-1]
+
+        time.sleep(float(os.getenv('BENCH_UPSTREAM_LATENCY_MS', 100)) / 1000)
+        if random.random() < float(os.getenv('BENCH_UPSTREAM_ERROR_RATE', 0)):
+            return self._send(503, {'chart': {'result': None, 'error': {'code': 'Unavailable'}}})
+        if not url.path.startswith('/v8/finance/chart/') or not _has_data(symbol):
+            return self._send(404, {'chart': {'result': None, 'error': {'code': 'Not Found'}}})
+
+        if 'period1' in params:
+            hist = full_history(symbol)
+            hist = hist[hist.index >= pd.Timestamp(int(params['period1']), unit='s', tz='UTC')]
+            return self._send(200, json.dumps(chart_payload(symbol, hist)).encode())
+        self._send(200, _range_body(symbol, params.get('range')))
+
+    def _send(self, status, payload):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0):
+    """백그라운드 스레드에서 스텁 서버 시작, (server, base_url) 반환"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubChartHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='stub-chart-server', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Yahoo chart API stub server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=None)
+    args = parser.parse_args()
+    if args.latency_ms is not None:
+        os.environ['BENCH_UPSTREAM_LATENCY_MS'] = str(args.latency_ms)
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), StubChartHandler)
+    server.daemon_threads = True
+    print(f"Stub chart server on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,570 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, SERVER_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# 요청마다 남는 info 로그가 측정을 왜곡하지 않도록 (서버 모듈 import 전에 설정)
+os.environ.setdefault('STOCK_LOG_LEVEL', 'WARNING')
+
+import fake_upstream
+from fake_upstream import PERIOD_DAYS, make_history
+from stub_chart_server import StubChartHandler, chart_payload, start_stub_server
+from vercel_client import VercelClient, load_handler_module
+
+# 핫 패스 회귀 측정용 벤치마크 모음 (가짜 업스트림 사용, 네트워크/서버 프로세스 불필요)
+#
+#   cd python-server && python benchmarks/suite.py
+#   cd python-server && python benchmarks/suite.py --only conversion cache --baseline benchmarks/results/suite_<이전>.json
+#
+# - conversion: history DataFrame -> candles/columnar 변환과 JSON 인코딩 (100 ~ 100k 행)
+# - cache:      StockCache 히트/미스 조회와 저장 처리량 (단일 스레드, 다중 스레드 히트)
+# - concurrent: 같은 종목 동시 미스(업스트림 조회가 합쳐지는지)와 서로 다른 종목 동시 미스
+# - e2e:        /api/stock-data/<stock_code> 의 p50/p99 - Flask 앱(test client)과 Vercel handler 를 프로세스 안에서 호출
+# - coldstart:  Vercel 함수를 새 프로세스로 띄워 모듈 로드/첫 응답/웜 응답 시간 측정
+#               (chart·yfinance 업스트림 x 빈 /tmp·스냅샷이 남은 /tmp)
+#
+# Vercel handler 의 chart 업스트림은 로컬 스텁 서버(stub_chart_server.py), Flask 와 yfinance 경로는 가짜 yfinance 를 사용합니다.
+# 업스트림 지연/오류는 --latency-ms / --error-rate / --error-mode 로 조절하고,
+# benchmarks/fixtures/<심볼>.csv 가 있으면 녹화된 OHLCV 를 사용합니다 (fake_upstream.py 참고).
+# 결과는 results/suite_<시각>.json 에 저장되며 --baseline 으로 이전 결과와 비교합니다.
+# 동시 미스가 합쳐지지 않거나 오류 주입 없이 실패 응답이 나오면 종료 코드 1 을 반환합니다.
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+SECTIONS = ('conversion', 'cache', 'concurrent', 'e2e', 'coldstart')
+
+
+def percentile(sorted_values, q):
+    """정렬된 값의 nearest-rank 백분위수"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+
+def latency_stats(name, latencies, elapsed, **extra):
+    latencies = sorted(latencies)
+    result = {
+        'name': name,
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+    }
+    result.update(extra)
+    return result
+
+
+def timed_ms(fn, repeat):
+    """repeat 회 실행 중 중앙값(ms)과 마지막 결과"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def parse_server_timing(value):
+    """Server-Timing 헤더 -> {단계: ms}"""
+    stages = {}
+    for part in (value or '').split(','):
+        name, _, dur = part.strip().partition(';dur=')
+        if name and dur:
+            stages[name] = float(dur)
+    return stages
+
+
+def stage_medians(timings):
+    """요청별 Server-Timing 목록 -> 단계별 중앙값(ms)"""
+    per_stage = {}
+    for stages in timings:
+        for name, ms in stages.items():
+            per_stage.setdefault(name, []).append(ms)
+    return {name: round(statistics.median(values), 3) for name, values in sorted(per_stage.items())}
+
+
+# ---------------------------------------------------------------------------
+# conversion
+
+def bench_conversion(rows_list, repeat):
+    from candles import hist_to_candles, hist_to_columns
+    from chart_arrays import parse_chart
+    from response_body import encode_payload
+    from yahoo_chart import chart_to_history
+
+    results = []
+    problems = []
+    for rows in rows_list:
+        # period=max 일봉보다 긴 시계열은 분봉으로 생성 (변환 비용은 행 수에 비례)
+        freq = 'B' if rows <= PERIOD_DAYS['max'] else 'min'
+        hist = make_history('005930.KS', rows, freq=freq)
+        columns_ms, columns = timed_ms(lambda: hist_to_columns(hist), repeat)
+        candles_ms, candles = timed_ms(lambda: hist_to_candles(hist), repeat)
+        encode_ms, body = timed_ms(lambda: encode_payload({'success': True, 'data': {'candles': candles}}), repeat)
+        encode_columnar_ms, columnar_body = timed_ms(
+            lambda: encode_payload({'success': True, 'data': {'candles': columns}}), repeat
+        )
+        # chart API 응답 JSON -> 캔들: pandas 경로(DataFrame 경유)와 pandas 없는 경로(Vercel chart 업스트림)
+        interval = '1d' if freq == 'B' else '1m'
+        payload = chart_payload('005930.KS', hist)
+        chart_pandas_ms, expected = timed_ms(lambda: hist_to_candles(chart_to_history(payload, interval)[0]), repeat)
+        chart_arrays_ms, actual = timed_ms(lambda: parse_chart(payload, interval).to_candles(), repeat)
+        if actual != expected:
+            problems.append(f"rows_{rows}: parse_chart() candles differ from chart_to_history() + hist_to_candles()")
+        result = {
+            'name': f"rows_{rows}",
+            'rows': rows,
+            'freq': freq,
+            'columns_ms': round(columns_ms, 3),
+            'candles_ms': round(candles_ms, 3),
+            'encode_candles_ms': round(encode_ms, 3),
+            'encode_columnar_ms': round(encode_columnar_ms, 3),
+            'candles_bytes': len(body),
+            'columnar_bytes': len(columnar_body),
+            'candles_rows_per_second': round(rows / ((candles_ms + encode_ms) / 1000), 1),
+            'chart_pandas_ms': round(chart_pandas_ms, 3),
+            'chart_arrays_ms': round(chart_arrays_ms, 3),
+        }
+        results.append(result)
+        print(f"conversion {rows:>7} rows: columns {columns_ms:8.2f}ms  candles {candles_ms:8.2f}ms  "
+              f"encode {encode_ms:8.2f}ms / columnar {encode_columnar_ms:8.2f}ms  "
+              f"chart json pandas {chart_pandas_ms:8.2f}ms / arrays {chart_arrays_ms:8.2f}ms")
+    return results, problems
+
+
+# ---------------------------------------------------------------------------
+# cache
+
+def bench_cache(entries, operations, threads):
+    from cache import StockCache
+
+    cache = StockCache(max_entries=entries * 2, ttl_minutes=15)
+    body = b'x' * 4096
+    keys = [(f"{100000 + i:06d}", '1y', '1d') for i in range(entries)]
+
+    def run_set():
+        for i in range(operations):
+            cache.set(*keys[i % entries], body)
+
+    def run_hits():
+        for i in range(operations):
+            cache.lookup(*keys[i % entries])
+
+    def run_misses():
+        for i in range(operations):
+            cache.lookup(f"{900000 + i % entries:06d}", '1y', '1d')
+
+    results = []
+    for name, fn in (('set', run_set), ('hit', run_hits), ('miss', run_misses)):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        results.append({
+            'name': name,
+            'operations': operations,
+            'ops_per_second': round(operations / elapsed, 1),
+            'mean_us': round(elapsed / operations * 1e6, 3),
+        })
+
+    # 다중 스레드 히트 - 캐시 잠금 경합 확인
+    workers = [threading.Thread(target=run_hits) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    results.append({
+        'name': f"hit_{threads}_threads",
+        'operations': operations * threads,
+        'ops_per_second': round(operations * threads / elapsed, 1),
+        'mean_us': round(elapsed / (operations * threads) * 1e6, 3),
+    })
+    for result in results:
+        print(f"cache {result['name']:>14}: {result['ops_per_second']:>12,.0f} ops/s  ({result['mean_us']:.2f}us)")
+    return results
+
+
+# ---------------------------------------------------------------------------
+# 프로세스 내 Flask / Vercel 호출
+
+def configure_environment(data_dir, args):
+    """가짜 업스트림 설정과 서버 모듈이 import 시 읽는 환경변수 설정"""
+    os.environ.update({
+        'BENCH_UPSTREAM_LATENCY_MS': str(args.latency_ms),
+        'BENCH_UPSTREAM_ERROR_RATE': str(args.error_rate),
+        'BENCH_UPSTREAM_ERROR_MODE': args.error_mode,
+        'STOCK_CANDLE_STORE_PATH': os.path.join(data_dir, 'flask-candles.sqlite'),
+        'STOCK_SYMBOL_CACHE_PATH': os.path.join(data_dir, 'flask-symbols.sqlite'),
+        'STOCK_INFO_CACHE_PATH': os.path.join(data_dir, 'flask-metadata.sqlite'),
+        'STOCK_SCREENER_STORE_PATH': os.path.join(data_dir, 'flask-screener.sqlite'),
+        'STOCK_PREFETCH_SCAN_SECONDS': '0',
+        # 서버 경로 자체를 재기 위해 업스트림 호출 한도는 끔 (가짜 업스트림)
+        'STOCK_UPSTREAM_RATE_PER_SECOND': '0',
+        'STOCK_FORCE_REFRESH_MIN_SECONDS': '0',
+    })
+    fake_upstream.install()
+    # Vercel handler 의 chart 업스트림용 로컬 스텁 서버
+    server, base_url = start_stub_server()
+    os.environ['STOCK_CHART_BASE_URL'] = base_url
+    return server
+
+
+def upstream_calls():
+    """가짜 yfinance history 호출 + 스텁 chart 서버 요청 수"""
+    return fake_upstream.calls['history'] + StubChartHandler.requests
+
+
+def load_flask_app():
+    import stock_api
+
+    return stock_api
+
+
+def load_vercel_handler(data_dir):
+    """api/stock-data/[code].py 를 모듈로 로드 (/tmp 저장소 경로는 Flask 와 분리)"""
+    os.environ.update({
+        'STOCK_CANDLE_STORE_PATH': os.path.join(data_dir, 'vercel-candles.sqlite'),
+        'STOCK_SYMBOL_CACHE_PATH': os.path.join(data_dir, 'vercel-symbols.sqlite'),
+        'STOCK_INFO_CACHE_PATH': os.path.join(data_dir, 'vercel-metadata.sqlite'),
+        'STOCK_SNAPSHOT_DIR': os.path.join(data_dir, 'vercel-snapshots'),
+    })
+    return load_handler_module()
+
+
+class FlaskClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path, headers=None):
+        response = self.client.get(path, headers=headers or {})
+        return response.status_code, response.headers, response.get_data()
+
+
+def run_requests(client, paths, headers=None):
+    """paths 를 순서대로 요청해 (지연 목록, 상태 코드 목록, Server-Timing 목록) 반환"""
+    latencies, statuses, timings = [], [], []
+    for path in paths:
+        started = time.perf_counter()
+        status, response_headers, _ = client.get(path, headers)
+        latencies.append(time.perf_counter() - started)
+        statuses.append(status)
+        timings.append(parse_server_timing(response_headers.get('Server-Timing')))
+    return latencies, statuses, timings
+
+
+class CodeSequence:
+    """실행마다 새 종목코드 (캐시/저장소/접미사 캐시 모두 미스가 되도록)"""
+
+    def __init__(self, start):
+        self.next_code = start
+        self.lock = threading.Lock()
+
+    def take(self, count=1):
+        with self.lock:
+            codes = [f"{self.next_code + i:06d}" for i in range(count)]
+            self.next_code += count
+        return codes
+
+
+# ---------------------------------------------------------------------------
+# concurrent
+
+def bench_concurrent(stock_api, codes, clients, period):
+    """같은 종목/서로 다른 종목에 동시에 몰린 캐시 미스"""
+    results = []
+    problems = []
+    calls_per_key = None
+    for scenario in ('distinct_keys', 'same_key'):
+        targets = codes.take(1) * clients if scenario == 'same_key' else codes.take(clients)
+        barrier = threading.Barrier(clients)
+        latencies = [None] * clients
+        statuses = [None] * clients
+
+        def client(i):
+            flask_client = FlaskClient(stock_api.app)
+            barrier.wait()
+            started = time.perf_counter()
+            statuses[i] = flask_client.get(f"/api/stock-data/{targets[i]}?period={period}")[0]
+            latencies[i] = time.perf_counter() - started
+
+        before = dict(fake_upstream.calls)
+        workers = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        upstream = {name: fake_upstream.calls[name] - before[name] for name in before}
+        result = latency_stats(
+            scenario, latencies, elapsed,
+            clients=clients,
+            errors=sum(1 for status in statuses if status != 200),
+            upstream_history_calls=upstream['history'],
+            upstream_info_calls=upstream['info'],
+        )
+        results.append(result)
+        print(f"concurrent {scenario:>13}: {clients} clients  p50={result['p50_ms']:.1f}ms  p99={result['p99_ms']:.1f}ms  "
+              f"history calls={upstream['history']}  errors={result['errors']}")
+        # 같은 키 동시 미스는 종목 하나를 조회하는 만큼(.KS/.KQ 탐색 포함)의 업스트림 호출로 합쳐져야 함
+        if scenario == 'distinct_keys':
+            calls_per_key = math.ceil(upstream['history'] / clients)
+        elif upstream['history'] > calls_per_key:
+            problems.append(
+                f"same_key: {upstream['history']} upstream history calls for {clients} concurrent misses "
+                f"(expected at most {calls_per_key})"
+            )
+    return results, problems
+
+
+# ---------------------------------------------------------------------------
+# e2e
+
+def bench_e2e(stock_api, vercel, codes, requests_per_scenario, period):
+    flask_client = FlaskClient(stock_api.app)
+    vercel_client = VercelClient(vercel)
+    hot_code = codes.take(1)[0]
+    hot_path = f"/api/stock-data/{hot_code}?period={period}"
+
+    # 캐시 예열 + ETag
+    status, headers, _ = flask_client.get(hot_path)
+    etag = headers.get('ETag')
+
+    scenarios = [
+        # 새 종목마다 .KS/.KQ 탐색 + 업스트림 조회 + 변환 + 직렬화
+        ('flask_miss', flask_client, [f"/api/stock-data/{code}?period={period}" for code in codes.take(requests_per_scenario)], None),
+        # 미리 인코딩된 본문 그대로 전송
+        ('flask_hit', flask_client, [hot_path] * requests_per_scenario, None),
+        ('flask_hit_gzip', flask_client, [hot_path] * requests_per_scenario, {'Accept-Encoding': 'gzip'}),
+        ('flask_hit_304', flask_client, [hot_path] * requests_per_scenario, {'If-None-Match': etag}),
+        # Vercel: 새 종목은 chart 조회 + pandas 없는 변환, 웜 인스턴스는 /tmp 스냅샷으로 응답
+        ('vercel_miss', vercel_client, [f"/api/stock-data/{code}?period={period}" for code in codes.take(requests_per_scenario)], None),
+        ('vercel_warm', vercel_client, [hot_path] * requests_per_scenario, None),
+        ('vercel_warm_304', vercel_client, [hot_path] * requests_per_scenario, None),
+        ('vercel_warm_refresh', vercel_client, [f"{hot_path}&force_refresh=true"] * requests_per_scenario, None),
+    ]
+
+    results = []
+    problems = []
+    for name, client, paths, headers in scenarios:
+        if name == 'vercel_warm':
+            client.get(hot_path)  # /tmp 스냅샷 예열
+        if name == 'vercel_warm_304':
+            # Vercel 의 ETag 는 데이터가 같으면 일정하므로 예열 응답에서 가져옴
+            headers = {'If-None-Match': client.get(hot_path)[1].get('ETag')}
+        expected = 304 if name.endswith('_304') else 200
+        before = upstream_calls()
+        started = time.perf_counter()
+        latencies, statuses, timings = run_requests(client, paths, headers)
+        elapsed = time.perf_counter() - started
+        result = latency_stats(
+            name, latencies, elapsed,
+            errors=sum(1 for status in statuses if status != expected),
+            upstream_history_calls=upstream_calls() - before,
+            stages_p50_ms=stage_medians(timings),
+        )
+        results.append(result)
+        print(f"e2e {name:>16}: p50={result['p50_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms  "
+              f"{result['requests_per_second']:8.1f} req/s  errors={result['errors']}")
+        if result['errors']:
+            problems.append(f"{name}: {result['errors']} responses without status {expected}")
+    return results, problems
+
+
+# ---------------------------------------------------------------------------
+# coldstart
+
+def run_child(env, path, warm_requests):
+    """coldstart_child.py 를 새 프로세스로 실행해 측정값(JSON) 반환"""
+    completed = subprocess.run(
+        [sys.executable, os.path.join(BENCH_DIR, 'coldstart_child.py'), path, str(warm_requests)],
+        env=env, capture_output=True, text=True, timeout=300,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"cold start child failed: {completed.stderr.strip()[-500:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def bench_coldstart(args):
+    """Vercel 함수 콜드 스타트 - 업스트림 방식 x (빈 /tmp, 이전 프로세스가 남긴 /tmp) 마다 runs 회 실행 후 중앙값"""
+    os.environ['BENCH_UPSTREAM_LATENCY_MS'] = str(args.latency_ms)
+    server, base_url = start_stub_server()
+    path = f"/api/stock-data/005930?period={args.period}"
+    # 스텁 서버의 응답 본문 생성(첫 요청만)이 첫 응답 시간에 섞이지 않도록 미리 조회
+    with urllib.request.urlopen(f"{base_url}/v8/finance/chart/005930.KS?range={args.period}&interval=1d") as response:
+        response.read()
+
+    # 인터프리터 시작 비용 (측정값에는 포함되지 않는 부분)
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    results = [{'name': 'python_startup', 'process_ms': round((time.perf_counter() - started) * 1000, 3)}]
+    problems = []
+
+    for mode in ('chart', 'yfinance'):
+        samples = {'cold': [], 'cold_snapshot': []}
+        for _ in range(args.coldstart_runs):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                env = dict(os.environ)
+                env.update({
+                    'STOCK_VERCEL_UPSTREAM': mode,
+                    'STOCK_CHART_BASE_URL': base_url,
+                    'STOCK_LOG_LEVEL': 'ERROR',
+                    'STOCK_CANDLE_STORE_PATH': os.path.join(tmp_dir, 'candles.sqlite'),
+                    'STOCK_SYMBOL_CACHE_PATH': os.path.join(tmp_dir, 'symbols.sqlite'),
+                    'STOCK_INFO_CACHE_PATH': os.path.join(tmp_dir, 'metadata.sqlite'),
+                    'STOCK_SNAPSHOT_DIR': os.path.join(tmp_dir, 'snapshots'),
+                })
+                # 두 번째 프로세스는 첫 프로세스가 /tmp 에 남긴 스냅샷/저장소로 시작 (같은 인스턴스의 재시작)
+                for scenario in samples:
+                    samples[scenario].append(run_child(env, path, args.coldstart_warm_requests))
+
+        for scenario, runs in samples.items():
+            result = {'name': f"{mode}_{scenario}", 'runs': len(runs)}
+            for key in ('module_load_ms', 'first_request_ms', 'first_response_ms', 'warm_p50_ms', 'warm_refresh_p50_ms'):
+                values = [run[key] for run in runs if run[key] is not None]
+                result[key] = round(statistics.median(values), 3) if values else None
+            result['imported'] = runs[-1]['imported']
+            results.append(result)
+            print(f"coldstart {result['name']:>22}: load {result['module_load_ms']:8.1f}ms  "
+                  f"first response {result['first_response_ms']:8.1f}ms  warm {result['warm_p50_ms']}ms  "
+                  f"warm refresh {result['warm_refresh_p50_ms']}ms  pandas={result['imported']['pandas']}")
+            if any(run['status'] != 200 for run in runs):
+                problems.append(f"coldstart {result['name']}: first response was not 200")
+            if mode == 'chart' and result['imported']['pandas']:
+                problems.append(f"coldstart {result['name']}: chart upstream path imported pandas")
+    server.shutdown()
+    return results, problems
+
+
+# ---------------------------------------------------------------------------
+# 결과 비교
+
+def flatten(results):
+    """{섹션: [결과]} -> {'섹션.이름.지표': 값} (숫자 지표만)"""
+    flat = {}
+    for section, rows in results.items():
+        for row in rows:
+            for key, value in row.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    flat[f"{section}.{row['name']}.{key}"] = value
+    return flat
+
+
+def compare(baseline_path, results, threshold):
+    """이전 결과 대비 변화율 출력, threshold(%) 보다 느려진 지표 목록 반환"""
+    with open(baseline_path) as f:
+        baseline = flatten(json.load(f)['results'])
+    current = flatten(results)
+    regressions = []
+    print(f"\nCompared with {baseline_path}")
+    for key in sorted(current.keys() & baseline.keys()):
+        # 시간 지표는 클수록, 처리량 지표는 작을수록 나쁨
+        if key.endswith(('_ms', '_us')):
+            lower_is_better = True
+        elif key.endswith('_per_second'):
+            lower_is_better = False
+        else:
+            continue
+        before, after = baseline[key], current[key]
+        if not before:
+            continue
+        change = (after - before) / before * 100
+        worse = change > threshold if lower_is_better else change < -threshold
+        marker = '  <-- regression' if worse else ''
+        print(f"  {key:<60} {before:>12.3f} -> {after:>12.3f} ({change:+6.1f}%){marker}")
+        if worse:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stock API hot path benchmark suite')
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5, help='변환 측정 반복 횟수 (중앙값 사용)')
+    parser.add_argument('--cache-entries', type=int, default=512)
+    parser.add_argument('--cache-operations', type=int, default=200_000)
+    parser.add_argument('--threads', type=int, default=8, help='다중 스레드 캐시 히트 스레드 수')
+    parser.add_argument('--clients', type=int, default=32, help='동시 미스 클라이언트 수')
+    parser.add_argument('--requests', type=int, default=200, help='e2e 시나리오별 요청 수')
+    parser.add_argument('--period', default='1y')
+    parser.add_argument('--latency-ms', type=float, default=20, help='가짜 업스트림 지연')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='가짜 업스트림 오류 확률')
+    parser.add_argument('--error-mode', choices=['raise', 'empty'], default='raise')
+    parser.add_argument('--coldstart-runs', type=int, default=3, help='콜드 스타트 시나리오별 프로세스 실행 횟수')
+    parser.add_argument('--coldstart-warm-requests', type=int, default=20, help='콜드 스타트 후 웜 요청 수')
+    parser.add_argument('--baseline', default=None, help='비교할 이전 결과 JSON')
+    parser.add_argument('--regression-threshold', type=float, default=20.0, help='회귀로 표시할 변화율(%%)')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    results = {}
+    problems = []
+    if 'conversion' in args.only:
+        results['conversion'], found = bench_conversion(args.rows, args.repeat)
+        problems.extend(found)
+    if 'cache' in args.only:
+        results['cache'] = bench_cache(args.cache_entries, args.cache_operations, args.threads)
+
+    if 'concurrent' in args.only or 'e2e' in args.only:
+        with tempfile.TemporaryDirectory() as data_dir:
+            stub_server = configure_environment(data_dir, args)
+            stock_api = load_flask_app()
+            vercel = load_vercel_handler(data_dir)
+            codes = CodeSequence(200000)
+            if 'concurrent' in args.only:
+                results['concurrent'], found = bench_concurrent(stock_api, codes, args.clients, args.period)
+                problems.extend(found)
+            if 'e2e' in args.only:
+                results['e2e'], found = bench_e2e(stock_api, vercel, codes, args.requests, args.period)
+                # 오류를 주입한 실행에서는 실패 응답이 정상
+                if args.error_rate == 0:
+                    problems.extend(found)
+            stub_server.shutdown()
+
+    if 'coldstart' in args.only:
+        results['coldstart'], found = bench_coldstart(args)
+        problems.extend(found)
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(args.baseline, results, args.regression_threshold)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"suite_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump({
+            'benchmark': 'suite',
+            'timestamp': datetime.now().isoformat(),
+            'cpu_count': os.cpu_count(),
+            'python': sys.version.split()[0],
+            'upstream': fake_upstream.upstream_source(),
+            'config': vars(args),
+            'results': results,
+            'problems': problems,
+            'regressions': regressions,
+        }, f, indent=2)
+    print(f"Saved results to {output}")
+
+    for problem in problems:
+        print(f"PROBLEM: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
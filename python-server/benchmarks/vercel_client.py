@@ -0,0 +1,39 @@
+import importlib.util
+import io
+import os
+
+# Vercel 함수(api/stock-data/[code].py)를 소켓 없이 프로세스 안에서 호출하는 도구
+# suite.py 와 coldstart_child.py 가 함께 사용 (pandas 등 무거운 모듈을 import 하지 않음)
+
+VERCEL_HANDLER = os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'api', 'stock-data', '[code].py'
+))
+
+
+def load_handler_module(name='vercel_stock_data'):
+    """handler 파일을 모듈로 로드 (환경변수는 호출 전에 설정)"""
+    spec = importlib.util.spec_from_file_location(name, VERCEL_HANDLER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class VercelClient:
+    """handler.do_GET 호출 (BaseHTTPRequestHandler 의 응답 기록만 대체)"""
+
+    def __init__(self, module):
+        self.module = module
+
+    def get(self, path, headers=None):
+        handler = self.module.handler.__new__(self.module.handler)
+        handler.path = path
+        handler.command = 'GET'
+        handler.request_version = 'HTTP/1.1'
+        handler.headers = headers or {}
+        handler.wfile = io.BytesIO()
+        response = {'status': None, 'headers': {}}
+        handler.send_response = lambda code, message=None: response.update(status=code)
+        handler.send_header = lambda name, value: response['headers'].__setitem__(name, value)
+        handler.end_headers = lambda: None
+        handler.do_GET()
+        return response['status'], response['headers'], handler.wfile.getvalue()
@@ -0,0 +1,373 @@
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import CACHE_LOOKUPS, get_logger
+
+# 용량 제한(항목 수 / 바이트) + LRU 제거 + TTL 만료를 지원하는 메모리 캐시
+# - LRU 순서는 OrderedDict 로 관리 (조회/저장 O(1))
+# - TTL 만료는 (만료시각, 키) 최소 힙으로 관리, 요청 경로에서 전체 스캔을 하지 않음
+# - stale_ttl 동안은 만료된 항목을 보관해 stale-while-revalidate 응답에 사용
+
+log = get_logger('cache')
+
+
+class _Entry:
+    __slots__ = ('data', 'size', 'created_at', 'expires_at', 'stale_until', 'label')
+
+    def __init__(self, data, size, created_at, expires_at, stale_until, label):
+        self.data = data
+        self.size = size
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.label = label
+
+
+def estimate_size(data):
+    """캐시 항목의 대략적인 메모리 사용량(바이트) 계산"""
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    try:
+        return len(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8'))
+    except (TypeError, ValueError):
+        return 0
+
+
+class StockCache:
+    backend = 'memory'
+
+    def __init__(self, max_entries=512, max_bytes=256 * 1024 * 1024, ttl_minutes=15, stale_ttl_minutes=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_minutes * 60
+        self.stale_ttl_seconds = stale_ttl_minutes * 60
+        self._entries = OrderedDict()
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.stale_seconds_total = 0.0
+        self.stale_seconds_max = 0.0
+
+    def _generate_key(self, stock_code, period, interval):
+        """캐시 키 생성"""
+        key_string = f"{stock_code}_{period}_{interval}"
+        return hashlib.md5(key_string.encode()).hexdigest()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+        return entry
+
+    def _expire(self, now):
+        """힙 맨 앞에서 stale 보관 기간까지 지난 항목만 제거 (O(k log n))"""
+        expired = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            stale_until, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # 갱신된 항목의 이전 힙 레코드는 무시
+            if entry is not None and entry.stale_until == stale_until:
+                self._remove(key)
+                expired += 1
+        self.expirations += expired
+        # 갱신으로 쌓인 오래된 힙 레코드가 많아지면 재구성
+        if len(heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [(e.stale_until, k) for k, e in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
+        return expired
+
+    def _evict(self):
+        """용량 초과 시 가장 오래 사용되지 않은 항목부터 제거"""
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+
+    def lookup(self, stock_code, period, interval, allow_stale=False):
+        """캐시 조회 결과와 만료 후 경과 시간(초) 반환 - 신선하면 0, 없으면 (None, None)"""
+        key = self._generate_key(stock_code, period, interval)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc('hit')
+                log.debug("Cache HIT for %s (age: %.1f minutes)", stock_code, (now - entry.created_at) / 60)
+                return entry.data, 0.0
+            if entry is not None and allow_stale and entry.stale_until > now:
+                stale_seconds = now - entry.expires_at
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self.stale_seconds_total += stale_seconds
+                self.stale_seconds_max = max(self.stale_seconds_max, stale_seconds)
+                CACHE_LOOKUPS.inc('stale')
+                log.debug("Cache STALE for %s (expired %.1f minutes ago)", stock_code, stale_seconds / 60)
+                return entry.data, stale_seconds
+            if entry is not None and entry.stale_until <= now:
+                log.debug("Cache EXPIRED for %s (age: %.1f minutes)", stock_code, (now - entry.created_at) / 60)
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            CACHE_LOOKUPS.inc('miss')
+            log.debug("Cache MISS for %s", stock_code)
+            return None, None
+
+    def get(self, stock_code, period, interval):
+        """캐시에서 데이터 조회 (만료되었거나 없으면 None)"""
+        return self.lookup(stock_code, period, interval)[0]
+
+    def ttl_remaining(self, stock_code, period, interval):
+        """만료까지 남은 시간(초) 조회, 없으면 None (LRU 순서/통계에 영향 없음)"""
+        key = self._generate_key(stock_code, period, interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return entry.expires_at - time.time()
+
+    def set(self, stock_code, period, interval, data, ttl_minutes=None):
+        """캐시에 데이터 저장 (용량 초과 시 LRU 제거)"""
+        key = self._generate_key(stock_code, period, interval)
+        ttl_seconds = self.ttl_seconds if ttl_minutes is None else ttl_minutes * 60
+        now = time.time()
+        size = estimate_size(data)
+        expires_at = now + ttl_seconds
+        entry = _Entry(data, size, now, expires_at, expires_at + self.stale_ttl_seconds,
+                       f"{stock_code}_{period}_{interval}")
+
+        with self._lock:
+            self._expire(now)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.total_bytes += size
+            heapq.heappush(self._expiry_heap, (entry.stale_until, key))
+            self._evict()
+        log.debug("Cache SET for %s", stock_code)
+
+    def clear_expired(self):
+        """만료된 캐시 정리, 제거된 항목 수 반환"""
+        with self._lock:
+            return self._expire(time.time())
+
+    def clear(self):
+        """캐시 전체 삭제, 제거된 항목 수 반환"""
+        with self._lock:
+            cleared_count = len(self._entries)
+            self._entries.clear()
+            self._expiry_heap.clear()
+            self.total_bytes = 0
+            return cleared_count
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self, include_entries=True):
+        """캐시 통계 조회"""
+        now = time.time()
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'backend': self.backend,
+                'total_entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_minutes': round(self.ttl_seconds / 60, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'stale_ttl_minutes': round(self.stale_ttl_seconds / 60, 1),
+                'stale_hits': self.stale_hits,
+                'avg_stale_seconds': round(self.stale_seconds_total / self.stale_hits, 1) if self.stale_hits else 0.0,
+                'max_stale_seconds': round(self.stale_seconds_max, 1),
+            }
+            if include_entries:
+                stats['entries'] = [
+                    {
+                        'key': key,
+                        'label': entry.label,
+                        'bytes': entry.size,
+                        'age_minutes': round((now - entry.created_at) / 60, 1),
+                        'stale': entry.expires_at <= now,
+                    }
+                    for key, entry in self._entries.items()
+                ]
+        return stats
+
+
+class RedisStockCache:
+    """여러 워커 프로세스가 공유하는 Redis(호환) 캐시 - StockCache 와 같은 인터페이스
+
+    Redis 키 만료 시간은 TTL + stale 보관 기간이며, 신선도(expires_at)는 값과 함께 저장합니다.
+    LRU 제거와 메모리 한도는 Redis 의 maxmemory-policy(allkeys-lru 권장)에 맡깁니다.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, client, ttl_minutes=15, stale_ttl_minutes=0, prefix='stock-cache:'):
+        self.client = client
+        self.ttl_seconds = ttl_minutes * 60
+        self.stale_ttl_seconds = stale_ttl_minutes * 60
+        self.prefix = prefix
+        self.max_entries = None
+        self.max_bytes = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.stale_seconds_total = 0.0
+        self.stale_seconds_max = 0.0
+        self.errors = 0
+
+    def _generate_key(self, stock_code, period, interval):
+        """캐시 키 생성"""
+        key_string = f"{stock_code}_{period}_{interval}"
+        return self.prefix + hashlib.md5(key_string.encode()).hexdigest()
+
+    def _read(self, key):
+        try:
+            raw = self.client.get(key)
+        except Exception as e:
+            log.warning("Redis cache read failed: %s", e)
+            with self._lock:
+                self.errors += 1
+            return None
+        if not raw:
+            return None
+        # 미리 인코딩된 본문(bytes)은 'JSON 헤더\n본문' 형태로 저장
+        header, newline, body = raw.partition(b'\n') if isinstance(raw, bytes) else (raw, '', None)
+        record = json.loads(header)
+        if newline and record.get('encoding') == 'bytes':
+            record['data'] = body
+        return record
+
+    def lookup(self, stock_code, period, interval, allow_stale=False):
+        """캐시 조회 결과와 만료 후 경과 시간(초) 반환 - 신선하면 0, 없으면 (None, None)"""
+        record = self._read(self._generate_key(stock_code, period, interval))
+        now = time.time()
+        with self._lock:
+            if record is not None and record['expires_at'] > now:
+                self.hits += 1
+                CACHE_LOOKUPS.inc('hit')
+                log.debug("Cache HIT for %s (age: %.1f minutes)", stock_code, (now - record['created_at']) / 60)
+                return record['data'], 0.0
+            if record is not None and allow_stale:
+                stale_seconds = now - record['expires_at']
+                self.stale_hits += 1
+                self.stale_seconds_total += stale_seconds
+                self.stale_seconds_max = max(self.stale_seconds_max, stale_seconds)
+                CACHE_LOOKUPS.inc('stale')
+                log.debug("Cache STALE for %s (expired %.1f minutes ago)", stock_code, stale_seconds / 60)
+                return record['data'], stale_seconds
+            self.misses += 1
+        CACHE_LOOKUPS.inc('miss')
+        log.debug("Cache MISS for %s", stock_code)
+        return None, None
+
+    def get(self, stock_code, period, interval):
+        """캐시에서 데이터 조회 (만료되었거나 없으면 None)"""
+        return self.lookup(stock_code, period, interval)[0]
+
+    def ttl_remaining(self, stock_code, period, interval):
+        """만료까지 남은 시간(초) 조회, 없으면 None"""
+        record = self._read(self._generate_key(stock_code, period, interval))
+        return None if record is None else record['expires_at'] - time.time()
+
+    def set(self, stock_code, period, interval, data, ttl_minutes=None):
+        """캐시에 데이터 저장 (Redis 키 만료 = TTL + stale 보관 기간)"""
+        ttl_seconds = self.ttl_seconds if ttl_minutes is None else ttl_minutes * 60
+        now = time.time()
+        record = {'created_at': now, 'expires_at': now + ttl_seconds}
+        if isinstance(data, (bytes, bytearray)):
+            record['encoding'] = 'bytes'
+            value = json.dumps(record).encode() + b'\n' + bytes(data)
+        else:
+            record['data'] = data
+            value = json.dumps(record, ensure_ascii=False)
+        try:
+            self.client.set(
+                self._generate_key(stock_code, period, interval),
+                value,
+                ex=max(1, int(ttl_seconds + self.stale_ttl_seconds)),
+            )
+            log.debug("Cache SET for %s", stock_code)
+        except Exception as e:
+            log.warning("Redis cache write failed: %s", e)
+            with self._lock:
+                self.errors += 1
+
+    def _keys(self):
+        return list(self.client.scan_iter(match=self.prefix + '*', count=500))
+
+    def clear_expired(self):
+        """Redis 가 키 만료를 처리하므로 정리할 항목 없음"""
+        return 0
+
+    def clear(self):
+        """캐시 전체 삭제, 제거된 항목 수 반환"""
+        keys = self._keys()
+        if keys:
+            self.client.delete(*keys)
+        return len(keys)
+
+    def __len__(self):
+        """접두사 키 수 - SCAN 전체 순회이므로 /cache/stats 같은 관리용 조회에서만 사용"""
+        return len(self._keys())
+
+    def get_stats(self, include_entries=True):
+        """캐시 통계 조회 (히트/미스는 현재 워커 프로세스 기준)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'backend': self.backend,
+                'ttl_minutes': round(self.ttl_seconds / 60, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'errors': self.errors,
+                'stale_ttl_minutes': round(self.stale_ttl_seconds / 60, 1),
+                'stale_hits': self.stale_hits,
+                'avg_stale_seconds': round(self.stale_seconds_total / self.stale_hits, 1) if self.stale_hits else 0.0,
+                'max_stale_seconds': round(self.stale_seconds_max, 1),
+            }
+        try:
+            stats['total_bytes'] = self.client.info('memory').get('used_memory')
+            if include_entries:
+                stats['total_entries'] = len(self)
+        except Exception as e:
+            stats['error'] = str(e)
+        return stats
+
+
+def create_stock_cache(ttl_minutes=15, stale_ttl_minutes=0, max_entries=512, max_bytes=256 * 1024 * 1024):
+    """STOCK_CACHE_BACKEND 설정에 맞는 캐시 생성 (redis 연결 실패 시 프로세스 내 캐시로 대체)"""
+    backend = os.getenv('STOCK_CACHE_BACKEND', 'memory').lower()
+    if backend == 'redis':
+        try:
+            import redis
+
+            client = redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+            client.ping()
+            log.info("Using shared Redis cache backend")
+            return RedisStockCache(client, ttl_minutes=ttl_minutes, stale_ttl_minutes=stale_ttl_minutes)
+        except Exception as e:
+            log.warning("Redis cache unavailable, falling back to in-process cache: %s", e)
+    return StockCache(max_entries=max_entries, max_bytes=max_bytes,
+                      ttl_minutes=ttl_minutes, stale_ttl_minutes=stale_ttl_minutes)
@@ -0,0 +1,324 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import get_logger
+from resample import RESAMPLE_INTERVALS, resample_ohlcv
+from upstream_scheduler import UpstreamBusy
+
+# 종목/간격별 캔들을 SQLite 에 영구 저장하는 캔들 저장소
+# - 캐시 미스 시 전체 period 를 다시 받지 않고 마지막 저장 시각 이후 봉만 받아 병합
+# - 요청 period 는 저장된 시계열을 잘라서(slice) 응답
+# - 파일 기반이므로 프로세스 재시작 후에도 유지됨
+# - 일봉/주봉/월봉은 종목당 하나의 일봉 기준 시계열(base period)에서 잘라내거나 리샘플링해 만듦
+# - 증분 조회에 배당/분할이 있거나 겹치는 완성 봉의 종가가 달라지면(수정 주가 재계산) 종목 전체를 버리고 다시 조회
+
+log = get_logger('candle_store')
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Adj Close']
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+
+# yfinance period 문자열 -> 현재 시각 기준 시작 시각 계산용 오프셋
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL, adj_close REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    tz TEXT NOT NULL,
+    covered_from INTEGER NOT NULL,
+    has_adj_close INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+
+def period_start(period, tz, now=None):
+    """period 에 해당하는 시작 시각(UTC epoch 초) 계산, max 는 0"""
+    now = now or pd.Timestamp.now(tz=tz)
+    if period == 'max':
+        return 0
+    if period == 'ytd':
+        start = now.normalize().replace(month=1, day=1)
+    elif period in PERIOD_OFFSETS:
+        start = now.normalize() - PERIOD_OFFSETS[period]
+    else:
+        return None
+    return int(start.timestamp())
+
+
+class CandleStore:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.full_fetches = 0
+        self.incremental_fetches = 0
+        self.rows_appended = 0
+        self.derived_reads = 0
+        self.adjustment_refetches = 0
+        # drop() 시 호출할 함수 (예: 같은 종목의 지표 저장소 행 삭제)
+        self.drop_listeners = []
+
+    def series_info(self, symbol, interval):
+        """저장된 시계열 메타데이터 조회 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT tz, covered_from, has_adj_close, updated_at,'
+                ' (SELECT MAX(ts) FROM candles WHERE symbol = ? AND interval = ?)'
+                ' FROM series WHERE symbol = ? AND interval = ?',
+                (symbol, interval, symbol, interval),
+            ).fetchone()
+        if row is None or row[4] is None:
+            return None
+        return {
+            'tz': row[0],
+            'covered_from': row[1],
+            'has_adj_close': bool(row[2]),
+            'updated_at': row[3],
+            'last_ts': row[4],
+        }
+
+    def write(self, symbol, interval, hist, covered_from=None):
+        """history DataFrame 병합 저장 (같은 시각의 봉은 덮어씀), 저장한 행 수 반환"""
+        if hist is None or hist.empty:
+            return 0
+
+        index = pd.DatetimeIndex(hist.index)
+        tz = str(index.tz) if index.tz is not None else 'UTC'
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        ts = index.as_unit('ns').asi8 // 10**9
+
+        has_adj_close = 'Adj Close' in hist.columns
+        columns = [
+            hist[name].to_numpy(dtype=np.float64, na_value=np.nan) if name in hist.columns
+            else np.full(len(hist), np.nan)
+            for name in PRICE_COLUMNS
+        ]
+        rows = [
+            (symbol, interval, int(t), *(None if v != v else float(v) for v in values))
+            for t, *values in zip(ts.tolist(), *(c.tolist() for c in columns))
+        ]
+
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN')
+            try:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO candles'
+                    ' (symbol, interval, ts, open, high, low, close, volume, adj_close)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    rows,
+                )
+                existing = conn.execute(
+                    'SELECT covered_from FROM series WHERE symbol = ? AND interval = ?',
+                    (symbol, interval),
+                ).fetchone()
+                if covered_from is None:
+                    covered_from = existing[0] if existing else int(ts[0])
+                elif existing:
+                    covered_from = min(covered_from, existing[0])
+                conn.execute(
+                    'INSERT OR REPLACE INTO series'
+                    ' (symbol, interval, tz, covered_from, has_adj_close, updated_at)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    (symbol, interval, tz, covered_from, int(has_adj_close), time.time()),
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return len(rows)
+
+    def read(self, symbol, interval, start_ts=0):
+        """저장된 캔들을 history 형태의 DataFrame 으로 조회"""
+        info = self.series_info(symbol, interval)
+        if info is None:
+            return pd.DataFrame()
+
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT ts, open, high, low, close, volume, adj_close FROM candles'
+                ' WHERE symbol = ? AND interval = ? AND ts >= ? ORDER BY ts',
+                (symbol, interval, start_ts),
+            ).fetchall()
+        if not rows:
+            return pd.DataFrame()
+
+        data = np.array(rows, dtype=np.float64)
+        index = pd.to_datetime(data[:, 0].astype(np.int64), unit='s', utc=True).tz_convert(info['tz'])
+        index.name = 'Date'
+        columns = PRICE_COLUMNS if info['has_adj_close'] else PRICE_COLUMNS[:-1]
+        return pd.DataFrame(data[:, 1:1 + len(columns)], index=index, columns=columns)
+
+    def candle_bounds(self, symbol, interval):
+        """저장된 첫 봉 시각과 봉 개수 조회"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT MIN(ts), COUNT(*) FROM candles WHERE symbol = ? AND interval = ?',
+                (symbol, interval),
+            ).fetchone()
+
+    def last_bars(self, symbol, interval, count=2):
+        """마지막 count 개 봉의 (시각, 종가) 를 시각 순으로 조회"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT ts, close FROM candles WHERE symbol = ? AND interval = ? ORDER BY ts DESC LIMIT ?',
+                (symbol, interval, count),
+            ).fetchall()
+        return rows[::-1]
+
+    def drop(self, symbol):
+        """종목의 모든 간격 캔들/시계열 정보 삭제 (수정 주가가 바뀌어 저장된 값을 쓸 수 없을 때)"""
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN')
+            try:
+                conn.execute('DELETE FROM candles WHERE symbol = ?', (symbol,))
+                conn.execute('DELETE FROM series WHERE symbol = ?', (symbol,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        for listener in self.drop_listeners:
+            listener(symbol)
+
+    @staticmethod
+    def _adjustment_changed(new_hist, last_ts, overlap):
+        """저장된 수정 주가를 더 쓸 수 없는 이유 반환 (없으면 None)
+
+        last_ts 이후 새 봉에 배당/분할이 있거나, 겹치는 완성 봉 overlap=(시각, 저장된 종가) 의 종가가 달라진 경우
+        """
+        index = pd.DatetimeIndex(new_hist.index)
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        ts = index.as_unit('ns').asi8 // 10**9
+        new_bars = ts > last_ts
+        for name in ACTION_COLUMNS:
+            if name in new_hist.columns and new_hist[name].fillna(0).to_numpy(dtype=np.float64)[new_bars].any():
+                return f"{name} in new bars"
+        if overlap is None or overlap[1] is None:
+            return None
+        matches = np.flatnonzero(ts == overlap[0])
+        if not len(matches):
+            return None
+        close = float(new_hist['Close'].iloc[matches[-1]])
+        if not np.isclose(close, overlap[1], rtol=1e-6, equal_nan=True):
+            return f"close of overlapping bar changed ({overlap[1]} -> {close})"
+        return None
+
+    def read_closes(self, symbol, interval, start_ts=0, lookback=0):
+        """start_ts 이후 종가와 그 직전 lookback 개 종가를 (시각 배열, 종가 배열) 로 조회 (지표 계산용)"""
+        with self._lock:
+            before = self._conn.execute(
+                'SELECT ts, close FROM candles WHERE symbol = ? AND interval = ? AND ts < ?'
+                ' ORDER BY ts DESC LIMIT ?',
+                (symbol, interval, start_ts, lookback),
+            ).fetchall() if lookback > 0 else []
+            rows = self._conn.execute(
+                'SELECT ts, close FROM candles WHERE symbol = ? AND interval = ? AND ts >= ? ORDER BY ts',
+                (symbol, interval, start_ts),
+            ).fetchall()
+        data = np.array(before[::-1] + rows, dtype=np.float64).reshape(-1, 2)
+        return data[:, 0].astype(np.int64), data[:, 1]
+
+    def load_history(self, ticker, symbol, period, interval):
+        """저장소 기반 history 조회 - 새로 생긴 봉만 업스트림에서 받아 병합 후 period 만큼 잘라 반환"""
+        info = self.series_info(symbol, interval)
+        start_ts = period_start(period, info['tz']) if info else None
+
+        if info is not None and start_ts is not None and start_ts >= info['covered_from']:
+            # 직전 완성 봉부터 다시 받아 마지막 봉(미완성일 수 있음)을 덮어쓰고, 직전 봉 종가로 수정 주가 변경 확인
+            bars = self.last_bars(symbol, interval)
+            overlap = bars[0] if len(bars) == 2 else None
+            first = pd.Timestamp(bars[0][0], unit='s', tz='UTC').tz_convert(info['tz'])
+            try:
+                new_hist = ticker.history(start=first.strftime('%Y-%m-%d'), interval=interval, actions=True)
+                self.incremental_fetches += 1
+                reason = None
+                if new_hist is not None and not new_hist.empty:
+                    reason = self._adjustment_changed(new_hist, info['last_ts'], overlap)
+                if reason is None:
+                    self.rows_appended += self.write(symbol, interval, new_hist)
+                    return self.read(symbol, interval, start_ts)
+                # 저장된 과거 봉의 수정 주가가 모두 바뀌었으므로 종목 전체(지표 포함)를 버리고 전체 조회
+                log.info("Adjusted prices changed for %s (%s), refetching full series", symbol, reason)
+                self.adjustment_refetches += 1
+                self.drop(symbol)
+            except UpstreamBusy:
+                # 호출 한도로 대기하다 포기한 경우 전체 조회로 다시 기다리지 않음
+                raise
+            except Exception as e:
+                log.warning("Incremental fetch failed for %s, falling back to full fetch: %s", symbol, e)
+
+        # 저장된 범위가 요청 period 를 덮지 못하면 period 전체 조회
+        hist = ticker.history(period=period, interval=interval)
+        self.full_fetches += 1
+        if hist is None or hist.empty:
+            return hist
+        tz = str(hist.index.tz) if hist.index.tz is not None else 'UTC'
+        covered_from = period_start(period, tz)
+        self.write(symbol, interval, hist, covered_from=covered_from)
+        return hist
+
+    def load_derived_history(self, ticker, symbol, period, interval, base_period):
+        """일봉 기준 시계열 하나로 (period, interval) history 구성
+
+        base_period 와 요청 period 중 긴 쪽의 일봉을 저장소에서 읽고(없으면 한 번 조회, 이후 새 봉만 조회)
+        period 만큼 잘라낸 뒤 1wk/1mo 는 리샘플링합니다. 분봉 등 다른 간격은 load_history 와 같습니다.
+        """
+        start_ts = period_start(period, 'UTC')
+        base_start_ts = period_start(base_period, 'UTC')
+        if (interval != '1d' and interval not in RESAMPLE_INTERVALS) or start_ts is None or base_start_ts is None:
+            return self.load_history(ticker, symbol, period, interval)
+
+        daily = self.load_history(ticker, symbol, period if start_ts < base_start_ts else base_period, '1d')
+        if daily is None or daily.empty:
+            return daily
+        self.derived_reads += 1
+        start = pd.Timestamp(period_start(period, str(daily.index.tz or 'UTC')), unit='s', tz='UTC')
+        daily = daily[daily.index >= start]
+        return daily if interval == '1d' else resample_ohlcv(daily, interval)
+
+    def get_stats(self):
+        """저장소 통계 조회"""
+        with self._lock:
+            series_count = self._conn.execute('SELECT COUNT(*) FROM series').fetchone()[0]
+        return {
+            'path': self.path,
+            'series': series_count,
+            'file_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            'full_fetches': self.full_fetches,
+            'incremental_fetches': self.incremental_fetches,
+            'rows_appended': self.rows_appended,
+            'derived_reads': self.derived_reads,
+            'adjustment_refetches': self.adjustment_refetches,
+        }
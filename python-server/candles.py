@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+# yfinance history DataFrame -> 캔들 리스트 변환 (컬럼 단위 벡터 연산)
+# stock_api.py 와 api/stock-data/[code].py 가 함께 사용합니다.
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+def _round2(values):
+    """파이썬 round(x, 2) 와 동일한 결과를 내는 벡터 반올림"""
+    scaled = values * 100
+    rounded = np.round(values, 2)
+    # x*100 이 .5 경계에 걸친 값만 파이썬 round 로 다시 계산 (float 표현 오차 보정)
+    frac = np.abs(scaled - np.floor(scaled) - 0.5)
+    ambiguous = np.flatnonzero(frac < 1e-6)
+    for i in ambiguous:
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def _price_list(series):
+    """가격 컬럼을 반올림된 float 리스트로 변환 (NaN 은 0)"""
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    missing = np.isnan(values)
+    result = _round2(np.where(missing, 0.0, values)).tolist()
+    for i in np.flatnonzero(missing):
+        result[i] = 0
+    return result
+
+
+def _volume_list(series):
+    """거래량 컬럼을 int 리스트로 변환 (NaN 은 0)"""
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = np.where(np.isnan(values), 0.0, values)
+    return values.astype(np.int64).tolist()
+
+
+def _date_list(index):
+    """DatetimeIndex 를 거래소 현지 날짜 문자열(YYYY-MM-DD) 리스트로 변환 (요소별 strftime 없이)"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return np.datetime_as_string(index.values.astype('datetime64[D]')).tolist()
+
+
+def hist_to_columns(hist):
+    """history DataFrame 을 컬럼별 리스트 딕셔너리로 변환"""
+    if hist is None or hist.empty:
+        return {key: [] for key in ('time', *PRICE_COLUMNS, 'volume', 'adj_close')}
+
+    adj_source = hist['Adj Close'] if 'Adj Close' in hist.columns else hist['Close']
+    return {
+        'time': _date_list(hist.index),
+        'open': _price_list(hist['Open']),
+        'high': _price_list(hist['High']),
+        'low': _price_list(hist['Low']),
+        'close': _price_list(hist['Close']),
+        'volume': _volume_list(hist['Volume']),
+        'adj_close': _price_list(adj_source),
+    }
+
+
+def hist_to_candles(hist):
+    """history DataFrame 을 캔들 딕셔너리 리스트로 변환"""
+    columns = hist_to_columns(hist)
+    return [
+        {
+            'time': t,
+            'open': o,
+            'high': h,
+            'low': l,
+            'close': c,
+            'volume': v,
+            'adj_close': a,
+        }
+        for t, o, h, l, c, v, a in zip(
+            columns['time'], columns['open'], columns['high'], columns['low'],
+            columns['close'], columns['volume'], columns['adj_close'],
+        )
+    ]
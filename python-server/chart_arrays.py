@@ -0,0 +1,216 @@
+import json
+import os
+import time
+import urllib.parse
+from datetime import date, datetime, timedelta
+
+# pandas 없는 Yahoo chart API(v8) 조회/변환
+# - 표준 라이브러리만 사용 (yfinance/pandas/numpy import 없음) - Vercel 함수의 콜드 스타트 경로용
+# - 응답 JSON 을 바로 응답용 배열로 변환하며, 결과는 hist_to_columns(chart_to_history(...)) 와 같음
+#   (auto_adjust, 빈 봉 제거, 같은 날짜 중복 봉은 마지막 값, 가격 소수점 2자리 반올림, NaN 은 0)
+
+DEFAULT_BASE_URL = 'https://query2.finance.yahoo.com'
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+# 일봉 이상은 yfinance 처럼 현지 자정으로 정규화
+DAILY_INTERVALS = {'1d', '5d', '1wk', '1mo', '3mo'}
+
+NAN = float('nan')
+_EPOCH = date(1970, 1, 1)
+
+
+def chart_params(period=None, interval='1d', start=None):
+    """chart API 쿼리 파라미터 구성 (start 가 있으면 period1~현재)"""
+    params = {'interval': interval, 'includePrePost': 'false', 'events': 'div,splits'}
+    if start is not None:
+        if isinstance(start, (int, float)):
+            start_ts = int(start)
+        else:
+            # 문자열/Timestamp 시작일은 증분 조회(캔들 저장소) 경로에서만 쓰이므로 그때 pandas 사용
+            import pandas as pd
+
+            start_ts = int(pd.Timestamp(start, tz='UTC').timestamp())
+        # 거래소 시간대와 무관하게 시작일 봉이 포함되도록 하루 앞에서 시작 (겹치는 봉은 저장소에서 덮어씀)
+        params['period1'] = str(start_ts - 86400)
+        params['period2'] = str(int(time.time()))
+    else:
+        params['range'] = period or '1mo'
+    return params
+
+
+def meta_to_info(meta, symbol):
+    """chart meta 를 ticker.info 와 같은 키의 딕셔너리로 변환 (extract_metadata 입력용)"""
+    return {
+        'symbol': meta.get('symbol', symbol),
+        'longName': meta.get('longName'),
+        'shortName': meta.get('shortName'),
+        'currency': meta.get('currency', 'KRW'),
+        'timeZoneFullName': meta.get('exchangeTimezoneName', 'Asia/Seoul'),
+    }
+
+
+def fetch_chart(symbol, period, interval, base_url=None, timeout=5.0):
+    """chart API 동기 조회 (urllib), 심볼에 데이터가 없으면(404) None"""
+    # http.client/ssl import 도 수십 ms 이므로 /tmp 스냅샷으로 응답하는 호출에서는 불러오지 않음
+    import urllib.error
+    import urllib.request
+
+    base_url = (base_url or os.getenv('STOCK_CHART_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+    query = urllib.parse.urlencode(chart_params(period, interval))
+    request = urllib.request.Request(
+        f"{base_url}/v8/finance/chart/{urllib.parse.quote(symbol)}?{query}",
+        headers={'User-Agent': USER_AGENT, 'Accept': 'application/json'},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise RuntimeError(f"chart request for {symbol} failed: upstream status {e.code}") from e
+
+
+def _local_offsets(timestamps, meta):
+    """봉별 UTC 오프셋(초) - 구간 안에서 오프셋이 바뀌지 않으면(KRX 등) 값 하나만 반환"""
+    tz_name = meta.get('exchangeTimezoneName')
+    try:
+        from zoneinfo import ZoneInfo
+
+        tz = ZoneInfo(tz_name or 'UTC')
+    except Exception:
+        # 시간대 데이터가 없는 런타임이면 응답의 현재 오프셋 사용
+        return int(meta.get('gmtoffset') or 0)
+
+    def offset(ts):
+        return int(datetime.fromtimestamp(ts, tz).utcoffset().total_seconds())
+
+    first, last = offset(timestamps[0]), offset(timestamps[-1])
+    if first == last:
+        return first
+    return [offset(ts) for ts in timestamps]
+
+
+def _float_list(values, count):
+    # None(거래 없는 봉)은 NaN
+    if not values:
+        return [NAN] * count
+    return [NAN if value is None else float(value) for value in values]
+
+
+def _price(value):
+    return 0 if value != value else round(value, 2)
+
+
+class ChartArrays:
+    """chart API 응답을 정리한 병렬 배열 (빈 봉 제거, 날짜 중복 제거, 시간순 정렬)
+
+    symbol_resolver.has_rows 가 쓰는 empty 속성을 가져 DataFrame 대신 사용할 수 있습니다.
+    """
+
+    __slots__ = ('meta', 'dates', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, meta=None, dates=(), opens=(), highs=(), lows=(), closes=(), volumes=()):
+        self.meta = meta or {}
+        self.dates = list(dates)
+        self.open = list(opens)
+        self.high = list(highs)
+        self.low = list(lows)
+        self.close = list(closes)
+        self.volume = list(volumes)
+
+    @property
+    def empty(self):
+        return not self.dates
+
+    def __len__(self):
+        return len(self.dates)
+
+    def to_columns(self):
+        """hist_to_columns() 와 같은 컬럼별 리스트 딕셔너리"""
+        close = [_price(value) for value in self.close]
+        return {
+            'time': list(self.dates),
+            'open': [_price(value) for value in self.open],
+            'high': [_price(value) for value in self.high],
+            'low': [_price(value) for value in self.low],
+            'close': close,
+            'volume': [0 if value != value else int(value) for value in self.volume],
+            # auto_adjust 이므로 수정 종가 = 종가
+            'adj_close': list(close),
+        }
+
+    def to_candles(self):
+        """hist_to_candles() 와 같은 캔들 딕셔너리 리스트"""
+        columns = self.to_columns()
+        return [
+            {
+                'time': t,
+                'open': o,
+                'high': h,
+                'low': l,
+                'close': c,
+                'volume': v,
+                'adj_close': a,
+            }
+            for t, o, h, l, c, v, a in zip(
+                columns['time'], columns['open'], columns['high'], columns['low'],
+                columns['close'], columns['volume'], columns['adj_close'],
+            )
+        ]
+
+
+def parse_chart(payload, interval='1d'):
+    """chart API 응답 JSON 을 ChartArrays 로 변환 (데이터가 없으면 빈 ChartArrays)"""
+    chart = (payload or {}).get('chart') or {}
+    results = chart.get('result') or []
+    if not results:
+        return ChartArrays()
+
+    result = results[0]
+    meta = result.get('meta') or {}
+    timestamps = result.get('timestamp') or []
+    indicators = result.get('indicators') or {}
+    quotes = (indicators.get('quote') or [{}])[0]
+    if not timestamps or not quotes:
+        return ChartArrays(meta)
+
+    count = len(timestamps)
+    opens, highs, lows, closes, volumes = (
+        _float_list(quotes.get(name), count) for name in ('open', 'high', 'low', 'close', 'volume')
+    )
+    adjclose_list = (indicators.get('adjclose') or [{}])[0].get('adjclose')
+    adj_closes = _float_list(adjclose_list, count) if adjclose_list else closes
+
+    offsets = _local_offsets(timestamps, meta)
+    daily = interval in DAILY_INTERVALS
+    rows = {}
+    for i, ts in enumerate(timestamps):
+        # auto_adjust: 시가/고가/저가에 수정 종가 비율 적용 (종가가 0 이면 비율 없음)
+        close = closes[i]
+        ratio = adj_closes[i] / close if close else NAN
+        o, h, l, c = opens[i] * ratio, highs[i] * ratio, lows[i] * ratio, adj_closes[i]
+        if o != o and h != h and l != l and c != c:
+            continue
+        local = ts + (offsets if isinstance(offsets, int) else offsets[i])
+        day = local // 86400
+        # 일봉은 같은 날짜, 분봉은 같은 시각의 봉을 마지막 값으로 덮어씀
+        rows[day if daily else ts] = (day, o, h, l, c, volumes[i])
+
+    ordered = [rows[key] for key in sorted(rows)]
+    return ChartArrays(
+        meta,
+        dates=[(_EPOCH + timedelta(days=row[0])).isoformat() for row in ordered],
+        opens=[row[1] for row in ordered],
+        highs=[row[2] for row in ordered],
+        lows=[row[3] for row in ordered],
+        closes=[row[4] for row in ordered],
+        volumes=[row[5] for row in ordered],
+    )
+
+
+def load_chart_arrays(symbol, period, interval, base_url=None, timeout=5.0):
+    """심볼 하나의 chart API 조회 + 변환 (데이터가 없으면 빈 ChartArrays)"""
+    payload = fetch_chart(symbol, period, interval, base_url, timeout)
+    if payload is None:
+        return ChartArrays()
+    return parse_chart(payload, interval)
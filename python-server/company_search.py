@@ -0,0 +1,342 @@
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+from corp_codes import corp_codes_source_mtime, load_companies
+from instrumentation import get_logger
+
+# 회사명 검색 인덱스 (메모리)
+# - 회사 목록을 한 번 읽어 정규화(소문자, 공백 제거)한 이름으로 정렬 배열 + n-gram(1, 2글자) 역색인 구성
+# - 검색 순서: 완전 일치 > 접두어 > 부분 문자열 > 초성/자모(예: "ㅅㅅㅈㅈ", "삼성ㅈ")
+#   -> 아무것도 없으면 오타 허용(편집 거리)
+# - 문서 번호를 (상장 여부, 이름 길이, 이름) 순으로 매겨 두어 역색인 목록이 곧 정렬 순서
+#   -> 단계별로 앞에서부터 limit 개만 확인하고 멈춤
+# - 목록이 갱신되면(corpCodes.json 수정 시각 변경 / reload()) 새 인덱스를 만든 뒤 통째로 교체
+
+log = get_logger('company_search')
+
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_CHOSEONG_INDEX = {jamo: i for i, jamo in enumerate(CHOSEONG)}
+_SYLLABLES_PER_CHOSEONG = 588
+_TO_CHOSEONG = {code: CHOSEONG[(code - HANGUL_BASE) // _SYLLABLES_PER_CHOSEONG] for code in range(HANGUL_BASE, HANGUL_LAST + 1)}
+
+
+def normalize(text):
+    """검색용 정규화 (NFC, 소문자, 공백 제거)"""
+    return ''.join(unicodedata.normalize('NFC', text or '').lower().split())
+
+
+def choseong(text):
+    """한글 음절을 초성으로 바꾼 문자열 (그 외 문자는 그대로)"""
+    return text.translate(_TO_CHOSEONG)
+
+
+def _jamo_match(pattern, text):
+    """자모가 섞인 검색어 비교 - 초성 자모는 그 초성으로 시작하는 음절과 일치 (부분 문자열)"""
+    n = len(pattern)
+    for start in range(len(text) - n + 1):
+        for p, t in zip(pattern, text[start:start + n]):
+            if p == t:
+                continue
+            index = _CHOSEONG_INDEX.get(p)
+            code = ord(t) - HANGUL_BASE
+            if index is None or not 0 <= code <= HANGUL_LAST - HANGUL_BASE or code // _SYLLABLES_PER_CHOSEONG != index:
+                break
+        else:
+            return True
+    return False
+
+
+def edit_distance(a, b, limit):
+    """편집 거리 (limit 을 넘으면 limit + 1)"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _grams(text):
+    """검색어의 n-gram (1글자는 그 글자, 그 이상은 2글자씩)"""
+    if len(text) == 1:
+        return [text]
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+class _TextIndex:
+    """문서 번호별 문자열 하나에 대한 정렬 배열 + n-gram 역색인"""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.lengths = np.fromiter(map(len, texts), dtype=np.int32, count=len(texts))
+        order = sorted((i for i, text in enumerate(texts) if text), key=texts.__getitem__)
+        self.sorted_texts = [texts[i] for i in order]
+        self.sorted_ids = np.array(order, dtype=np.int32)
+
+        postings = defaultdict(list)
+        for doc_id, text in enumerate(texts):
+            grams = set(text)
+            grams.update(map(str.__add__, text, text[1:]))
+            for gram in grams:
+                postings[gram].append(doc_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def exact(self, query):
+        lo = bisect_left(self.sorted_texts, query)
+        hi = lo
+        while hi < len(self.sorted_texts) and self.sorted_texts[hi] == query:
+            hi += 1
+        return np.sort(self.sorted_ids[lo:hi])
+
+    def prefix(self, query):
+        lo = bisect_left(self.sorted_texts, query)
+        hi = bisect_left(self.sorted_texts, query + '\U0010ffff', lo)
+        return np.sort(self.sorted_ids[lo:hi])
+
+    def candidates(self, query):
+        """query 의 n-gram 을 모두 가진 문서 번호 (오름차순)"""
+        lists = []
+        for gram in set(_grams(query)):
+            ids = self.postings.get(gram)
+            if ids is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(ids)
+        lists.sort(key=len)
+        result = lists[0]
+        for ids in lists[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, ids, assume_unique=True)
+        return result
+
+    def similar(self, query, max_distance, limit):
+        """n-gram 을 많이 공유하는 후보 중 편집 거리 max_distance 이하 문서 [(거리, 문서 번호)]"""
+        # 편집 한 번에 2-gram 은 2개까지 사라짐 - 2-gram 이 모두 사라질 수 있는 짧은 검색어는 글자(1-gram)도 사용
+        grams = set(_grams(query))
+        required = len(grams) - 2 * max_distance
+        if required < 1:
+            grams |= set(query)
+            required = max(1, len(grams) - 3 * max_distance)
+        postings = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not postings:
+            return []
+        candidates, counts = np.unique(np.concatenate(postings), return_counts=True)
+        # 길이 차이가 max_distance 를 넘으면 편집 거리도 넘음
+        keep = (counts >= required) & (np.abs(self.lengths[candidates] - len(query)) <= max_distance)
+        candidates, counts = candidates[keep], counts[keep]
+        if len(candidates) > limit * 5:
+            candidates = candidates[np.argsort(-counts, kind='stable')[:limit * 5]]
+        matches = []
+        for doc_id in candidates.tolist():
+            distance = edit_distance(query, self.texts[doc_id], max_distance)
+            if distance <= max_distance:
+                matches.append((distance, doc_id))
+        return sorted(matches)
+
+
+class CompanyIndex:
+    """회사 목록 하나로 만든 검색 인덱스 (읽기 전용)"""
+
+    def __init__(self, companies):
+        started = time.perf_counter()
+        # 상장사 먼저, 이름이 짧을수록, 이름순 - 문서 번호가 곧 기본 순위
+        self.companies = sorted(
+            companies,
+            key=lambda c: (not (c.get('stock_code') or '').strip(), len(c.get('corp_name') or ''), c.get('corp_name') or ''),
+        )
+        names = [normalize(c.get('corp_name')) for c in self.companies]
+        self.names = _TextIndex(names)
+        self.eng_names = _TextIndex([normalize(c.get('corp_eng_name')) for c in self.companies])
+        self.choseong = _TextIndex([choseong(name) for name in names])
+        self.by_stock_code = {}
+        self.by_corp_code = {}
+        for doc_id, company in enumerate(self.companies):
+            stock_code = (company.get('stock_code') or '').strip()
+            if stock_code:
+                self.by_stock_code.setdefault(stock_code, doc_id)
+            self.by_corp_code[company.get('corp_code')] = doc_id
+        self.stock_codes = sorted(self.by_stock_code)
+        self.build_seconds = time.perf_counter() - started
+
+    def __len__(self):
+        return len(self.companies)
+
+    def search(self, query, limit=10, fuzzy=True):
+        """검색 결과 [(문서 번호, 일치 방식)] (완전 일치 > 접두어 > 부분 문자열 > 초성 > 오타 허용)"""
+        query = normalize(query)
+        if not query:
+            return []
+        results = []
+        seen = set()
+
+        def add(doc_ids, match, verify=None):
+            for doc_id in doc_ids:
+                doc_id = int(doc_id)
+                if len(results) >= limit:
+                    return True
+                if doc_id in seen or (verify is not None and not verify(doc_id)):
+                    continue
+                seen.add(doc_id)
+                results.append((doc_id, match))
+            return len(results) >= limit
+
+        if query.isdigit():
+            # 종목코드(6자리) / 고유번호(8자리)
+            exact = [self.by_stock_code.get(query), self.by_corp_code.get(query)]
+            if add([doc_id for doc_id in exact if doc_id is not None], 'code'):
+                return results
+            lo = bisect_left(self.stock_codes, query)
+            hi = bisect_left(self.stock_codes, query + '\U0010ffff', lo)
+            if add(sorted(self.by_stock_code[code] for code in self.stock_codes[lo:hi]), 'code'):
+                return results
+
+        for index in (self.names, self.eng_names):
+            if add(index.exact(query), 'exact'):
+                return results
+        for index in (self.names, self.eng_names):
+            if add(index.prefix(query), 'prefix'):
+                return results
+        for index in (self.names, self.eng_names):
+            texts = index.texts
+            if add(index.candidates(query), 'substring', lambda doc_id: query in texts[doc_id]):
+                return results
+
+        # 초성/자모 검색 (예: "ㅅㅅㅈㅈ" -> 삼성전자, "삼성ㅈ" -> 삼성전자)
+        if any(ch in _CHOSEONG_INDEX for ch in query):
+            names = self.names.texts
+            candidates = self.choseong.candidates(choseong(query))
+            # 완성된 음절 부분(예: "삼성ㅈ" 의 "삼성")으로 후보를 먼저 좁힘
+            syllables = max(''.join(' ' if ch in _CHOSEONG_INDEX else ch for ch in query).split(), key=len, default='')
+            if syllables and len(candidates):
+                candidates = np.intersect1d(candidates, self.names.candidates(syllables), assume_unique=True)
+            if add(candidates, 'choseong', lambda doc_id: _jamo_match(query, names[doc_id])):
+                return results
+
+        # 다른 방식으로 하나도 찾지 못했을 때만 오타 허용 (4글자당 편집 1회, 최대 2회)
+        if fuzzy and not results and len(query) >= 2:
+            max_distance = min(2, max(1, len(query) // 4))
+            matches = sorted(self.names.similar(query, max_distance, limit) + self.eng_names.similar(query, max_distance, limit))
+            add([doc_id for _, doc_id in matches], 'fuzzy')
+        return results
+
+
+class CompanySearch:
+    """회사 검색 서비스 - 인덱스를 메모리에 두고 목록이 바뀌면 백그라운드에서 다시 만들어 교체"""
+
+    def __init__(self, loader=load_companies, source_mtime_fn=corp_codes_source_mtime,
+                 check_interval_seconds=30, max_age_seconds=3600):
+        self.loader = loader
+        self.source_mtime_fn = source_mtime_fn
+        self.check_interval_seconds = check_interval_seconds
+        self.max_age_seconds = max_age_seconds
+        self._index = None
+        self._lock = threading.Lock()
+        self._loading = threading.RLock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.source_mtime = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.searches = 0
+        self.last_error = None
+
+    def reload(self):
+        """회사 목록을 다시 읽어 인덱스 교체 (진행 중인 검색은 이전 인덱스로 계속), 회사 수 반환"""
+        with self._loading:
+            source_mtime = self.source_mtime_fn()
+            index = CompanyIndex(self.loader())
+            if not len(index) and self._index is not None and len(self._index):
+                # 목록을 읽지 못했으면(DB 장애, 파일 없음) 이전 인덱스 유지
+                self.last_error = 'Company list is empty, keeping previous index'
+                log.warning("Company search reload skipped: %s", self.last_error)
+                return len(self._index)
+            with self._lock:
+                self._index = index
+                self.source_mtime = source_mtime
+                self.loaded_at = time.time()
+                self.reloads += 1
+            log.info("Company search index built: %d companies in %.2fs", len(index), index.build_seconds)
+            return len(index)
+
+    def index(self):
+        """현재 인덱스 (처음 호출 시 생성하고 변경 감시 시작)"""
+        if self._index is None:
+            with self._loading:
+                if self._index is None:
+                    self.reload()
+            self.start()
+        return self._index
+
+    def start(self):
+        """목록 변경 감시 스레드 시작 (corpCodes.json 수정 시각, 또는 max_age_seconds 경과)"""
+        with self._lock:
+            if self._thread is not None or self.check_interval_seconds <= 0:
+                return
+            self._thread = threading.Thread(target=self._watch, name='company-search-reload', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        pending_mtime = None
+        while not self._stop.wait(self.check_interval_seconds):
+            try:
+                if self._index is None:
+                    continue
+                source_mtime = self.source_mtime_fn()
+                # 파일을 쓰는 중일 수 있으므로 수정 시각이 한 번 더 확인될 때까지 기다림
+                changed = source_mtime != self.source_mtime and source_mtime == pending_mtime
+                pending_mtime = source_mtime
+                expired = self.max_age_seconds > 0 and time.time() - self.loaded_at >= self.max_age_seconds
+                if changed or expired:
+                    self.reload()
+            except Exception as e:
+                self.last_error = str(e)
+                log.warning("Company search reload failed: %s", e)
+
+    def search(self, query, limit=10):
+        """회사 검색 - API 응답 형식의 딕셔너리 목록"""
+        index = self.index()
+        self.searches += 1
+        return [
+            {
+                'corp_code': index.companies[doc_id].get('corp_code'),
+                'corp_name': index.companies[doc_id].get('corp_name'),
+                'corp_eng_name': index.companies[doc_id].get('corp_eng_name'),
+                'stock_code': index.companies[doc_id].get('stock_code'),
+                'match': match,
+            }
+            for doc_id, match in index.search(query, limit)
+        ]
+
+    def by_stock_code(self, stock_code):
+        """종목코드로 회사 조회 (없으면 None)"""
+        index = self.index()
+        doc_id = index.by_stock_code.get((stock_code or '').strip())
+        return None if doc_id is None else index.companies[doc_id]
+
+    def get_stats(self):
+        """검색 인덱스 통계"""
+        index = self._index
+        return {
+            'companies': len(index) if index is not None else 0,
+            'build_seconds': round(index.build_seconds, 3) if index is not None else None,
+            'loaded_at': self.loaded_at,
+            'source_mtime': self.source_mtime,
+            'reloads': self.reloads,
+            'searches': self.searches,
+            'last_error': self.last_error,
+        }
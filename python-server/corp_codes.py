@@ -0,0 +1,85 @@
+import json
+import os
+
+from instrumentation import get_logger
+
+# 회사 코드 목록 로더
+# - POSTGRES_URL / DATABASE_URL 이 있고 psycopg2 가 설치되어 있으면 companies 테이블에서 조회
+# - 아니면 scripts/download_corp_code.js 가 만든 downloads/corpCodes.json 을 읽음
+
+log = get_logger('corp_codes')
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+CORP_CODES_JSON = os.path.join(PROJECT_ROOT, 'downloads', 'corpCodes.json')
+
+
+def _load_from_postgres(database_url):
+    try:
+        import psycopg2
+    except ImportError:
+        return None
+
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT corp_code, corp_name, corp_eng_name, stock_code FROM companies')
+            rows = cur.fetchall()
+    finally:
+        conn.close()
+    return [
+        {'corp_code': row[0], 'corp_name': row[1], 'corp_eng_name': row[2], 'stock_code': row[3]}
+        for row in rows
+    ]
+
+
+def _load_from_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    companies = data['result']['list']
+    if not isinstance(companies, list):
+        companies = [companies]
+    return [
+        {
+            'corp_code': company.get('corp_code') or '',
+            'corp_name': company.get('corp_name') or '',
+            'corp_eng_name': company.get('corp_eng_name') or None,
+            'stock_code': company.get('stock_code') or None,
+        }
+        for company in companies
+    ]
+
+
+def load_companies(json_path=None):
+    """회사 목록 조회 (Postgres companies 테이블 우선, 없으면 corpCodes.json)"""
+    database_url = os.getenv('POSTGRES_URL') or os.getenv('DATABASE_URL')
+    if database_url:
+        try:
+            companies = _load_from_postgres(database_url)
+            if companies is not None:
+                return companies
+        except Exception as e:
+            log.warning("Failed to load companies from Postgres: %s", e)
+
+    companies = _load_from_json(json_path or os.getenv('CORP_CODES_JSON', CORP_CODES_JSON))
+    return companies or []
+
+
+def corp_codes_source_mtime(json_path=None):
+    """corpCodes.json 수정 시각 (목록 갱신 감지용, 파일이 없으면 None)"""
+    try:
+        return os.path.getmtime(json_path or os.getenv('CORP_CODES_JSON', CORP_CODES_JSON))
+    except OSError:
+        return None
+
+
+def listed_stock_codes(companies=None):
+    """상장 종목코드(6자리 숫자) 목록"""
+    companies = load_companies() if companies is None else companies
+    codes = []
+    for company in companies:
+        stock_code = (company.get('stock_code') or '').strip()
+        if len(stock_code) == 6 and stock_code.isdigit():
+            codes.append(stock_code)
+    return sorted(set(codes))
@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+
+# 운영용 gunicorn 설정
+# 실행: cd python-server && gunicorn -c gunicorn.conf.py stock_api:app
+#
+# - 워커마다 별도 프로세스이므로 프로세스 내 캐시(StockCache)는 워커별로 따로 생깁니다.
+#   워커 간 캐시를 공유하려면 STOCK_CACHE_BACKEND=redis, REDIS_URL 을 설정하세요.
+# - 캔들 저장소/접미사/메타데이터/스크리너 SQLite 파일(data/)은 모든 워커가 함께 사용합니다.
+
+bind = f"0.0.0.0:{os.getenv('PYTHON_API_PORT', '5001')}"
+
+# 업스트림(yfinance) 대기가 대부분이므로 스레드 워커 사용
+# 스트리밍(/api/stock-stream)은 연결마다 스레드를 쓰지 않는 stream_server.py(aiohttp 이벤트 루프)가 제공하고,
+# STOCK_STREAM_URL 이 설정되면 워커는 구독 요청을 그 서버로 리다이렉트 (scripts/start-python-server-prod.sh 가 함께 실행)
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', min(4, multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+# 업스트림 호출 한도(STOCK_UPSTREAM_RATE_PER_SECOND)는 서버 전체 기준 - Redis 가 없으면 프로세스마다 프로세스 수로 나눈 몫을 사용
+# (스트리밍 서버도 한 몫 사용)
+os.environ.setdefault('STOCK_WORKER_PROCESSES', str(workers + (1 if os.getenv('STOCK_STREAM_URL') else 0)))
+
+# 첫 요청이 period=max 등 느린 업스트림 조회일 수 있으므로 여유 있게 설정
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# 백그라운드 스레드(갱신기, 메타데이터 조회)와 SQLite 연결은 fork 이후 워커에서 생성되어야 하므로 preload 하지 않음
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', None)
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    # 스크리너(/api/screener)는 data/screener.sqlite 잠금을 잡은 워커 하나만 갱신하고 나머지 워커는 게시된 테이블을 읽음
+    # STOCK_SCREENER_AUTOSTART 이면 부팅 시 시작 (꺼져 있으면 워커별 첫 /api/screener 요청에서 시작)
+    if os.getenv('STOCK_SCREENER_AUTOSTART', 'false').lower() == 'true':
+        from stock_api import screener
+
+        screener.start()
@@ -0,0 +1,140 @@
+import gzip
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# HTTP 조건부 요청(ETag / Last-Modified) + 응답 압축 협상 도우미
+# - Flask(stock_api.py)와 Vercel 핸들러(api/stock-data/[code].py)가 함께 사용
+# - 압축 결과는 본문 버전별로 한 번만 계산해 메모리에 보관 (요청마다 다시 압축하지 않음)
+
+# 이보다 작은 본문은 압축 이득보다 비용이 커서 그대로 전송
+MIN_COMPRESS_BYTES = 1024
+
+
+def make_etag(version):
+    """본문 버전으로 ETag 생성 (cache_info 등 일부 필드가 달라질 수 있으므로 weak ETag)"""
+    return f'W/"{version}"'
+
+
+def http_date(timestamp):
+    return formatdate(timestamp, usegmt=True)
+
+
+def is_not_modified(headers, etag, last_modified):
+    """If-None-Match(우선) / If-Modified-Since 로 304 응답 가능 여부 판단"""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        if if_none_match.strip() == '*':
+            return True
+        # weak 비교: W/ 접두어를 무시하고 태그 값만 비교
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return etag.removeprefix('W/') in tags
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since and last_modified is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def negotiate_encoding(accept_encoding):
+    """Accept-Encoding 에서 사용할 압축 방식 선택 (br > gzip, 없으면 None)"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    """본문 압축 (실시간 응답용으로 빠른 압축 수준 사용)"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+
+def cache_control(max_age, stale_while_revalidate=0):
+    """CDN/브라우저 캐시 힌트 (s-maxage 로 CDN 이 반복 요청을 흡수)"""
+    value = f"public, max-age={max(0, int(max_age))}, s-maxage={max(0, int(max_age))}"
+    if stale_while_revalidate > 0:
+        value += f", stale-while-revalidate={int(stale_while_revalidate)}"
+    return value
+
+
+class CompressedBodyCache:
+    """(본문 키, 압축 방식) 별 압축 결과 LRU - 같은 캐시 항목은 한 번만 압축"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, encoding, body_fn):
+        """압축된 본문 조회, 없으면 body_fn() 결과를 압축해 저장"""
+        cache_key = (key, encoding)
+        with self._lock:
+            compressed = self._entries.get(cache_key)
+            if compressed is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = compress(body_fn(), encoding)
+        with self._lock:
+            if cache_key not in self._entries:
+                self._entries[cache_key] = compressed
+                self.total_bytes += len(compressed)
+            while self._entries and self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+        return compressed
+
+    def get_stats(self):
+        """압축 캐시 통계"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'brotli': brotli is not None,
+            }
+
+
+def encode_body(body, accept_encoding, compressed_cache=None, cache_key=None):
+    """Accept-Encoding 에 맞게 본문 압축, (본문, Content-Encoding 또는 None) 반환
+
+    cache_key 가 있으면 압축 결과를 compressed_cache 에 보관해 재사용합니다.
+    """
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding is None:
+        return body, None
+    if compressed_cache is not None and cache_key is not None:
+        return compressed_cache.get(cache_key, encoding, lambda: body), encoding
+    return compress(body, encoding), encoding
@@ -0,0 +1,329 @@
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from candles import _round2
+
+# 기술적 지표 계산 (이동평균, 지수이동평균, RSI, MACD, 볼린저 밴드)
+# - 종가 배열에 대한 벡터 연산 (rolling 은 sliding window, 재귀식은 pandas ewm)
+# - IndicatorStore 는 계산 결과를 캔들 저장소와 같은 SQLite 파일에 저장하고,
+#   새 봉이 추가되면 직전 봉의 상태(EMA 값, 평균 상승/하락폭)에서 이어서 새 봉만 계산
+
+MAX_INDICATORS = 10
+MAX_WINDOW = 400
+
+# 요청 토큰 패턴 -> 지표 종류 (정규화된 이름은 종류 + 파라미터, 예: sma20, macd12_26_9, bb20_2)
+_SPEC_PATTERNS = [
+    (re.compile(r'^(?:ma|sma)(\d+)$'), 'sma'),
+    (re.compile(r'^ema(\d+)$'), 'ema'),
+    (re.compile(r'^rsi(\d+)?$'), 'rsi'),
+    (re.compile(r'^macd(?:(\d+)_(\d+)_(\d+))?$'), 'macd'),
+    (re.compile(r'^(?:bb|bollinger)(?:(\d+)(?:_(\d+(?:\.\d+)?))?)?$'), 'bb'),
+]
+_DEFAULTS = {'rsi': ('14',), 'macd': ('12', '26', '9'), 'bb': ('20', '2')}
+
+# 종류별 저장 컬럼 (앞쪽은 응답 출력, 나머지는 이어서 계산하기 위한 내부 상태)
+_COLUMNS = {
+    'sma': ('value',),
+    'ema': ('value',),
+    'rsi': ('value', 'avg_gain', 'avg_loss'),
+    'macd': ('macd', 'signal', 'histogram', 'fast', 'slow'),
+    'bb': ('middle', 'upper', 'lower'),
+}
+_OUTPUTS = {'sma': 1, 'ema': 1, 'rsi': 1, 'macd': 3, 'bb': 3}
+
+
+def parse_indicators(spec):
+    """indicators 파라미터 파싱 (예: "ma20,ema12,rsi,macd,bb") -> 정규화된 이름 튜플
+
+    잘못된 이름이면 ValueError
+    """
+    names = []
+    for token in (spec or '').split(','):
+        token = token.strip().lower()
+        if not token:
+            continue
+        for pattern, kind in _SPEC_PATTERNS:
+            match = pattern.match(token)
+            if match is None:
+                continue
+            params = tuple(p for p in match.groups() if p is not None) or _DEFAULTS.get(kind, ())
+            if kind == 'bb' and len(params) == 1:
+                params = (params[0], _DEFAULTS['bb'][1])
+            if any(int(float(p)) < 1 or float(p) > MAX_WINDOW for p in params):
+                raise ValueError(f"지표 파라미터 범위를 벗어났습니다: {token}")
+            names.append(kind + '_'.join(params))
+            break
+        else:
+            raise ValueError(f"지원하지 않는 지표입니다: {token}")
+    names = list(dict.fromkeys(names))
+    if len(names) > MAX_INDICATORS:
+        raise ValueError(f"지표는 최대 {MAX_INDICATORS}개까지 요청할 수 있습니다")
+    return tuple(names)
+
+
+def _split_name(name):
+    kind = re.match(r'^[a-z]+', name).group(0)
+    return kind, name[len(kind):].split('_')
+
+
+def lookback(name):
+    """이어서 계산할 때 필요한 직전 종가 개수"""
+    kind, params = _split_name(name)
+    if kind in ('sma', 'bb'):
+        return int(params[0]) - 1
+    if kind == 'rsi':
+        return 1
+    return 0
+
+
+def _ema(values, span=None, alpha=None, initial=None):
+    """지수이동평균 (adjust=False) - initial 이 있으면 직전 값에서 이어서 계산"""
+    if initial is not None:
+        values = np.r_[initial, values]
+    result = pd.Series(values).ewm(span=span, alpha=alpha, adjust=False).mean().to_numpy()
+    return result[1:] if initial is not None else result
+
+
+def _rolling(values, window, fn):
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = fn(sliding_window_view(values, window), axis=1)
+    return result
+
+
+def compute(name, closes, state=None):
+    """종가 배열로 지표 컬럼 계산 -> (len(closes) - lookback, 컬럼 수) 배열
+
+    closes 앞쪽 lookback(name) 개는 직전 봉 종가, state 는 직전 봉의 저장 컬럼 값 (없으면 처음부터 계산)
+    """
+    kind, params = _split_name(name)
+    skip = lookback(name) if state is not None else 0
+    closes = np.asarray(closes, dtype=np.float64)
+
+    if kind == 'sma':
+        window = int(params[0])
+        columns = [_rolling(closes, window, np.mean)]
+    elif kind == 'bb':
+        window, width = int(params[0]), float(params[1])
+        middle = _rolling(closes, window, np.mean)
+        std = _rolling(closes, window, np.std)
+        columns = [middle, middle + width * std, middle - width * std]
+    elif kind == 'ema':
+        columns = [_ema(closes, span=int(params[0]), initial=None if state is None else state[0])]
+    elif kind == 'macd':
+        fast_span, slow_span, signal_span = (int(p) for p in params)
+        fast = _ema(closes, span=fast_span, initial=None if state is None else state[3])
+        slow = _ema(closes, span=slow_span, initial=None if state is None else state[4])
+        macd = fast - slow
+        signal = _ema(macd, span=signal_span, initial=None if state is None else state[1])
+        columns = [macd, signal, macd - signal, fast, slow]
+    elif kind == 'rsi':
+        # Wilder 방식: 첫 평균은 period 개 변화량의 단순 평균, 이후 alpha=1/period 지수 평활
+        period = int(params[0])
+        delta = np.diff(closes, prepend=np.nan)
+        gains = np.where(delta > 0, delta, 0.0)
+        losses = np.where(delta < 0, -delta, 0.0)
+        avg_gain = np.full(len(closes), np.nan)
+        avg_loss = np.full(len(closes), np.nan)
+        if state is not None:
+            avg_gain[1:] = _ema(gains[1:], alpha=1 / period, initial=state[1])
+            avg_loss[1:] = _ema(losses[1:], alpha=1 / period, initial=state[2])
+        elif len(closes) > period:
+            seed_gain = gains[1:period + 1].mean()
+            seed_loss = losses[1:period + 1].mean()
+            avg_gain[period:] = np.r_[seed_gain, _ema(gains[period + 1:], alpha=1 / period, initial=seed_gain)]
+            avg_loss[period:] = np.r_[seed_loss, _ema(losses[period + 1:], alpha=1 / period, initial=seed_loss)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+        rsi[np.isnan(avg_gain)] = np.nan
+        columns = [rsi, avg_gain, avg_loss]
+    else:
+        raise ValueError(f"Unknown indicator: {name}")
+
+    return np.column_stack(columns)[skip:]
+
+
+def output_columns(name):
+    kind, _ = _split_name(name)
+    return _COLUMNS[kind][:_OUTPUTS[kind]]
+
+
+def _json_values(values):
+    """NaN 은 None, 나머지는 소수 둘째 자리 반올림"""
+    missing = np.isnan(values)
+    result = _round2(np.where(missing, 0.0, values)).tolist()
+    for i in np.flatnonzero(missing):
+        result[i] = None
+    return result
+
+
+def to_json(name, values):
+    """지표 컬럼 배열을 응답 형식으로 변환 (출력이 하나면 리스트, 여러 개면 {이름: 리스트})"""
+    names = output_columns(name)
+    if len(names) == 1:
+        return _json_values(values[:, 0])
+    return {column: _json_values(values[:, i]) for i, column in enumerate(names)}
+
+
+def compute_all(hist, names):
+    """history DataFrame 전체로 지표를 처음부터 계산 -> {이름: 컬럼 배열}"""
+    closes = hist['Close'].to_numpy(dtype=np.float64, na_value=np.nan) if hist is not None and not hist.empty else np.array([])
+    return {name: compute(name, closes) for name in names}
+
+
+def build_indicators(hist, names, store=None, symbol=None, interval=None):
+    """요청한 지표를 응답 형식으로 계산 ({이름: 값})
+
+    store 에 해당 종목의 일봉이 저장되어 있으면 저장된 지표(새 봉만 이어서 계산)를 사용하고,
+    그 외(주봉/월봉/분봉, 저장소 없음)에는 hist 로 처음부터 계산합니다.
+    """
+    if store is not None and interval == '1d' and hist is not None and not hist.empty \
+            and store.candle_store.series_info(symbol, interval) is not None:
+        values = store.load(symbol, interval, names, hist.index)
+    else:
+        values = compute_all(hist, names)
+    return {name: to_json(name, values[name]) for name in names}
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indicator_series (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    name TEXT NOT NULL,
+    first_ts INTEGER NOT NULL,
+    ts BLOB NOT NULL,
+    data BLOB NOT NULL,
+    columns INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, interval, name)
+);
+"""
+
+
+class IndicatorStore:
+    """캔들 저장소 옆(같은 SQLite 파일)에 지표 값을 저장하고 새 봉만 이어서 계산
+
+    지표 시계열 하나를 (봉 시각 int64 배열, float64 컬럼 배열) BLOB 한 행으로 저장해
+    조회는 SELECT 한 번 + np.frombuffer 로 끝납니다.
+    """
+
+    def __init__(self, candle_store):
+        self.candle_store = candle_store
+        self._conn = sqlite3.connect(candle_store.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.full_computes = 0
+        self.incremental_computes = 0
+        self.unchanged = 0
+        self.rows_computed = 0
+        # 캔들 저장소가 수정 주가 변경으로 종목을 버리면 지표도 함께 삭제
+        candle_store.drop_listeners.append(self.drop)
+
+    def _read(self, symbol, interval, name):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT first_ts, ts, data, columns FROM indicator_series'
+                ' WHERE symbol = ? AND interval = ? AND name = ?',
+                (symbol, interval, name),
+            ).fetchone()
+        if row is None:
+            return None, None, None
+        ts = np.frombuffer(row[1], dtype=np.int64)
+        return row[0], ts, np.frombuffer(row[2], dtype=np.float64).reshape(len(ts), row[3])
+
+    def _write(self, symbol, interval, name, ts, data):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO indicator_series'
+                ' (symbol, interval, name, first_ts, ts, data, columns, updated_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (symbol, interval, name, int(ts[0]), ts.tobytes(), np.ascontiguousarray(data).tobytes(),
+                 data.shape[1], time.time()),
+            )
+
+    def drop(self, symbol):
+        """종목의 모든 지표 시계열 삭제 (다음 조회 때 처음부터 다시 계산)"""
+        with self._lock:
+            self._conn.execute('DELETE FROM indicator_series WHERE symbol = ?', (symbol,))
+
+    def update(self, symbol, interval, name, candle_bounds=None):
+        """저장된 캔들에 맞춰 지표 갱신 후 (봉 시각 배열, 컬럼 배열) 반환
+
+        마지막으로 계산한 봉(미완성일 수 있음)부터 직전 봉의 상태로 이어서 다시 계산합니다.
+        """
+        first_candle_ts, candle_count = candle_bounds or self.candle_store.candle_bounds(symbol, interval)
+        if candle_count == 0:
+            return np.array([], dtype=np.int64), np.empty((0, len(_COLUMNS[_split_name(name)[0]])))
+        first_ts, ts, data = self._read(symbol, interval, name)
+        kind, _ = _split_name(name)
+
+        # 캔들이 더 과거부터 저장되었으면(긴 period 조회) 처음부터 다시 계산
+        state = None
+        if ts is not None and len(ts) >= 2 and first_ts == first_candle_ts:
+            state = data[-2]
+            if kind not in ('sma', 'bb') and np.isnan(state).any():
+                # 아직 워밍업 구간이면 이어서 계산할 재귀 상태가 없음
+                state = None
+
+        if state is None:
+            ts, closes = self.candle_store.read_closes(symbol, interval)
+            data = compute(name, closes)
+            self._write(symbol, interval, name, ts, data)
+            self.full_computes += 1
+            self.rows_computed += len(ts)
+            return ts, data
+
+        skip = lookback(name)
+        new_ts, closes = self.candle_store.read_closes(symbol, interval, start_ts=int(ts[-1]), lookback=skip)
+        new_ts = new_ts[skip:]
+        new_data = compute(name, closes, state)
+        if len(new_ts) == 1 and new_ts[0] == ts[-1] and np.array_equal(new_data, data[-1:], equal_nan=True):
+            # 새 봉도 없고 마지막 봉 값도 그대로면 저장 생략
+            self.unchanged += 1
+            return ts, data
+        ts = np.concatenate([ts[:-1], new_ts])
+        data = np.concatenate([data[:-1], new_data])
+        self._write(symbol, interval, name, ts, data)
+        self.incremental_computes += 1
+        self.rows_computed += len(new_ts)
+        return ts, data
+
+    def load(self, symbol, interval, names, index):
+        """index(봉 시각)에 맞춘 지표 값 조회 -> {이름: 출력 컬럼 배열} (저장소 갱신 포함)"""
+        timestamps = pd.DatetimeIndex(index).as_unit('ns').asi8 // 10**9
+        candle_bounds = self.candle_store.candle_bounds(symbol, interval)
+        result = {}
+        for name in names:
+            ts, data = self.update(symbol, interval, name, candle_bounds)
+            width = len(output_columns(name))
+            if len(ts) >= len(timestamps) and np.array_equal(ts[len(ts) - len(timestamps):], timestamps):
+                # 요청 구간이 저장된 시계열의 끝부분이면 그대로 잘라서 사용
+                result[name] = data[len(ts) - len(timestamps):, :width]
+                continue
+            values = np.full((len(timestamps), width), np.nan)
+            if len(ts):
+                positions = np.minimum(np.searchsorted(ts, timestamps), len(ts) - 1)
+                found = ts[positions] == timestamps
+                values[found] = data[positions[found], :values.shape[1]]
+            result[name] = values
+        return result
+
+    def get_stats(self):
+        """지표 저장소 통계"""
+        with self._lock:
+            series_count = self._conn.execute('SELECT COUNT(*) FROM indicator_series').fetchone()[0]
+        return {
+            'series': series_count,
+            'full_computes': self.full_computes,
+            'incremental_computes': self.incremental_computes,
+            'unchanged': self.unchanged,
+            'rows_computed': self.rows_computed,
+        }
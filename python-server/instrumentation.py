@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+# 로깅 / 지표 / 트레이싱
+# - get_logger(name): 레벨이 있는 표준 logging (STOCK_LOG_LEVEL, 기본 INFO / STOCK_LOG_FORMAT=text|json)
+#   요청 경로의 상세 로그는 debug 레벨이라 기본 설정에서는 문자열 포맷팅 비용도 들지 않음
+# - Counter / Histogram / Gauge: 프로세스 내 집계, render_metrics() 로 Prometheus 텍스트 형식 출력
+#   (gunicorn 워커마다 따로 집계되므로 수집기는 워커별 값을 합산해야 함)
+# - stage(name): 단계별 소요 시간을 stock_api_stage_duration_seconds{stage=...} 에 기록하고
+#   같은 스레드에서 진행 중인 요청의 Server-Timing 목록에도 추가
+# - STOCK_OTEL_ENABLED=true 이고 opentelemetry-api 가 설치되어 있으면 요청/단계마다 span 생성
+#   (내보내기 설정은 OpenTelemetry SDK / opentelemetry-instrument 환경변수를 따름)
+
+LOG_LEVEL = os.getenv('STOCK_LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('STOCK_LOG_FORMAT', 'text').lower()
+
+# 응답 시간 버킷 (초) - 캐시 히트(수 ms)부터 업스트림 재시도(수 초)까지
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_STANDARD_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class _JsonFormatter(logging.Formatter):
+    """로그 한 줄을 JSON 객체로 출력 (extra 로 넘긴 필드 포함)"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_root_logger = logging.getLogger('stock')
+if not _root_logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(_JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(
+        '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+    ))
+    _root_logger.addHandler(_handler)
+    _root_logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    # gunicorn 등의 루트 로거 설정과 중복 출력하지 않음
+    _root_logger.propagate = False
+
+
+def get_logger(name):
+    """모듈별 로거 (stock.<name>)"""
+    return _root_logger.getChild(name)
+
+
+log = get_logger('instrumentation')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+class Counter:
+    """단조 증가 카운터 (label 값은 위치 인자로 전달)"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items)
+        return lines
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (관측값마다 bisect 한 번 + 잠금 한 번)"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label 값 -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            total = 0
+            for le, count in zip(self.buckets, series):
+                total += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {total}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """수집 시점에 fn() 을 호출해 값을 읽는 게이지 (fn 은 숫자 또는 {label 값 튜플: 숫자} 반환)"""
+
+    def __init__(self, name, help_text, fn, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        _register(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.fn()
+        except Exception as e:
+            log.warning("Gauge %s failed: %s", self.name, e)
+            return lines
+        if values is None:
+            return lines
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines.extend(
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items()) if value is not None
+        )
+        return lines
+
+
+def render_metrics():
+    """등록된 모든 지표를 Prometheus 텍스트 형식(0.0.4)으로 출력"""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REQUESTS = Counter('stock_api_requests_total', 'HTTP requests by route and status', ('route', 'status'))
+REQUEST_SECONDS = Histogram('stock_api_request_duration_seconds', 'HTTP request latency by route', ('route',))
+STAGE_SECONDS = Histogram('stock_api_stage_duration_seconds', 'Time spent per request stage', ('stage',))
+CACHE_LOOKUPS = Counter('stock_api_cache_lookups_total', 'Response cache lookups by result', ('result',))
+UPSTREAM_ATTEMPTS = Counter('stock_api_upstream_attempts_total', 'Upstream history fetch attempts by outcome', ('outcome',))
+SYMBOL_PROBES = Counter('stock_api_symbol_probes_total', 'Concurrent .KS/.KQ probes by resolved suffix', ('result',))
+
+
+# OpenTelemetry (선택) - 설치되어 있지 않으면 span 없이 지표만 기록
+_tracer = None
+if os.getenv('STOCK_OTEL_ENABLED', 'false').lower() == 'true':
+    try:
+        from opentelemetry import trace
+
+        _tracer = trace.get_tracer('vibe-fs.stock-api')
+    except ImportError:
+        log.warning("opentelemetry-api is not installed, tracing disabled")
+
+
+def tracing_enabled():
+    return _tracer is not None
+
+
+_local = threading.local()
+
+
+class stage:
+    """단계 소요 시간 기록 (히스토그램 + 현재 요청의 Server-Timing + OpenTelemetry span)
+
+    with stage('history_fetch'): ...  (제너레이터 기반 contextmanager 보다 호출 비용이 작은 클래스 구현)
+    """
+
+    __slots__ = ('name', 'attributes', 'started', 'span')
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self):
+        if _tracer is not None:
+            self.span = _tracer.start_as_current_span(f"stock.{self.name}", attributes=self.attributes or None)
+            self.span.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        STAGE_SECONDS.observe(elapsed, self.name)
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+            self.span = None
+        return False
+
+
+class RequestTimer:
+    """요청 한 건의 전체 소요 시간과 단계별 시간 (같은 스레드에서 실행된 stage 만 포함)"""
+
+    def __init__(self, route, **attributes):
+        self.route = route
+        self.started = time.perf_counter()
+        _local.timings = []
+        self._span = None
+        if _tracer is not None:
+            self._span = _tracer.start_as_current_span(f"stock.request {route}", attributes=attributes or None)
+            self._span.__enter__()
+
+    def finish(self, status):
+        """요청 종료 기록 후 Server-Timing 헤더 값 반환"""
+        elapsed = time.perf_counter() - self.started
+        REQUESTS.inc(self.route, str(status))
+        REQUEST_SECONDS.observe(elapsed, self.route)
+        timings = getattr(_local, 'timings', None) or []
+        _local.timings = None
+        if self._span is not None:
+            self._span.__exit__(None, None, None)
+            self._span = None
+        return server_timing(timings, elapsed)
+
+
+def server_timing(timings, total=None):
+    """[(단계, 초)] -> Server-Timing 헤더 값 (같은 단계는 합산, ms 단위)"""
+    merged = {}
+    for name, seconds in timings:
+        merged[name] = merged.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in merged.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(parts)
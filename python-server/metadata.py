@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from instrumentation import get_logger, stage
+from upstream_scheduler import UpstreamBusy
+
+# 종목 메타데이터(회사명, 통화, 시장, 시간대) 캐시
+# - ticker.info 는 느리고 거의 바뀌지 않으므로 가격 데이터와 분리해 긴 TTL(기본 1일)로 캐시
+# - 캐시에 없으면 history 조회와 동시에 백그라운드로 가져옴
+
+log = get_logger('metadata')
+
+DEFAULT_METADATA = {
+    'company_name': '알 수 없음',
+    'currency': 'KRW',
+    'market': 'KRX',
+    'timezone': 'Asia/Seoul',
+}
+
+
+def extract_metadata(info):
+    """ticker.info 에서 응답에 필요한 필드만 추출"""
+    return {
+        'company_name': info.get('longName') or info.get('shortName') or info.get('symbol', '알 수 없음'),
+        'currency': info.get('currency', 'KRW'),
+        'market': info.get('market', 'KRX'),
+        'timezone': info.get('timeZoneFullName', 'Asia/Seoul'),
+    }
+
+
+def fetch_metadata(ticker):
+    """ticker.info 조회 후 메타데이터 추출 (실패 시 None, 호출 한도 초과는 UpstreamBusy 그대로 전달)"""
+    try:
+        # 기본 info 속성 사용 (가장 안정적)
+        with stage('info_fetch'):
+            metadata = extract_metadata(ticker.info)
+        log.debug("Company info: %s (%s, %s)", metadata['company_name'], metadata['market'], metadata['currency'])
+        return metadata
+    except UpstreamBusy:
+        # 기본값으로 대신하면 '알 수 없음' 이 응답 캐시에 남으므로 호출한 쪽에서 처리
+        raise
+    except Exception as e:
+        log.warning("Failed to get company info: %s", e)
+        return None
+
+
+class MetadataCache:
+    def __init__(self, ttl_hours=24, path=None, max_workers=4):
+        self.ttl_seconds = ttl_hours * 3600
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stock-info')
+        self.hits = 0
+        self.misses = 0
+        self.fetch_failures = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS symbol_metadata ('
+                ' symbol TEXT PRIMARY KEY, metadata TEXT NOT NULL, fetched_at REAL NOT NULL)'
+            )
+            for symbol, metadata, fetched_at in self._conn.execute(
+                'SELECT symbol, metadata, fetched_at FROM symbol_metadata'
+            ):
+                self._entries[symbol] = (json.loads(metadata), fetched_at)
+
+    def get(self, symbol):
+        """TTL 이내의 캐시된 메타데이터 조회 (없으면 None)"""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None and time.time() - entry[1] < self.ttl_seconds:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def set(self, symbol, metadata):
+        """메타데이터 저장"""
+        now = time.time()
+        with self._lock:
+            self._entries[symbol] = (metadata, now)
+            if self._conn is not None:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO symbol_metadata VALUES (?, ?, ?)',
+                    (symbol, json.dumps(metadata, ensure_ascii=False), now),
+                )
+
+    def _fetch_and_store(self, symbol, ticker):
+        metadata = fetch_metadata(ticker)
+        if metadata is None:
+            with self._lock:
+                self.fetch_failures += 1
+            return dict(DEFAULT_METADATA)
+        self.set(symbol, metadata)
+        return metadata
+
+    def load(self, symbol, ticker):
+        """캐시 조회, 없으면 ticker.info 로 가져와 저장 (실패 시 기본값, 저장하지 않음)"""
+        metadata = self.get(symbol)
+        if metadata is not None:
+            return metadata
+        return self._fetch_and_store(symbol, ticker)
+
+    def load_async(self, symbol, ticker):
+        """load() 를 백그라운드에서 실행하는 Future 반환 (캐시에 있으면 완료된 Future)"""
+        metadata = self.get(symbol)
+        if metadata is not None:
+            future = Future()
+            future.set_result(metadata)
+            return future
+        return self._executor.submit(self._fetch_and_store, symbol, ticker)
+
+    def get_stats(self):
+        """메타데이터 캐시 통계 조회"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'ttl_hours': round(self.ttl_seconds / 3600, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'fetch_failures': self.fetch_failures,
+            }
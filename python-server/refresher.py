@@ -0,0 +1,139 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import get_logger
+
+# 백그라운드 캐시 갱신기
+# - stale 응답을 돌려준 키를 백그라운드에서 다시 가져옴 (stale-while-revalidate)
+# - 설정된 프리페치 목록 + 최근 접근 빈도 상위 키를 TTL 만료 전에 미리 갱신
+# - 접근 기록은 최근 접근 순 max_tracked_keys 개까지만 유지 (종목코드는 사용자 입력이므로)
+
+log = get_logger('refresher')
+
+
+class BackgroundRefresher:
+    def __init__(self, refresh_fn, ttl_remaining_fn, prefetch_keys=(), top_n=20,
+                 refresh_ahead_seconds=120, scan_interval_seconds=60, max_workers=4, max_tracked_keys=1000):
+        self.refresh_fn = refresh_fn
+        self.ttl_remaining_fn = ttl_remaining_fn
+        self.prefetch_keys = list(prefetch_keys)
+        self.top_n = top_n
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.scan_interval_seconds = scan_interval_seconds
+        self.max_workers = max_workers
+        self.max_tracked_keys = max(1, max_tracked_keys)
+
+        self._access_counts = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.scheduled = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.prefetch_scans = 0
+        self.last_error = None
+
+    def start(self):
+        """갱신 워커와 프리페치 스캔 스레드 시작 (여러 번 호출해도 한 번만 시작)"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='stock-refresh')
+            if self.scan_interval_seconds > 0:
+                self._thread = threading.Thread(target=self._run, name='stock-prefetch', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """스캔 중지 및 워커 종료"""
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def record_access(self, key):
+        """응답한(캐시 항목이 있는) (종목, 기간, 간격) 키의 접근 횟수 기록"""
+        with self._lock:
+            self._access_counts[key] = self._access_counts.get(key, 0) + 1
+            self._access_counts.move_to_end(key)
+            # 가장 오래 접근하지 않은 키부터 제거
+            while len(self._access_counts) > self.max_tracked_keys:
+                self._access_counts.popitem(last=False)
+
+    def schedule(self, key):
+        """키 갱신을 백그라운드 워커에 예약 (이미 예약된 키는 무시)"""
+        self.start()
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self.scheduled += 1
+        self._executor.submit(self._refresh, key)
+        return True
+
+    def _refresh(self, key):
+        try:
+            self.refresh_fn(*key)
+            with self._lock:
+                self.succeeded += 1
+        except Exception as e:
+            log.warning("Background refresh failed for %s: %s", key, e)
+            with self._lock:
+                self.failed += 1
+                self.last_error = str(e)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def hot_keys(self):
+        """프리페치 대상 키 목록 (설정 목록 + 접근 빈도 상위 N개)"""
+        with self._lock:
+            ranked = sorted(self._access_counts.items(), key=lambda item: item[1], reverse=True)
+        keys = list(self.prefetch_keys)
+        for key, _ in ranked[:self.top_n]:
+            if key not in keys:
+                keys.append(key)
+        return keys
+
+    def scan(self):
+        """만료가 가까운 핫 키를 찾아 갱신 예약, 예약한 개수 반환"""
+        scheduled = 0
+        for key in self.hot_keys():
+            remaining = self.ttl_remaining_fn(*key)
+            if remaining is None or remaining < self.refresh_ahead_seconds:
+                if self.schedule(key):
+                    scheduled += 1
+
+        # 오래된 접근 기록이 계속 상위에 남지 않도록 빈도를 절반으로 감쇠
+        with self._lock:
+            self._access_counts = OrderedDict(
+                (key, count // 2) for key, count in self._access_counts.items() if count > 1
+            )
+            self.prefetch_scans += 1
+        return scheduled
+
+    def _run(self):
+        while not self._stop.wait(self.scan_interval_seconds):
+            try:
+                self.scan()
+            except Exception as e:
+                log.warning("Prefetch scan failed: %s", e)
+
+    def get_stats(self):
+        """백그라운드 갱신 통계 조회"""
+        with self._lock:
+            return {
+                'running': self._executor is not None,
+                'pending': len(self._pending),
+                'scheduled': self.scheduled,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'last_error': self.last_error,
+                'prefetch_scans': self.prefetch_scans,
+                'prefetch_keys': [list(key) for key in self.prefetch_keys],
+                'tracked_keys': len(self._access_counts),
+                'max_tracked_keys': self.max_tracked_keys,
+            }
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# 일봉 기준 시계열에서 주봉/월봉을 만드는 벡터화 리샘플링
+# - 그룹 경계를 numpy 로 계산한 뒤 ufunc.reduceat 으로 OHLCV 를 한 번에 집계
+# - 주봉은 월요일, 월봉은 1일 (거래소 현지 시각 자정) 라벨 - yfinance 1wk/1mo 와 같은 규칙
+
+RESAMPLE_INTERVALS = ('1wk', '1mo')
+
+# 1970-01-01 은 목요일 (월요일 = 0 기준 weekday 3)
+_EPOCH_WEEKDAY = 3
+
+
+def _group_starts(index, interval):
+    """각 행이 속한 주/월의 시작일(현지 날짜, datetime64[D]) 계산"""
+    local = index.tz_localize(None) if index.tz is not None else index
+    days = local.values.astype('datetime64[D]')
+    if interval == '1wk':
+        day_numbers = days.astype(np.int64)
+        return (day_numbers - (day_numbers + _EPOCH_WEEKDAY) % 7).astype('datetime64[D]')
+    if interval == '1mo':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"Unsupported resample interval: {interval}")
+
+
+def resample_ohlcv(hist, interval):
+    """일봉 history DataFrame 을 주봉(1wk)/월봉(1mo) 으로 집계
+
+    Open=첫 값, High=최대, Low=최소, Close/Adj Close=마지막 값, Volume=합계
+    """
+    if hist is None or hist.empty:
+        return hist
+
+    index = pd.DatetimeIndex(hist.index)
+    keys = _group_starts(index, interval)
+    # 정렬된 입력에서 그룹이 바뀌는 위치
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    def values(name):
+        return hist[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    data = {
+        'Open': values('Open')[starts],
+        'High': np.fmax.reduceat(values('High'), starts),
+        'Low': np.fmin.reduceat(values('Low'), starts),
+        'Close': values('Close')[ends],
+    }
+    if 'Adj Close' in hist.columns:
+        data['Adj Close'] = values('Adj Close')[ends]
+    data['Volume'] = np.add.reduceat(np.nan_to_num(values('Volume')), starts)
+
+    labels = pd.DatetimeIndex(keys[starts]).as_unit('ns')
+    if index.tz is not None:
+        labels = labels.tz_localize(index.tz)
+    labels.name = index.name or 'Date'
+
+    columns = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+    result = pd.DataFrame(data, index=labels)
+    return result[[name for name in columns if name in result.columns]]
@@ -0,0 +1,84 @@
+import hashlib
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 미리 인코딩된 응답 본문(bytes) 구성
+# - orjson 이 설치되어 있으면 사용하고, 없으면 표준 json (공백 없는 구분자)
+# - 캐시에는 cache_info 를 제외한 본문 앞부분을 bytes 로 저장하고, 조회 시 stale 정보만 덧붙여 전송
+# - 저장 시 본문 버전(ETag)과 생성 시각을 헤더 한 줄로 함께 저장해 조건부 요청에 사용
+
+RESPONSE_FORMATS = ('candles', 'columnar')
+
+
+def dumps(obj):
+    """객체를 UTF-8 JSON bytes 로 인코딩"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def encoder_name():
+    return 'orjson' if orjson is not None else 'json'
+
+
+def encode_payload(response_data):
+    """cache_info 를 제외한 응답 본문 인코딩 - 닫는 괄호 두 개(data, 최상위) 없이 반환"""
+    data = dict(response_data['data'])
+    data.pop('cache_info', None)
+    # 'data' 가 최상위 객체의 마지막 키이므로 본문은 항상 b'}}' 로 끝남
+    return dumps({**response_data, 'data': data})[:-2]
+
+
+def with_cache_info(payload, cache_info):
+    """인코딩된 본문에 cache_info 를 붙여 완성된 응답 본문 생성"""
+    return payload + b',"cache_info":' + dumps(cache_info) + b'}}'
+
+
+def cached_body_prefix(payload, timestamp):
+    """캐시에 저장할 본문 앞부분 (stale 필드만 조회 시 덧붙임)"""
+    return payload + b',"cache_info":{"from_cache":true,"timestamp":' + dumps(timestamp)
+
+
+def finish_cached_body(prefix, stale_seconds):
+    """캐시된 본문 앞부분에 stale 정보를 붙여 응답 본문 완성"""
+    stale = b'true' if stale_seconds > 0 else b'false'
+    return prefix + b',"stale":' + stale + b',"stale_seconds":' + dumps(round(stale_seconds, 1)) + b'}}}'
+
+
+def raw_object(items):
+    """(키, 인코딩된 값 bytes) 목록으로 JSON 객체 bytes 구성"""
+    return b'{' + b','.join(dumps(key) + b':' + value for key, value in items) + b'}'
+
+
+def body_version(payload, timestamp):
+    """본문 버전(ETag 값) - 생성 시각(timestamp) 필드를 제외한 내용 해시
+
+    갱신해도 캔들/메타데이터가 같으면 같은 버전이 되어 클라이언트는 304 를 받습니다.
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    view = memoryview(payload)
+    marker = dumps(timestamp)
+    index = payload.find(marker)
+    if index < 0:
+        digest.update(view)
+    else:
+        digest.update(view[:index])
+        digest.update(view[index + len(marker):])
+    return digest.hexdigest()
+
+
+def pack_cached_body(prefix, version, created_at):
+    """캐시에 저장할 bytes 구성 ('버전 헤더\\n본문 앞부분')"""
+    header = dumps({'version': version, 'created_at': created_at})
+    return header + b'\n' + prefix
+
+
+def unpack_cached_body(raw):
+    """pack_cached_body 로 저장한 bytes 를 (버전, 생성 시각, 본문 앞부분) 으로 분리"""
+    header, _, prefix = raw.partition(b'\n')
+    meta = json.loads(header)
+    return meta['version'], meta['created_at'], prefix
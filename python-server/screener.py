@@ -0,0 +1,465 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from corp_codes import listed_stock_codes, load_companies
+from instrumentation import get_logger
+from symbol_resolver import KRX_SUFFIXES
+
+# 상장 종목 전체 스크리너
+# - companies 테이블(corp_codes.load_companies)의 상장 종목을 batch_size 개씩 나눠 일괄 조회(yf.download)하고
+#   배치 max_workers 개를 동시에 실행, refresh_interval_seconds 마다 반복
+# - 종목별 최신 지표(종가, 등락률, 거래량, 거래대금, 52주 고가/저가와 현재 위치)를 종목코드 순 numpy 배열 하나씩으로 보관
+#   (종목별 딕셔너리 없음, 2,500 종목 x 지표 10개 = 수백 KB)
+# - 조회는 배열 마스크(필터) + argsort/argpartition(정렬)로 처리하고 결과 행만 딕셔너리로 변환
+# - 갱신은 새 테이블을 만든 뒤 통째로 교체 - 진행 중인 조회는 이전 테이블로 계속
+# - 조회에 실패한 배치의 종목은 이전 테이블 값을 유지 (date 로 확인 가능)
+# - store(ScreenerStore)가 있으면 갱신은 잠금을 잡은 워커 하나만 하고 테이블을 게시, 나머지 워커는 게시된 테이블을 읽음
+
+log = get_logger('screener')
+
+MARKETS = ('KOSPI', 'KOSDAQ')
+_MARKET_BY_SUFFIX = {suffix: i for i, suffix in enumerate(KRX_SUFFIXES)}
+
+# 필터/정렬 가능한 숫자 지표 (배열 이름 = 응답 키)
+FIELDS = (
+    'close', 'prev_close', 'change', 'change_pct', 'volume', 'trade_value',
+    'high_52w', 'low_52w', 'position_52w',
+)
+TRADING_DAYS_52W = 252
+
+# 응답 값 소수점 자릿수 (기본 2자리, None 은 정수)
+_DECIMALS = {'position_52w': 4, 'volume': None, 'trade_value': None}
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _fields(data, field, symbols):
+    """yf.download(group_by='ticker') 결과에서 한 컬럼을 (날짜 x 심볼) 배열로 추출 (없는 심볼은 NaN)"""
+    if isinstance(data.columns, pd.MultiIndex):
+        frame = data.xs(field, axis=1, level=1)
+    else:
+        # 한 종목만 요청하면 (심볼, 컬럼) 이 아니라 컬럼만 있는 형태
+        frame = data[[field]].set_axis(symbols[:1], axis=1)
+    return frame.reindex(columns=symbols).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _day_numbers(index):
+    """DatetimeIndex -> 거래소 현지 날짜의 1970-01-01 기준 일수"""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+def batch_metrics(data, symbols):
+    """일괄 조회 결과에서 심볼별 지표 배열 계산 (심볼 순서, 데이터가 없는 심볼은 has_rows=False)
+
+    {'has_rows', 'day', FIELDS...} 딕셔너리 반환 - 값은 모두 길이 len(symbols) 배열
+    """
+    count = len(symbols)
+    if data is None or data.empty:
+        metrics = {field: np.full(count, np.nan) for field in FIELDS}
+        metrics['has_rows'] = np.zeros(count, dtype=bool)
+        metrics['day'] = np.zeros(count, dtype=np.int32)
+        return metrics
+
+    data = data.iloc[-TRADING_DAYS_52W:]
+    close = _fields(data, 'Close', symbols)
+    high = _fields(data, 'High', symbols)
+    low = _fields(data, 'Low', symbols)
+    volume = _fields(data, 'Volume', symbols)
+    columns = np.arange(count)
+
+    # 종목마다 마지막/그 직전 유효 종가 위치 (여러 종목의 날짜를 합친 인덱스라 종목별로 다름)
+    valid = ~np.isnan(close)
+    has_rows = valid.any(axis=0)
+    rows = len(close)
+    last = rows - 1 - np.argmax(valid[::-1], axis=0)
+    valid[last, columns] = False
+    has_prev = valid.any(axis=0)
+    prev = rows - 1 - np.argmax(valid[::-1], axis=0)
+
+    last_close = np.where(has_rows, close[last, columns], np.nan)
+    prev_close = np.where(has_prev, close[prev, columns], np.nan)
+    last_volume = np.where(has_rows, np.nan_to_num(volume[last, columns]), np.nan)
+    # 모두 NaN 인 열에서 nanmax 경고가 나지 않도록 NaN 을 ∓inf 로 바꿔 계산
+    high_52w = np.where(np.isnan(high), -np.inf, high).max(axis=0)
+    low_52w = np.where(np.isnan(low), np.inf, low).min(axis=0)
+    high_52w[~np.isfinite(high_52w)] = np.nan
+    low_52w[~np.isfinite(low_52w)] = np.nan
+    # 고가/저가가 비어 있는 봉도 있으므로 종가가 범위를 벗어나면 범위를 넓힘
+    high_52w = np.fmax(high_52w, last_close)
+    low_52w = np.fmin(low_52w, last_close)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = last_close - prev_close
+        change_pct = np.where(prev_close > 0, change / prev_close * 100, np.nan)
+        span = high_52w - low_52w
+        position_52w = np.where(span > 0, (last_close - low_52w) / span, np.nan)
+
+    return {
+        'has_rows': has_rows,
+        'day': np.where(has_rows, _day_numbers(data.index)[last], 0).astype(np.int32),
+        'close': last_close,
+        'prev_close': prev_close,
+        'change': change,
+        'change_pct': change_pct,
+        'volume': last_volume,
+        'trade_value': last_close * last_volume,
+        'high_52w': high_52w,
+        'low_52w': low_52w,
+        'position_52w': position_52w,
+    }
+
+
+class ScreenerTable:
+    """종목코드 순으로 정렬된 지표 배열 묶음 (만든 뒤에는 바꾸지 않음)"""
+
+    def __init__(self, codes, names, markets, days, columns, built_at=None):
+        order = np.argsort(codes, kind='stable')
+        self.codes = np.asarray(codes, dtype='<U6')[order]
+        self.names = np.asarray(names, dtype=object)[order]
+        self.markets = np.asarray(markets, dtype=np.int8)[order]
+        self.days = np.asarray(days, dtype=np.int32)[order]
+        self.columns = {field: np.asarray(columns[field], dtype=np.float64)[order] for field in FIELDS}
+        self.built_at = built_at or time.time()
+        self.version = f"{int(self.built_at * 1000):x}-{len(self.codes)}"
+
+    def __len__(self):
+        return len(self.codes)
+
+    def positions(self, codes):
+        """종목코드 배열의 행 위치 (없는 코드는 -1)"""
+        codes = np.asarray(codes, dtype='<U6')
+        if not len(self.codes):
+            return np.full(len(codes), -1)
+        index = np.searchsorted(self.codes, codes)
+        index[index >= len(self.codes)] = 0
+        return np.where(self.codes[index] == codes, index, -1)
+
+    def nbytes(self):
+        arrays = [self.codes, self.markets, self.days, *self.columns.values()]
+        return sum(array.nbytes for array in arrays)
+
+    def query(self, sort='change_pct', descending=True, limit=50, offset=0, market=None, filters=None, codes=None):
+        """필터/정렬 조회 - (조건에 맞는 종목 수, 결과 행 위치 배열)
+
+        filters: {지표: (최소, 최대)} (None 은 제한 없음), market: 'KOSPI' / 'KOSDAQ', codes: 종목코드 목록
+        정렬 값이 NaN 인 종목은 방향과 관계없이 맨 뒤
+        """
+        mask = np.ones(len(self.codes), dtype=bool)
+        if market is not None:
+            mask &= self.markets == MARKETS.index(market)
+        if codes is not None:
+            rows = self.positions(codes)
+            selected = np.zeros(len(self.codes), dtype=bool)
+            selected[rows[rows >= 0]] = True
+            mask &= selected
+        for field, (minimum, maximum) in (filters or {}).items():
+            values = self.columns[field]
+            # NaN 비교는 항상 False 이므로 값이 없는 종목은 범위 조건에서 빠짐
+            if minimum is not None:
+                mask &= values >= minimum
+            if maximum is not None:
+                mask &= values <= maximum
+
+        candidates = np.flatnonzero(mask)
+        keys = self.columns[sort][candidates]
+        if descending:
+            keys = -keys
+        end = offset + limit
+        if end < len(candidates):
+            # 앞쪽 end 개만 골라 정렬 (전체 정렬 대신 O(n) 선택)
+            head = np.argpartition(keys, end)[:end]
+            head = head[np.argsort(keys[head], kind='stable')]
+        else:
+            head = np.argsort(keys, kind='stable')
+        return len(candidates), candidates[head[offset:end]]
+
+    def rows(self, positions):
+        """행 위치 -> 응답용 딕셔너리 목록 (NaN 은 None)"""
+        columns = {}
+        for field, values in self.columns.items():
+            selected = values[positions]
+            missing = np.isnan(selected).tolist()
+            # 반올림/정수 변환은 배열 단위로 (값마다 round() 를 부르면 결과 행 수 x 지표 수만큼 호출)
+            decimals = _DECIMALS.get(field, 2)
+            if decimals is None:
+                selected = np.nan_to_num(selected).astype(np.int64)
+            else:
+                selected = np.round(selected, decimals)
+            columns[field] = [None if nan else value for value, nan in zip(selected.tolist(), missing)]
+        days = self.days[positions].tolist()
+        # 대부분 같은 거래일이므로 날짜 문자열은 날짜별로 한 번만 만듦
+        dates = {day: (_EPOCH + timedelta(days=day)).isoformat() for day in set(days)}
+        return [
+            {
+                'stock_code': code,
+                'company_name': name,
+                'market': MARKETS[market],
+                'date': dates[day],
+                **{field: columns[field][i] for field in FIELDS},
+            }
+            for i, (code, name, market, day) in enumerate(zip(
+                self.codes[positions].tolist(), self.names[positions].tolist(),
+                self.markets[positions].tolist(), days,
+            ))
+        ]
+
+
+class Screener:
+    """상장 종목 전체를 주기적으로 일괄 조회해 ScreenerTable 을 갱신하는 서비스
+
+    download_fn(symbols) 는 yf.download(..., period='1y', interval='1d', group_by='ticker') 형태의
+    DataFrame 을 반환해야 합니다 (업스트림 호출 제한/우선순위는 호출하는 쪽에서 적용).
+    store 가 있으면 sync_interval_seconds 마다 갱신 담당 여부와 게시된 테이블을 확인합니다.
+    """
+
+    def __init__(self, download_fn, resolver, loader=load_companies, batch_size=100, max_workers=4,
+                 refresh_interval_seconds=900, store=None, sync_interval_seconds=30):
+        self.download_fn = download_fn
+        self.store = store
+        self.sync_interval_seconds = sync_interval_seconds
+        self.resolver = resolver
+        self.loader = loader
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._table = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.refreshes = 0
+        self.syncs = 0
+        self.failed_batches = 0
+        self.last_refresh_seconds = None
+        self.last_error = None
+
+    @property
+    def table(self):
+        """현재 테이블 (아직 한 번도 갱신하지 않았으면 None)"""
+        return self._table
+
+    @property
+    def refreshing(self):
+        return self._refreshing.locked()
+
+    @property
+    def role(self):
+        """갱신 담당이면 leader, 게시된 테이블만 읽으면 follower, 공유 저장소가 없으면 local"""
+        if self.store is None:
+            return 'local'
+        return 'leader' if self.store.leader else 'follower'
+
+    def _fetch_batch(self, codes):
+        """종목코드 한 배치 조회 - (코드, 시장, 지표) 반환, 업스트림 오류면 예외"""
+        symbols = [self.resolver.resolve(code) for code in codes]
+        metrics = batch_metrics(self.download_fn(symbols), symbols)
+
+        # 접미사를 모르는 종목 중 .KS 에서 데이터가 없던 종목은 .KQ (코스닥)으로 한 번에 재시도
+        retry = [
+            i for i, (code, symbol) in enumerate(zip(codes, symbols))
+            if not metrics['has_rows'][i] and symbol.endswith('.KS') and self.resolver.known_suffix(code) is None
+        ]
+        if retry:
+            kosdaq_symbols = [symbols[i].replace('.KS', '.KQ') for i in retry]
+            retried = batch_metrics(self.download_fn(kosdaq_symbols), kosdaq_symbols)
+            found = retried['has_rows']
+            rows = np.asarray(retry)[found]
+            for name, values in retried.items():
+                metrics[name][rows] = values[found]
+            for i, symbol, ok in zip(retry, kosdaq_symbols, found):
+                if ok:
+                    symbols[i] = symbol
+
+        found_symbols = [symbol for symbol, ok in zip(symbols, metrics['has_rows']) if ok]
+        self.resolver.remember_many(found_symbols)
+        markets = [_MARKET_BY_SUFFIX.get(symbol[len(code):], 0) for code, symbol in zip(codes, symbols)]
+        return np.asarray(codes, dtype='<U6'), np.asarray(markets, dtype=np.int8), metrics
+
+    def refresh(self):
+        """상장 종목 전체 갱신 후 테이블 교체, 종목 수 반환 (이미 갱신 중이면 기다렸다가 그 결과 사용)"""
+        if not self._refreshing.acquire(blocking=False):
+            with self._refreshing:
+                return len(self._table) if self._table is not None else 0
+        try:
+            return self._refresh()
+        finally:
+            self._refreshing.release()
+
+    def _refresh(self):
+        started = time.perf_counter()
+        companies = self.loader()
+        names = {}
+        for company in companies:
+            stock_code = (company.get('stock_code') or '').strip()
+            names.setdefault(stock_code, company.get('corp_name') or '')
+        universe = listed_stock_codes(companies)
+        if not universe:
+            self.last_error = 'Company list is empty'
+            log.warning("Screener refresh skipped: %s", self.last_error)
+            return len(self._table) if self._table is not None else 0
+
+        batches = [universe[i:i + self.batch_size] for i in range(0, len(universe), self.batch_size)]
+        parts = []
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='screener') as executor:
+            futures = [executor.submit(self._fetch_batch, batch) for batch in batches]
+            for batch, future in zip(batches, futures):
+                try:
+                    parts.append(future.result())
+                except Exception as e:
+                    log.warning("Screener batch of %d codes failed: %s", len(batch), e)
+                    self.last_error = str(e)
+                    failed.extend(batch)
+
+        codes = np.concatenate([part[0] for part in parts]) if parts else np.array([], dtype='<U6')
+        markets = np.concatenate([part[1] for part in parts]) if parts else np.array([], dtype=np.int8)
+        metrics = {
+            name: np.concatenate([part[2][name] for part in parts]) if parts else np.array([])
+            for name in ('has_rows', 'day', *FIELDS)
+        }
+        keep = metrics['has_rows'].astype(bool)
+        codes, markets = codes[keep], markets[keep]
+        days = metrics['day'][keep]
+        columns = {field: metrics[field][keep] for field in FIELDS}
+
+        # 실패한 배치의 종목은 이전 테이블 값 유지
+        previous = self._table
+        if failed and previous is not None and len(previous):
+            rows = previous.positions(failed)
+            rows = rows[rows >= 0]
+            codes = np.concatenate([codes, previous.codes[rows]])
+            markets = np.concatenate([markets, previous.markets[rows]])
+            days = np.concatenate([days, previous.days[rows]])
+            columns = {field: np.concatenate([columns[field], previous.columns[field][rows]]) for field in FIELDS}
+
+        if not len(codes) and previous is not None and len(previous):
+            self.last_error = self.last_error or 'No data returned'
+            log.warning("Screener refresh returned no rows, keeping previous table")
+            return len(previous)
+
+        table = ScreenerTable(codes, [names.get(code, '') for code in codes.tolist()], markets, days, columns)
+        if self.store is not None:
+            try:
+                self.store.publish(table)
+            except sqlite3.Error as e:
+                log.warning("Failed to publish screener table: %s", e)
+        with self._lock:
+            self._table = table
+            self.refreshes += 1
+            self.failed_batches += len(batches) - len(parts)
+            self.last_refresh_seconds = time.perf_counter() - started
+        log.info("Screener refreshed %d of %d listed codes in %.1fs (%d failed batches)",
+                 len(table), len(universe), self.last_refresh_seconds, len(batches) - len(parts))
+        return len(table)
+
+    def sync(self):
+        """게시된 테이블이 현재 테이블보다 새로우면 읽어서 교체, 현재 테이블 반환"""
+        if self.store is None:
+            return self._table
+        try:
+            built_at = self.store.built_at()
+            current = self._table
+            if built_at is not None and (current is None or built_at > current.built_at):
+                table = self.store.load(ScreenerTable)
+                with self._lock:
+                    if table is not None and (self._table is None or table.built_at > self._table.built_at):
+                        self._table = table
+                        self.syncs += 1
+        except sqlite3.Error as e:
+            log.warning("Failed to load screener table: %s", e)
+        return self._table
+
+    def _refresh_due(self):
+        """갱신할 때가 되었는지 (테이블이 없음 / 주기 경과 / 즉시 갱신 요청)"""
+        table = self._table
+        if table is None:
+            return True
+        if self.refresh_interval_seconds > 0 and time.time() >= table.built_at + self.refresh_interval_seconds:
+            return True
+        if self.store is not None:
+            requested_at = self.store.requested_at()
+            return requested_at is not None and requested_at > table.built_at
+        return False
+
+    def _tick(self):
+        """주기 작업 한 번 - 게시된 테이블을 읽고, 갱신 담당이면 때가 됐을 때 갱신"""
+        self.sync()
+        if self.store is not None and not self.store.try_lead():
+            return
+        if self._refresh_due():
+            self.refresh()
+
+    def start(self):
+        """주기적 갱신/동기화 스레드 시작 (첫 확인은 바로 실행, 여러 번 호출해도 한 번만 시작)"""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(target=self._run, name='screener-refresh', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+
+    def request_refresh(self):
+        """즉시 갱신 - 갱신 담당이면 바로 시작, 아니면 담당 워커에 요청, 결과 메시지 반환"""
+        self.start()
+        if self.refreshing:
+            return 'Screener refresh already running'
+        if self.store is not None and not self.store.try_lead():
+            self.store.request_refresh()
+            return 'Screener refresh requested from the refreshing worker'
+        threading.Thread(target=self.refresh, name='screener-refresh-now', daemon=True).start()
+        return 'Screener refresh started'
+
+    def _run(self):
+        while True:
+            try:
+                self._tick()
+            except Exception as e:
+                self.last_error = str(e)
+                log.warning("Screener refresh failed: %s", e)
+            if self.store is not None:
+                wait = self.sync_interval_seconds
+            elif self.refresh_interval_seconds > 0:
+                wait = self.refresh_interval_seconds
+            else:
+                return
+            if self._stop.wait(wait):
+                return
+
+    def next_refresh_in(self):
+        """다음 주기 갱신까지 남은 초 (갱신 전이면 None)"""
+        table = self._table
+        if table is None or self.refresh_interval_seconds <= 0:
+            return None
+        return max(0.0, table.built_at + self.refresh_interval_seconds - time.time())
+
+    def get_stats(self):
+        """스크리너 통계"""
+        table = self._table
+        return {
+            'running': self._thread is not None,
+            'role': self.role,
+            'refreshing': self.refreshing,
+            'rows': len(table) if table is not None else 0,
+            'table_bytes': table.nbytes() if table is not None else 0,
+            'built_at': table.built_at if table is not None else None,
+            'batch_size': self.batch_size,
+            'max_workers': self.max_workers,
+            'refresh_interval_seconds': self.refresh_interval_seconds,
+            'refreshes': self.refreshes,
+            'syncs': self.syncs,
+            'failed_batches': self.failed_batches,
+            'last_refresh_seconds': round(self.last_refresh_seconds, 2) if self.last_refresh_seconds is not None else None,
+            'last_error': self.last_error,
+            'store': self.store.get_stats() if self.store is not None else None,
+        }
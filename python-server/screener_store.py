@@ -0,0 +1,127 @@
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from instrumentation import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows - 워커 간 잠금 없이 항상 갱신 담당
+    fcntl = None
+
+# 스크리너 테이블 공유 저장소 (SQLite, 기본 data/screener.sqlite)
+# - 갱신 담당 워커 하나만 상장 종목 전체를 조회하고 만든 테이블을 여기에 게시, 나머지 워커는 게시된 테이블을 읽어 씀
+# - 갱신 담당은 '<경로>.lock' 파일의 flock 을 잡은 프로세스 - 프로세스가 끝나면 잠금이 풀려 다른 워커가 이어받음
+# - 배열은 np.save 형식(allow_pickle=False)으로 한 BLOB 에, 회사명은 JSON 으로 저장
+# - 파일에 남으므로 재시작한 워커도 첫 갱신을 기다리지 않고 마지막 테이블로 바로 응답
+
+log = get_logger('screener_store')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS screener_table (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    built_at REAL NOT NULL,
+    names TEXT NOT NULL,
+    arrays BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS screener_requests (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    requested_at REAL NOT NULL
+);
+"""
+
+
+class ScreenerStore:
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self.publishes = 0
+        self.loads = 0
+
+    @property
+    def leader(self):
+        return self._lock_file is not None
+
+    def try_lead(self):
+        """갱신 담당 잠금 시도 - 이 프로세스가 담당이면 True (한 번 잡으면 프로세스가 끝날 때까지 유지)"""
+        with self._lock:
+            if self._lock_file is not None:
+                return True
+            lock_file = open(self.lock_path, 'a')
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock_file.close()
+                    return False
+            self._lock_file = lock_file
+            log.info("Screener refresh leader: pid %d", os.getpid())
+            return True
+
+    def release(self):
+        """갱신 담당 잠금 해제"""
+        with self._lock:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def publish(self, table):
+        """테이블 게시 (이전 테이블 교체)"""
+        buffer = io.BytesIO()
+        np.savez(buffer, codes=table.codes, markets=table.markets, days=table.days,
+                 **{f"column_{field}": values for field, values in table.columns.items()})
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO screener_table (id, built_at, names, arrays) VALUES (1, ?, ?, ?)',
+                (table.built_at, json.dumps(table.names.tolist(), ensure_ascii=False), buffer.getvalue()),
+            )
+            self.publishes += 1
+
+    def built_at(self):
+        """게시된 테이블의 생성 시각 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute('SELECT built_at FROM screener_table WHERE id = 1').fetchone()
+        return row[0] if row is not None else None
+
+    def load(self, table_class):
+        """게시된 테이블을 table_class(codes, names, markets, days, columns, built_at) 로 읽음 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute('SELECT built_at, names, arrays FROM screener_table WHERE id = 1').fetchone()
+            if row is None:
+                return None
+            self.loads += 1
+        built_at, names, blob = row
+        with np.load(io.BytesIO(blob), allow_pickle=False) as arrays:
+            columns = {name[len('column_'):]: arrays[name] for name in arrays.files if name.startswith('column_')}
+            return table_class(arrays['codes'], json.loads(names), arrays['markets'], arrays['days'], columns,
+                               built_at=built_at)
+
+    def request_refresh(self):
+        """갱신 담당 워커에 즉시 갱신 요청 (다음 확인 주기에 처리)"""
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO screener_requests (id, requested_at) VALUES (1, ?)', (time.time(),))
+
+    def requested_at(self):
+        """마지막 즉시 갱신 요청 시각 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute('SELECT requested_at FROM screener_requests WHERE id = 1').fetchone()
+        return row[0] if row is not None else None
+
+    def get_stats(self):
+        return {
+            'path': self.path,
+            'leader': self.leader,
+            'publishes': self.publishes,
+            'loads': self.loads,
+        }
@@ -0,0 +1,85 @@
+import threading
+
+# 동일 키에 대한 동시 업스트림 조회를 하나로 합치는 single-flight 도우미
+# 먼저 도착한 요청(leader)만 실제로 함수를 실행하고, 나머지는 그 결과(또는 예외)를 공유합니다.
+# 합류한 요청(joiner)은 자기 timeout 까지만 기다림 - leader 가 더 오래 기다려도 되는 작업(백그라운드 갱신)이어도 묶이지 않음
+
+
+class JoinTimeout(Exception):
+    """진행 중인 호출의 결과를 timeout 안에 받지 못함 (호출 자체는 계속 진행)"""
+
+    def __init__(self, key, waited):
+        super().__init__(f"Gave up waiting {waited:.1f}s for in-flight call {key!r}")
+        self.key = key
+        self.waited = waited
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+        self.join_timeouts = 0
+
+    def do(self, key, fn, timeout=None):
+        """key 로 진행 중인 호출이 있으면 그 결과를 기다리고, 없으면 fn() 실행
+
+        timeout 은 합류한 경우의 최대 대기 시간(초) - 넘으면 JoinTimeout
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self.join_timeouts += 1
+                raise JoinTimeout(key, timeout)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """현재 진행 중인 키 개수"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self):
+        """single-flight 통계 조회"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'shared_results': self.shared,
+                'join_timeouts': self.join_timeouts,
+            }
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+import time
+
+from http_cache import compress
+from instrumentation import get_logger
+from response_body import unpack_cached_body
+
+# 인코딩된 응답 본문 파일 캐시 (서버리스 함수의 쓰기 가능한 /tmp 용)
+# - 항목 하나 = 파일 하나, 내용은 pack_cached_body() 형식 그대로 (버전/생성 시각 헤더 + 본문 앞부분)
+# - 웜 인스턴스의 다음 호출이나 /tmp 가 남아 있는 새 프로세스가 업스트림 조회/변환 없이 응답
+# - 임시 파일에 쓴 뒤 os.replace 로 교체하므로 읽는 쪽은 항상 완전한 파일만 봄
+# - 압축 본문(gzip/br)은 스냅샷 옆에 '<스냅샷>.<버전>.<방식>' 파일로 저장해 스냅샷 버전마다 방식별로 한 번만 압축
+
+log = get_logger('snapshot_store')
+
+
+class SnapshotStore:
+    def __init__(self, directory, ttl_seconds=900, max_entries=256):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.compressed_hits = 0
+        self.compressed_misses = 0
+        self.compressed = _CompressedVariants(self)
+        os.makedirs(directory, exist_ok=True)
+
+    def _name(self, key):
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{self._name(key)}.body")
+
+    def _variant_path(self, key, version, encoding):
+        version = hashlib.blake2b(str(version).encode(), digest_size=8).hexdigest()
+        return os.path.join(self.directory, f"{self._name(key)}.{version}.{encoding}")
+
+    def _write(self, path, body):
+        """임시 파일에 쓴 뒤 교체, 성공 여부 반환"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("Failed to write snapshot: %s", e)
+            return False
+        return True
+
+    def _remove_variants(self, name, keep=None):
+        """스냅샷 하나의 압축 본문 파일 삭제 (keep 경로 제외)"""
+        prefix = f"{name}."
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix) and not entry.name.endswith(('.body', '.tmp')) and entry.path != keep:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def get(self, key):
+        """저장된 본문 조회 - (버전, 생성 시각, 본문 앞부분), 없거나 만료되었으면 None"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                raw = f.read()
+            version, created_at, prefix = unpack_cached_body(raw)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        if time.time() - created_at > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return version, created_at, prefix
+
+    def set(self, key, body):
+        """pack_cached_body() 결과 저장 (실패해도 응답에는 영향 없음)"""
+        if not self._write(self._path(key), body):
+            return
+        # 이전 버전의 압축 본문은 더 이상 쓰이지 않음
+        try:
+            self._remove_variants(self._name(key))
+        except OSError as e:
+            log.warning("Failed to remove compressed snapshots: %s", e)
+        self._prune()
+
+    def _prune(self):
+        # 항목 수가 한도를 넘으면 오래된 파일부터 삭제 (/tmp 용량 제한)
+        with self._lock:
+            try:
+                entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.body')]
+                if len(entries) <= self.max_entries:
+                    return
+                entries.sort(key=lambda entry: entry.stat().st_mtime)
+                for entry in entries[:len(entries) - self.max_entries]:
+                    os.remove(entry.path)
+                    self._remove_variants(entry.name[:-len('.body')])
+            except OSError as e:
+                log.warning("Failed to prune snapshots: %s", e)
+
+    def get_stats(self):
+        return {
+            'directory': self.directory,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'compressed_hits': self.compressed_hits,
+            'compressed_misses': self.compressed_misses,
+        }
+
+
+class _CompressedVariants:
+    """스냅샷 옆 파일에 저장하는 압축 본문 - http_cache.encode_body 의 compressed_cache 로 사용
+
+    캐시 키는 (스냅샷 키, 스냅샷 버전) - 버전이 바뀌면 새로 압축합니다.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, key, encoding, body_fn):
+        """압축된 본문 조회, 없으면 body_fn() 결과를 압축해 저장"""
+        snapshot_key, version = key
+        path = self.store._variant_path(snapshot_key, version, encoding)
+        try:
+            with open(path, 'rb') as f:
+                compressed = f.read()
+            self.store.compressed_hits += 1
+            return compressed
+        except OSError:
+            self.store.compressed_misses += 1
+        compressed = compress(body_fn(), encoding)
+        self.store._write(path, compressed)
+        return compressed
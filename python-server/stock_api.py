@@ -1,93 +1,617 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, redirect, request, jsonify
 from flask_cors import CORS
 import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
 import os
-import hashlib
 import json
+import threading
 import time
 
+from cache import create_stock_cache
+from company_search import CompanySearch
+from corp_codes import listed_stock_codes
+from candle_store import CandleStore, period_start
+from candles import hist_to_candles, hist_to_columns
+from refresher import BackgroundRefresher
+from screener import FIELDS as SCREENER_FIELDS, MARKETS, Screener
+from screener_store import ScreenerStore
+from indicators import IndicatorStore, build_indicators, parse_indicators
+from instrumentation import (
+    METRICS_CONTENT_TYPE, UPSTREAM_ATTEMPTS, Gauge, RequestTimer, get_logger, render_metrics, stage, tracing_enabled,
+)
+from http_cache import CompressedBodyCache, cache_control, encode_body, http_date, is_not_modified, make_etag
+from metadata import DEFAULT_METADATA, MetadataCache
+from response_body import (
+    RESPONSE_FORMATS, body_version, cached_body_prefix, dumps, encode_payload, encoder_name,
+    finish_cached_body, pack_cached_body, raw_object, unpack_cached_body, with_cache_info,
+)
+from singleflight import JoinTimeout, SingleFlight
+from stream import StreamHub
+from symbol_resolver import SymbolResolver, is_krx_code
+from upstream_scheduler import ScheduledTicker, UpstreamBusy, UpstreamScheduler
+from yahoo_chart import AsyncChartClient, ChartTicker
+
 app = Flask(__name__)
-CORS(app)  # CORS 설정
+CORS(app, expose_headers=['ETag', 'Last-Modified', 'Server-Timing'])  # CORS 설정 (조건부 요청/단계별 시간 헤더 노출)
 
-# 간단한 메모리 캐시 클래스
-class SimpleCache:
-    def __init__(self):
-        self.cache = {}
-        self.timestamps = {}
-    
-    def _generate_key(self, stock_code, period, interval):
-        """캐시 키 생성"""
-        key_string = f"{stock_code}_{period}_{interval}"
-        return hashlib.md5(key_string.encode()).hexdigest()
-    
-    def get(self, stock_code, period, interval, max_age_minutes=15):
-        """캐시에서 데이터 조회 (기본 15분 캐시)"""
-        key = self._generate_key(stock_code, period, interval)
-        
-        if key in self.cache and key in self.timestamps:
-            # 캐시 만료 시간 확인
-            cache_time = self.timestamps[key]
-            current_time = time.time()
-            age_minutes = (current_time - cache_time) / 60
-            
-            if age_minutes < max_age_minutes:
-                print(f"Cache HIT for {stock_code} (age: {age_minutes:.1f} minutes)")
-                return self.cache[key]
+log = get_logger('api')
+
+# 전역 캐시 인스턴스 (STOCK_CACHE_BACKEND=redis 이면 워커 프로세스 간 공유)
+stock_cache = create_stock_cache(
+    max_entries=int(os.getenv('STOCK_CACHE_MAX_ENTRIES', 512)),
+    max_bytes=int(os.getenv('STOCK_CACHE_MAX_MB', 256)) * 1024 * 1024,
+    ttl_minutes=float(os.getenv('STOCK_CACHE_TTL_MINUTES', 15)),
+    stale_ttl_minutes=float(os.getenv('STOCK_CACHE_STALE_TTL_MINUTES', 60)),
+)
+
+# 만료된 캐시를 즉시 응답하고 백그라운드에서 갱신할지 여부 (stale-while-revalidate)
+SERVE_STALE = os.getenv('STOCK_SERVE_STALE', 'true').lower() == 'true'
+
+# 일괄 조회 엔드포인트에서 한 번에 요청할 수 있는 최대 종목 수
+BATCH_MAX_CODES = int(os.getenv('STOCK_BATCH_MAX_CODES', 100))
+
+# 영구 캔들 저장소 (SQLite) - 캐시 미스 시 새 봉만 받아 병합
+candle_store = None
+if os.getenv('STOCK_CANDLE_STORE_ENABLED', 'true').lower() == 'true':
+    candle_store = CandleStore(os.getenv(
+        'STOCK_CANDLE_STORE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'candles.sqlite')
+    ))
+
+# 기술적 지표 저장소 - 캔들 저장소 파일에 일봉 지표를 저장하고 새 봉만 이어서 계산
+indicator_store = IndicatorStore(candle_store) if candle_store is not None else None
+
+# 종목별 일봉 기준 시계열 길이 - 이보다 짧은 period 와 주봉/월봉은 업스트림 조회 없이 기준 시계열에서 만듦 (none 이면 사용 안 함)
+BASE_PERIOD = os.getenv('STOCK_BASE_PERIOD', '2y').lower()
+
+# 종목코드 -> .KS/.KQ 접미사 해석기 (확인된 접미사는 파일에 영구 저장)
+symbol_resolver = SymbolResolver(os.getenv(
+    'STOCK_SYMBOL_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'symbols.sqlite')
+))
+
+# 종목 메타데이터(회사명/통화/시장) 캐시 - ticker.info 는 하루 단위로만 다시 조회
+metadata_cache = MetadataCache(
+    ttl_hours=float(os.getenv('STOCK_INFO_TTL_HOURS', 24)),
+    path=os.getenv(
+        'STOCK_INFO_CACHE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'metadata.sqlite')
+    ),
+)
+
+# ticker.info 조회 방식: concurrent(history 와 동시 조회, 기본) / sync(history 이후 조회) / off(캐시에 없으면 기본값)
+INFO_MODE = os.getenv('STOCK_INFO_MODE', 'concurrent').lower()
+
+# 진행 중인 업스트림 조회 (동시 캐시 미스 합치기)
+inflight_fetches = SingleFlight()
+
+# 캐시 항목별 gzip/brotli 압축 결과 (같은 항목은 한 번만 압축)
+compressed_bodies = CompressedBodyCache(max_bytes=int(os.getenv('STOCK_COMPRESSED_CACHE_MB', 64)) * 1024 * 1024)
+
+# 업스트림 조회 방식: yfinance(기본) / async(chart API 를 asyncio + 커넥션 풀로 직접 조회)
+UPSTREAM_MODE = os.getenv('STOCK_UPSTREAM', 'yfinance').lower()
+chart_client = None
+if UPSTREAM_MODE == 'async':
+    try:
+        import aiohttp  # noqa: F401
+        chart_client = AsyncChartClient(
+            base_url=os.getenv('STOCK_CHART_BASE_URL'),
+            request_timeout=float(os.getenv('STOCK_UPSTREAM_TIMEOUT_SECONDS', 5)),
+            total_deadline=float(os.getenv('STOCK_UPSTREAM_DEADLINE_SECONDS', 15)),
+            max_retries=int(os.getenv('STOCK_UPSTREAM_RETRIES', 3)),
+            max_connections=int(os.getenv('STOCK_UPSTREAM_MAX_CONNECTIONS', 32)),
+        )
+    except ImportError:
+        log.warning("aiohttp is not installed, falling back to yfinance upstream")
+        UPSTREAM_MODE = 'yfinance'
+
+# 업스트림 호출 스케줄러 - 모든 Yahoo 호출을 토큰 버킷 + 우선순위 큐로 제한 (STOCK_UPSTREAM_RATE_PER_SECOND=0 이면 제한 없음)
+# 한도는 서버 전체 기준: Redis 캐시를 쓰면 모든 워커가 Redis 버킷 하나를 공유하고, 아니면 워커 수(STOCK_WORKER_PROCESSES,
+# gunicorn.conf.py 가 설정)로 나눠 워커마다 몫만큼 사용
+upstream_scheduler = UpstreamScheduler(
+    rate_per_second=float(os.getenv('STOCK_UPSTREAM_RATE_PER_SECOND', 5)),
+    burst=int(os.getenv('STOCK_UPSTREAM_BURST', 10)),
+    processes=int(os.getenv('STOCK_WORKER_PROCESSES', 1)),
+    redis_client=stock_cache.client if stock_cache.backend == 'redis' else None,
+    max_wait_seconds={
+        'user': float(os.getenv('STOCK_UPSTREAM_MAX_WAIT_SECONDS', 3)),
+        'background': float(os.getenv('STOCK_UPSTREAM_BACKGROUND_MAX_WAIT_SECONDS', 60)),
+    },
+    force_refresh_interval_seconds=float(os.getenv('STOCK_FORCE_REFRESH_MIN_SECONDS', 30)),
+)
+
+# single-flight 에 합류한 요청이 토큰 대기 한도 외에 업스트림 조회 자체를 기다려 주는 시간
+JOIN_FETCH_SECONDS = float(os.getenv('STOCK_UPSTREAM_TIMEOUT_SECONDS', 5))
+
+def make_ticker(symbol, priority=None):
+    """업스트림 방식에 맞는 ticker 생성 (history / info 인터페이스 동일, 호출마다 스케줄러 토큰 사용)
+
+    priority 가 없으면 현재 스레드의 우선순위 - 다른 스레드에서 호출될 ticker 는 제출하는 쪽 우선순위를 넘김
+    """
+    if chart_client is not None:
+        # chart API 의 info 는 history 응답의 meta 로 만들므로 별도 호출이 없음
+        return ScheduledTicker(ChartTicker(chart_client, symbol), upstream_scheduler, schedule_info=False, priority=priority)
+    return ScheduledTicker(yf.Ticker(symbol), upstream_scheduler, priority=priority)
+
+def load_history(ticker, yahoo_symbol, period, interval):
+    """히스토리 조회 (캔들 저장소가 있으면 증분 조회 후 period 만큼 잘라서 반환)"""
+    if candle_store is None:
+        return ticker.history(period=period, interval=interval)
+    if BASE_PERIOD != 'none':
+        # 일봉 기준 시계열 하나에서 짧은 period 는 잘라내고 1wk/1mo 는 리샘플링
+        return candle_store.load_derived_history(ticker, yahoo_symbol, period, interval, BASE_PERIOD)
+    return candle_store.load_history(ticker, yahoo_symbol, period, interval)
+
+def build_response_data(stock_code, yahoo_symbol, metadata, period, interval, hist, fmt='candles', indicator_names=()):
+    """history DataFrame 으로 응답 데이터 구성 (cache_info 는 응답 시 덧붙임)"""
+    # 데이터 변환 (컬럼 단위 벡터 연산)
+    with stage('conversion'):
+        if fmt == 'columnar':
+            # 캔들 객체 배열 대신 time/open/high/low/close/volume/adj_close 병렬 배열
+            candle_data = hist_to_columns(hist)
+            total_count = len(candle_data['time'])
+        else:
+            candle_data = hist_to_candles(hist)
+            total_count = len(candle_data)
+    log.debug("Converted %d data points to %s format", total_count, fmt)
+
+    response_data = {
+        'success': True,
+        'data': {
+            'symbol': yahoo_symbol,
+            'stock_code': stock_code,
+            'company_name': metadata['company_name'],
+            'period': period,
+            'interval': interval,
+            'format': fmt,
+            'candles': candle_data,
+            'total_count': total_count,
+            'server': 'Python Flask (Local Development)',
+            'yfinance_version': '0.2.64',
+            'timestamp': datetime.now().isoformat(),
+            'market_info': {
+                'currency': metadata['currency'],
+                'market': metadata['market'],
+                'timezone': metadata['timezone']
+            }
+        }
+    }
+    if indicator_names:
+        # 캔들과 같은 순서/길이의 지표 배열 (워밍업 구간은 null)
+        with stage('indicators'):
+            response_data['data']['indicators'] = build_indicators(
+                hist, indicator_names, indicator_store, yahoo_symbol, interval
+            )
+    return response_data
+
+def _cache_interval(interval, fmt, indicator_names=()):
+    """응답 형식/지표별로 캐시 키를 나누기 위한 interval 값 (기본 형식은 기존 키 그대로)"""
+    key = interval if fmt == 'candles' else f"{interval}:{fmt}"
+    return f"{key}:{','.join(indicator_names)}" if indicator_names else key
+
+def cache_response(stock_code, period, interval, fmt, response_data, indicator_names=(), store=True):
+    """응답 본문을 한 번만 인코딩해 버전(ETag)과 함께 캐시에 저장 (store=False 면 인코딩만)
+
+    (인코딩된 본문(cache_info 제외), 버전, 생성 시각) 반환
+    """
+    with stage('serialization'):
+        payload = encode_payload(response_data)
+        timestamp = response_data['data']['timestamp']
+        version = body_version(payload, timestamp)
+        created_at = time.time()
+        body = pack_cached_body(cached_body_prefix(payload, timestamp), version, created_at)
+    # 데이터를 캐시에 저장 (만료/용량 초과 항목은 저장 시 함께 정리)
+    if store:
+        stock_cache.set(stock_code, period, _cache_interval(interval, fmt, indicator_names), body)
+    return payload, version, created_at
+
+def fresh_body(payload):
+    """업스트림에서 새로 조회한 본문에 cache_info 를 붙여 완성"""
+    return with_cache_info(payload, {'from_cache': False, 'cached_at': datetime.now().isoformat()})
+
+def cached_ttl_remaining(stock_code, period, interval, fmt='candles', indicator_names=()):
+    return stock_cache.ttl_remaining(stock_code, period, _cache_interval(interval, fmt, indicator_names))
+
+def load_metadata(yahoo_symbol, ticker, metadata_future=None):
+    """종목 메타데이터 조회 (진행 중인 Future 가 있으면 그 결과 사용)
+
+    info 조회가 호출 한도로 포기되었으면 None - 기본값으로 응답하되 응답 캐시에는 저장하지 않음
+    """
+    try:
+        if metadata_future is not None:
+            # history 와 동시에 시작한 info 조회를 기다린 시간
+            with stage('info_wait'):
+                return metadata_future.result()
+        if INFO_MODE == 'off':
+            return metadata_cache.get(yahoo_symbol) or dict(DEFAULT_METADATA)
+        return metadata_cache.load(yahoo_symbol, ticker)
+    except UpstreamBusy as e:
+        log.warning("Company info for %s skipped: %s", yahoo_symbol, e)
+        return None
+
+def fetch_history_with_retry(ticker, yahoo_symbol, period, interval, max_retries=None):
+    """히스토리 데이터 조회 (실패 시 1회 재시도, 데이터가 없으면 빈 DataFrame)"""
+    # 히스토리 데이터 가져오기 (0.2.64 개선된 방법)
+    hist = None
+    if max_retries is None:
+        # async 업스트림은 클라이언트가 타임아웃/지터 백오프 재시도를 처리하므로 한 번만 시도
+        max_retries = 1 if chart_client is not None else 2
+
+    for attempt in range(max_retries):
+        try:
+            log.debug("Attempt %d/%d to fetch data for %s", attempt + 1, max_retries, yahoo_symbol)
+
+            # yfinance 히스토리 데이터 조회 (저장소가 있으면 새 봉만 증분 조회)
+            with stage('history_fetch'):
+                hist = load_history(ticker, yahoo_symbol, period, interval)
+
+            if not hist.empty:
+                UPSTREAM_ATTEMPTS.inc('ok')
+                log.debug("Fetched %d data points for %s (%s to %s)", len(hist), yahoo_symbol, hist.index[0], hist.index[-1])
+                break
             else:
-                print(f"Cache EXPIRED for {stock_code} (age: {age_minutes:.1f} minutes)")
-                # 만료된 캐시 삭제
-                del self.cache[key]
-                del self.timestamps[key]
-        
-        print(f"Cache MISS for {stock_code}")
+                UPSTREAM_ATTEMPTS.inc('empty')
+                log.debug("No data returned for %s", yahoo_symbol)
+
+        except Exception as e:
+            UPSTREAM_ATTEMPTS.inc('busy' if isinstance(e, UpstreamBusy) else 'error')
+            log.warning("Attempt %d/%d for %s failed: %s", attempt + 1, max_retries, yahoo_symbol, e)
+            if attempt == max_retries - 1 or isinstance(e, UpstreamBusy):
+                raise e
+
+            # 잠시 대기 후 재시도
+            time.sleep(0.5)
+
+    return hist
+
+def fetch_stock_data(stock_code, period, interval, fmt='candles', indicator_names=()):
+    """yfinance 에서 데이터를 가져와 인코딩된 응답 본문 구성 후 캐시에 저장
+
+    cache_response() 결과 (본문, 버전, 생성 시각) 반환, 데이터가 없으면 None
+    """
+    log.info("Fetching data for %s (period: %s, interval: %s)", stock_code, period, interval)
+
+    # 최신 yfinance는 자동으로 적절한 헤더와 세션을 관리합니다
+    tickers = {}
+    # .KS/.KQ 동시 조회와 info 조회는 다른 스레드에서 실행되므로 지금 스레드의 우선순위를 ticker 에 고정
+    priority = upstream_scheduler.current_priority()
+
+    # 심볼을 알고 있으면 종목 정보(info)를 history 와 동시에 조회 (메타데이터 캐시에 있으면 생략)
+    metadata_future = None
+    symbols = symbol_resolver.candidates(stock_code)
+    # (async 업스트림은 history 응답의 meta 로 종목 정보를 채우므로 별도 조회하지 않음)
+    if len(symbols) == 1 and INFO_MODE == 'concurrent' and chart_client is None:
+        tickers[symbols[0]] = make_ticker(symbols[0], priority)
+        metadata_future = metadata_cache.load_async(symbols[0], tickers[symbols[0]])
+
+    # .KS/.KQ 탐색은 한 번만 시도 (잘못된 접미사의 빈 결과를 다시 조회하지 않음)
+    max_retries = 1 if len(symbols) > 1 else None
+
+    def fetch_history(symbol):
+        ticker = tickers.setdefault(symbol, make_ticker(symbol, priority))
+        return fetch_history_with_retry(ticker, symbol, period, interval, max_retries)
+
+    # 접미사를 알면 한 번만 조회, 모르면 .KS(코스피)/.KQ(코스닥)를 동시에 조회
+    yahoo_symbol, hist = symbol_resolver.fetch_first_available(stock_code, fetch_history)
+    if hist is None:
         return None
-    
-    def set(self, stock_code, period, interval, data):
-        """캐시에 데이터 저장"""
-        key = self._generate_key(stock_code, period, interval)
-        self.cache[key] = data
-        self.timestamps[key] = time.time()
-        print(f"Cache SET for {stock_code}")
-    
-    def clear_expired(self, max_age_minutes=60):
-        """만료된 캐시 정리 (기본 1시간)"""
-        current_time = time.time()
-        expired_keys = []
-        
-        for key, timestamp in self.timestamps.items():
-            age_minutes = (current_time - timestamp) / 60
-            if age_minutes > max_age_minutes:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self.cache[key]
-            del self.timestamps[key]
-        
-        if expired_keys:
-            print(f"Cleared {len(expired_keys)} expired cache entries")
-    
-    def get_stats(self):
-        """캐시 통계 조회"""
-        current_time = time.time()
-        cache_info = []
-        
-        for key in self.cache.keys():
-            age_minutes = (current_time - self.timestamps[key]) / 60
-            cache_info.append({
-                'key': key,
-                'age_minutes': round(age_minutes, 1)
-            })
-        
-        return {
-            'total_entries': len(self.cache),
-            'entries': cache_info
+
+    # 주식 정보 가져오기 (메타데이터 캐시 우선)
+    metadata = load_metadata(yahoo_symbol, tickers[yahoo_symbol], metadata_future if yahoo_symbol == symbols[0] else None)
+
+    response_data = build_response_data(
+        stock_code, yahoo_symbol, metadata or DEFAULT_METADATA, period, interval, hist, fmt, indicator_names
+    )
+    return cache_response(stock_code, period, interval, fmt, response_data, indicator_names, store=metadata is not None)
+
+def load_stock_data(stock_code, period, interval, fmt='candles', indicator_names=()):
+    """동일 (종목, 기간, 간격, 형식, 지표) 조회가 동시에 몰리면 업스트림 조회는 한 번만 수행
+
+    합류한 요청은 자기 우선순위의 토큰 대기 한도 + 조회 시간까지만 기다림
+    (백그라운드 갱신이 먼저 시작한 조회에 합류한 사용자 요청이 백그라운드 대기 한도만큼 묶이지 않도록)
+    """
+    priority = upstream_scheduler.current_priority()
+    try:
+        return inflight_fetches.do(
+            (stock_code, period, interval, fmt, indicator_names),
+            lambda: fetch_stock_data(stock_code, period, interval, fmt, indicator_names),
+            timeout=upstream_scheduler.max_wait_seconds[priority] + JOIN_FETCH_SECONDS,
+        )
+    except JoinTimeout as e:
+        raise UpstreamBusy(priority, e.waited)
+
+def _split_bulk_frame(data, symbol):
+    """yf.download 다중 종목 결과에서 한 종목의 history DataFrame 추출"""
+    if data is None or data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return None
+        frame = data[symbol]
+    else:
+        frame = data
+    # 여러 종목의 날짜를 합친 인덱스이므로 해당 종목에 값이 없는 행은 제거
+    frame = frame.dropna(subset=['Open', 'High', 'Low', 'Close'], how='all')
+    return frame if not frame.empty else None
+
+def _download_chunk(symbols, period, interval):
+    """심볼 묶음 하나를 한 번의 yf.download 요청으로 조회 ((심볼, 컬럼) 형태)"""
+    if chart_client is not None:
+        # 종목별 chart 요청을 한 이벤트 루프에서 동시에 보내고 yf.download 와 같은 (심볼, 컬럼) 형태로 합침
+        frames = {
+            symbol: hist for symbol, hist in chart_client.fetch_many(symbols, period, interval).items()
+            if isinstance(hist, pd.DataFrame) and not hist.empty
         }
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+    data = yf.download(
+        symbols, period=period, interval=interval, group_by='ticker',
+        auto_adjust=True, actions=False, threads=True, progress=False
+    )
+    if data is not None and not data.empty and not isinstance(data.columns, pd.MultiIndex):
+        # 한 종목만 요청하면 컬럼만 있는 형태로 오므로 다른 묶음과 합칠 수 있게 심볼 단계를 붙임
+        data = pd.concat({symbols[0]: data}, axis=1)
+    return data
+
+def _bulk_download(symbols, period, interval):
+    """여러 심볼을 일괄 조회 (스케줄러 burst 개씩 나눠 요청, 결과는 yf.download(group_by='ticker') 형태)"""
+    log.info("Bulk downloading %d symbols (period: %s, interval: %s)", len(symbols), period, interval)
+    # 종목마다 요청이 나가므로 묶음마다 종목 수만큼 토큰 사용 (한 번에 burst 를 넘는 요청을 보내지 않음)
+    chunk_size = upstream_scheduler.burst
+    frames = []
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        upstream_scheduler.acquire(cost=len(chunk))
+        data = _download_chunk(chunk, period, interval)
+        if data is not None and not data.empty:
+            frames.append(data)
+    if not frames:
+        return pd.DataFrame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
+
+def fetch_stock_data_bulk(stock_codes, period, interval, fmt='candles'):
+    """여러 종목을 일괄 조회해 종목별 cache_response() 결과 반환 (데이터가 없는 종목은 None)"""
+    symbols = {code: symbol_resolver.resolve(code) for code in stock_codes}
+    frames = {}
+    metadata_futures = {}
+
+    def start_metadata(code):
+        # 종목 정보(info)는 종목별 요청이므로 history 일괄 조회와 병렬로 수행 (캐시에 있으면 생략)
+        if INFO_MODE != 'off':
+            metadata_futures[code] = metadata_cache.load_async(symbols[code], make_ticker(symbols[code]))
 
-# 전역 캐시 인스턴스
-stock_cache = SimpleCache()
+    for code in stock_codes:
+        if symbol_resolver.known_suffix(code) is not None or not is_krx_code(code):
+            start_metadata(code)
+
+    with stage('history_fetch'):
+        data = _bulk_download(list(symbols.values()), period, interval)
+    for code, symbol in symbols.items():
+        frames[code] = _split_bulk_frame(data, symbol)
+        if frames[code] is not None and code not in metadata_futures:
+            start_metadata(code)
+
+    # 접미사를 모르는 종목 중 .KS 에서 데이터가 없던 종목은 .KQ (코스닥)으로 한 번에 재시도
+    kosdaq_symbols = {
+        code: symbol.replace('.KS', '.KQ')
+        for code, symbol in symbols.items()
+        if frames[code] is None and symbol.endswith('.KS') and symbol_resolver.known_suffix(code) is None
+    }
+    if kosdaq_symbols:
+        log.info("Retrying %d symbols with KOSDAQ suffix", len(kosdaq_symbols))
+        with stage('kq_fallback'):
+            data_kq = _bulk_download(list(kosdaq_symbols.values()), period, interval)
+        for code, symbol in kosdaq_symbols.items():
+            frames[code] = _split_bulk_frame(data_kq, symbol)
+            if frames[code] is not None:
+                symbols[code] = symbol
+                start_metadata(code)
+
+    # 확인된 접미사 저장, 저장된 접미사로 데이터가 없던 종목은 다시 탐색하도록 삭제
+    symbol_resolver.remember_many(symbols[code] for code, hist in frames.items() if hist is not None)
+    for code, hist in frames.items():
+        if hist is None and symbol_resolver.known_suffix(code) is not None:
+            symbol_resolver.forget(code)
+
+    # 일괄 조회 결과도 캔들 저장소에 기록해 이후 단건 조회는 증분 조회
+    if candle_store is not None:
+        for code, hist in frames.items():
+            if hist is not None:
+                tz = str(hist.index.tz) if hist.index.tz is not None else 'UTC'
+                candle_store.write(symbols[code], interval, hist, covered_from=period_start(period, tz))
+
+    results = {}
+    for code, hist in frames.items():
+        if hist is None:
+            results[code] = None
+            continue
+        metadata = load_metadata(symbols[code], None, metadata_futures.get(code))
+        response_data = build_response_data(code, symbols[code], metadata or DEFAULT_METADATA, period, interval, hist, fmt)
+        results[code] = cache_response(code, period, interval, fmt, response_data, store=metadata is not None)
+    return results
+
+def start_symbol_preload():
+    """상장 종목 전체의 .KS/.KQ 접미사를 백그라운드에서 일괄 해석 (이미 실행 중이면 False)"""
+    if symbol_resolver.preload_running:
+        return False
+
+    def run():
+        try:
+            stock_codes = listed_stock_codes()
+            log.info("Preloading exchange suffixes for %d listed codes", len(stock_codes))
+            with upstream_scheduler.priority('background'):
+                symbol_resolver.preload(stock_codes, lambda symbols: _bulk_download(symbols, '5d', '1d'))
+        except Exception as e:
+            log.warning("Symbol preload failed: %s", e)
+
+    symbol_resolver.preload_running = True
+    threading.Thread(target=run, name='symbol-preload', daemon=True).start()
+    return True
+
+def get_cached_response(stock_code, period, interval, fmt='candles', indicator_names=(), allow_stale=None):
+    """캐시된 응답 조회, 만료된(stale) 응답이면 백그라운드 갱신 예약
+
+    (본문 앞부분, stale 초, 버전, 생성 시각) 반환, 없으면 None
+    본문은 finish_cached_body(본문 앞부분, stale 초) 로 완성 (재직렬화 없음)
+    """
+    with stage('cache_lookup'):
+        cached, stale_seconds = stock_cache.lookup(
+            stock_code, period, _cache_interval(interval, fmt, indicator_names),
+            allow_stale=SERVE_STALE if allow_stale is None else allow_stale
+        )
+    if not cached:
+        return None
+
+    # 만료된 데이터는 바로 응답하고 백그라운드에서 갱신
+    if stale_seconds > 0:
+        refresher.schedule((stock_code, period, interval, fmt, indicator_names))
+    version, created_at, prefix = unpack_cached_body(cached)
+    return prefix, stale_seconds, version, created_at
+
+def _json_body(body, status=200):
+    """미리 인코딩된 JSON 본문으로 응답 생성"""
+    return Response(body, status=status, mimetype='application/json')
+
+def _conditional_response(version, created_at, max_age, body_fn, compress_key=None):
+    """ETag/Last-Modified/Cache-Control 을 붙인 응답 (클라이언트 버전과 같으면 본문 없이 304)
+
+    compress_key 가 있으면 압축 결과를 재사용합니다 (본문이 항목마다 고정인 신선한 캐시 응답).
+    """
+    etag = make_etag(version)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(created_at),
+        'Cache-Control': cache_control(max_age, stock_cache.stale_ttl_seconds if SERVE_STALE else 0),
+        'Vary': 'Accept-Encoding',
+    }
+    if is_not_modified(request.headers, etag, created_at):
+        return Response(status=304, headers=headers)
+
+    with stage('compression'):
+        body, encoding = encode_body(body_fn(), request.headers.get('Accept-Encoding'), compressed_bodies, compress_key)
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return Response(body, status=200, mimetype='application/json', headers=headers)
+
+def _parse_format():
+    """format 쿼리 파라미터 (candles 기본, columnar 선택), 잘못된 값이면 None"""
+    fmt = request.args.get('format', 'candles').lower()
+    return fmt if fmt in RESPONSE_FORMATS else None
+
+def _parse_indicator_names():
+    """indicators 쿼리 파라미터 (예: ma20,rsi,macd,bb) -> 정규화된 지표 이름 튜플, 잘못된 값이면 ValueError"""
+    return parse_indicators(request.args.get('indicators', ''))
+
+def _invalid_format_error():
+    return jsonify({
+        'success': False,
+        'error': {'code': 400, 'message': f"format 은 {', '.join(RESPONSE_FORMATS)} 중 하나여야 합니다"}
+    }), 400
+
+def _busy_response(stock_code, period, interval, fmt, indicator_names, error):
+    """업스트림 호출 한도로 조회하지 못했을 때 stale 캐시로 응답 (캐시도 없으면 503)"""
+    cached = get_cached_response(stock_code, period, interval, fmt, indicator_names, allow_stale=True)
+    if cached:
+        upstream_scheduler.record_stale_fallback()
+        prefix, stale_seconds, version, created_at = cached
+        return _conditional_response(version, created_at, 0, lambda: finish_cached_body(prefix, stale_seconds))
+    response = jsonify({
+        'success': False,
+        'error': {'code': 503, 'message': f"업스트림 호출이 많아 잠시 후 다시 시도해주세요: {error}"}
+    })
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+def _not_found_error(stock_code):
+    return {
+        'success': False,
+        'error': {
+            'code': 404,
+            'message': f"종목코드 {stock_code}에 대한 데이터를 찾을 수 없습니다. KOSPI(.KS)와 KOSDAQ(.KQ) 모두 시도했습니다."
+        }
+    }
+
+def _parse_prefetch_keys(value):
+    """STOCK_PREFETCH_CODES 파싱 (예: "005930,035720:1y:1d")"""
+    keys = []
+    for item in value.split(','):
+        parts = item.strip().split(':')
+        if not parts[0]:
+            continue
+        period = parts[1] if len(parts) > 1 else '3mo'
+        interval = parts[2] if len(parts) > 2 else '1d'
+        keys.append((parts[0], period, interval, 'candles', ()))
+    return keys
+
+def refresh_stock_data(*key):
+    """백그라운드 갱신 - 업스트림 호출은 사용자 요청보다 낮은 우선순위로 대기"""
+    with upstream_scheduler.priority('background'):
+        return load_stock_data(*key)
+
+# 핫 종목 백그라운드 갱신기 (stale 응답 재검증 + TTL 만료 전 프리페치)
+refresher = BackgroundRefresher(
+    refresh_fn=refresh_stock_data,
+    ttl_remaining_fn=cached_ttl_remaining,
+    prefetch_keys=_parse_prefetch_keys(os.getenv('STOCK_PREFETCH_CODES', '')),
+    top_n=int(os.getenv('STOCK_PREFETCH_TOP_N', 20)),
+    refresh_ahead_seconds=float(os.getenv('STOCK_REFRESH_AHEAD_SECONDS', 120)),
+    scan_interval_seconds=float(os.getenv('STOCK_PREFETCH_SCAN_SECONDS', 60)),
+    max_workers=int(os.getenv('STOCK_REFRESH_WORKERS', 4)),
+    max_tracked_keys=int(os.getenv('STOCK_PREFETCH_TRACKED_KEYS', 1000)),
+)
+# 프리페치 스캔은 stale 응답이 없어도 돌아야 하므로 앱 구성 시 시작
+refresher.start()
+
+# 분봉 스트리밍(SSE) - (종목, 간격)마다 업스트림 폴러 하나를 모든 구독자가 공유
+STREAM_INTERVALS = ('1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h')
+STREAM_PERIOD = os.getenv('STOCK_STREAM_PERIOD', '1d')
+
+def fetch_stream_history(stock_code, interval):
+    """스트리밍 폴러용 분봉 조회 (응답 캐시/캔들 저장소를 거치지 않고 당일 구간 조회)"""
+    def fetch_history(symbol):
+        with upstream_scheduler.priority('stream'):
+            return make_ticker(symbol).history(period=STREAM_PERIOD, interval=interval)
+    _, hist = symbol_resolver.fetch_first_available(stock_code, fetch_history)
+    return hist
+
+stream_hub = StreamHub(
+    fetch_stream_history,
+    poll_interval_seconds=float(os.getenv('STOCK_STREAM_POLL_SECONDS', 5)),
+    idle_seconds=float(os.getenv('STOCK_STREAM_IDLE_SECONDS', 30)),
+    heartbeat_seconds=float(os.getenv('STOCK_STREAM_HEARTBEAT_SECONDS', 15)),
+    # 구독자 연결은 stream_server.py 의 이벤트 루프에서 기다리므로 스레드 수와 무관 (연결/메모리 보호용 한도)
+    max_subscribers=int(os.getenv('STOCK_STREAM_MAX_SUBSCRIBERS', 2000)),
+    max_empty_polls=int(os.getenv('STOCK_STREAM_MAX_EMPTY_POLLS', 3)),
+)
+# 스트리밍 전용 서버 주소 (예: http://localhost:5002) - 설정되면 /api/stock-stream 요청을 그 서버로 리다이렉트
+# (gthread 워커에서 직접 구독하면 연결마다 워커 스레드 하나를 점유)
+STREAM_URL = os.getenv('STOCK_STREAM_URL', '').rstrip('/')
+
+@app.route('/api/stock-stream/<stock_code>')
+def stream_stock_data(stock_code):
+    """분봉 실시간 스트리밍 (text/event-stream) - 처음에 snapshot, 이후 새로 생기거나 바뀐 봉만 bars 이벤트로 전송"""
+    interval = request.args.get('interval', '1m')
+    if interval not in STREAM_INTERVALS:
+        return jsonify({
+            'success': False,
+            'error': {'code': 400, 'message': f"interval 은 {', '.join(STREAM_INTERVALS)} 중 하나여야 합니다"}
+        }), 400
+    
+    if STREAM_URL:
+        return redirect(f"{STREAM_URL}{request.full_path.rstrip('?')}", 307)
+    
+    # 재접속 시 브라우저가 보내는 Last-Event-ID 이후 이벤트만 전송 (버퍼에 없으면 스냅샷부터)
+    stream = stream_hub.subscribe((stock_code, interval), request.headers.get('Last-Event-ID'))
+    if stream is None:
+        return jsonify({
+            'success': False,
+            'error': {'code': 503, 'message': '스트리밍 구독자 수가 한도를 넘었습니다. 잠시 후 다시 시도해주세요.'}
+        }), 503
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # 프록시(nginx) 버퍼링 해제
+    })
 
 @app.route('/api/stock-data/<stock_code>')
 def get_stock_data(stock_code):
@@ -96,158 +620,143 @@ def get_stock_data(stock_code):
         period = request.args.get('period', '3mo')
         interval = request.args.get('interval', '1d')
         force_refresh = request.args.get('force_refresh', 'false').lower() == 'true'
+        fmt = _parse_format()
+        if fmt is None:
+            return _invalid_format_error()
+        # force_refresh 는 종목별로 일정 시간에 한 번만 (그 사이 요청은 캐시 사용)
+        if force_refresh and not upstream_scheduler.allow_force_refresh(stock_code):
+            log.info("force_refresh for %s ignored (rate limited)", stock_code)
+            force_refresh = False
+        try:
+            indicator_names = _parse_indicator_names()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': {'code': 400, 'message': str(e)}}), 400
         
-        # 캐시에서 데이터 조회 (force_refresh가 true가 아닌 경우)
-        if not force_refresh:
-            cached_data = stock_cache.get(stock_code, period, interval)
-            if cached_data:
-                # 캐시된 데이터에 캐시 정보 추가
-                cached_data['data']['cache_info'] = {
-                    'from_cache': True,
-                    'timestamp': cached_data['data']['timestamp']
-                }
-                return jsonify(cached_data)
-        
-        # 한국 주식의 경우 .KS 또는 .KQ 접미사 추가
-        if stock_code.isdigit() and len(stock_code) == 6:
-            # 카카오(035720), 삼성전자(005930) 등 코스피 주식은 .KS
-            # 코스닥 주식은 .KQ (일단 .KS로 시작)
-            yahoo_symbol = f"{stock_code}.KS"
-        else:
-            yahoo_symbol = stock_code
-        
-        print(f"Fetching data for {yahoo_symbol} (period: {period}, interval: {interval})")
-        
-        # yfinance로 데이터 가져오기 (0.2.64 최신 버전)
-        print(f"Creating ticker for {yahoo_symbol}")
+        key = (stock_code, period, interval, fmt, indicator_names)
         
-        # 최신 yfinance는 자동으로 적절한 헤더와 세션을 관리합니다
-        ticker = yf.Ticker(yahoo_symbol)
+        # 캐시에서 데이터 조회 (force_refresh가 true가 아닌 경우) - 저장된 bytes 를 그대로 전송
+        if not force_refresh:
+            cached = get_cached_response(stock_code, period, interval, fmt, indicator_names)
+            if cached:
+                # 접근 빈도 기록 (프리페치 대상 학습) - 캐시 항목이 있는 키만
+                refresher.record_access(key)
+                prefix, stale_seconds, version, created_at = cached
+                max_age = 0 if stale_seconds > 0 else created_at + stock_cache.ttl_seconds - time.time()
+                return _conditional_response(
+                    version, created_at, max_age,
+                    lambda: finish_cached_body(prefix, stale_seconds),
+                    compress_key=(version, created_at) if stale_seconds == 0 else None,
+                )
         
-        # 주식 정보 가져오기 (안정적인 방법)
         try:
-            # 기본 info 속성 사용 (가장 안정적)
-            info = ticker.info
-            company_name = info.get('longName') or info.get('shortName') or info.get('symbol', '알 수 없음')
-            print(f"Company name: {company_name}")
-            print(f"Market: {info.get('market', 'Unknown')}")
-            print(f"Currency: {info.get('currency', 'Unknown')}")
-        except Exception as e:
-            print(f"Failed to get company info: {e}")
-            company_name = '알 수 없음'
-            info = {}
+            result = load_stock_data(stock_code, period, interval, fmt, indicator_names)
+        except UpstreamBusy as e:
+            return _busy_response(stock_code, period, interval, fmt, indicator_names, e)
         
-        # 히스토리 데이터 가져오기 (0.2.64 개선된 방법)
-        hist = None
-        max_retries = 2
+        if result is None:
+            return jsonify(_not_found_error(stock_code)), 404
         
-        for attempt in range(max_retries):
-            try:
-                print(f"Attempt {attempt + 1}/{max_retries} to fetch data...")
-                
-                # yfinance 히스토리 데이터 조회 (호환성 우선)
-                hist = ticker.history(period=period, interval=interval)
-                
-                if not hist.empty:
-                    print(f"Successfully fetched {len(hist)} data points")
-                    print(f"Date range: {hist.index[0]} to {hist.index[-1]}")
-                    break
-                else:
-                    print(f"No data returned for {yahoo_symbol}")
-                    
-            except Exception as e:
-                print(f"Attempt {attempt + 1} failed: {str(e)}")
-                if attempt == max_retries - 1:
-                    raise e
-                
-                # 잠시 대기 후 재시도
-                import time
-                time.sleep(0.5)
+        refresher.record_access(key)
+        payload, version, created_at = result
+        return _conditional_response(version, created_at, stock_cache.ttl_seconds, lambda: fresh_body(payload))
+        
+    except Exception as e:
+        error_message = f"데이터 조회 중 오류가 발생했습니다: {str(e)}"
+        log.exception("Error: %s", error_message)
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 500,
+                'message': error_message
+            }
+        }), 500
+
+@app.route('/api/stock-data')
+def get_stock_data_batch():
+    """여러 종목 일괄 조회 (캐시 미스 종목은 한 번의 yf.download 로 조회)"""
+    try:
+        codes_param = request.args.get('codes', '')
+        period = request.args.get('period', '3mo')
+        interval = request.args.get('interval', '1d')
+        force_refresh = request.args.get('force_refresh', 'false').lower() == 'true'
+        fmt = _parse_format()
+        if fmt is None:
+            return _invalid_format_error()
         
-        if hist is None or hist.empty:
-            # .KQ (코스닥)으로 재시도
-            if yahoo_symbol.endswith('.KS'):
-                kosdaq_symbol = yahoo_symbol.replace('.KS', '.KQ')
-                print(f"Retrying with KOSDAQ symbol: {kosdaq_symbol}")
-                
-                try:
-                    ticker_kq = yf.Ticker(kosdaq_symbol)
-                    hist = ticker_kq.history(period=period, interval=interval)
-                    if not hist.empty:
-                        yahoo_symbol = kosdaq_symbol
-                        print(f"Successfully fetched KOSDAQ data: {len(hist)} points")
-                except Exception as e:
-                    print(f"KOSDAQ retry failed: {str(e)}")
-                    pass
-            
-            if hist is None or hist.empty:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 404,
-                        'message': f"종목코드 {stock_code}에 대한 데이터를 찾을 수 없습니다. KOSPI(.KS)와 KOSDAQ(.KQ) 모두 시도했습니다."
-                    }
-                }), 404
+        # 중복 제거 (요청 순서 유지)
+        stock_codes = list(dict.fromkeys(code.strip() for code in codes_param.split(',') if code.strip()))
+        if not stock_codes:
+            return jsonify({
+                'success': False,
+                'error': {'code': 400, 'message': 'codes 파라미터가 필요합니다 (예: codes=005930,035720)'}
+            }), 400
+        if len(stock_codes) > BATCH_MAX_CODES:
+            return jsonify({
+                'success': False,
+                'error': {'code': 400, 'message': f'한 번에 최대 {BATCH_MAX_CODES}개 종목까지 조회할 수 있습니다'}
+            }), 400
         
-        # 데이터 변환 (0.2.64 최적화)
-        candle_data = []
-        print("Converting data to candle format...")
+        # 종목별 결과는 인코딩된 본문(bytes)으로 모아 한 번에 이어 붙임
+        results = {}
+        missing_codes = []
+        for stock_code in stock_codes:
+            force = force_refresh and upstream_scheduler.allow_force_refresh(stock_code)
+            cached = None if force else get_cached_response(stock_code, period, interval, fmt)
+            if cached:
+                refresher.record_access((stock_code, period, interval, fmt, ()))
+                results[stock_code] = finish_cached_body(cached[0], cached[1])
+            else:
+                missing_codes.append(stock_code)
         
-        for date, row in hist.iterrows():
-            # 최신 yfinance는 더 정확한 데이터 타입을 제공합니다
+        # 캐시 미스 종목 일괄 조회 (실패는 종목별로 기록)
+        failed_codes = set()
+        if missing_codes:
             try:
-                candle_data.append({
-                    'time': date.strftime('%Y-%m-%d'),
-                    'open': round(float(row['Open']), 2) if pd.notna(row['Open']) else 0,
-                    'high': round(float(row['High']), 2) if pd.notna(row['High']) else 0,
-                    'low': round(float(row['Low']), 2) if pd.notna(row['Low']) else 0,
-                    'close': round(float(row['Close']), 2) if pd.notna(row['Close']) else 0,
-                    'volume': int(row['Volume']) if pd.notna(row['Volume']) else 0,
-                    'adj_close': round(float(row.get('Adj Close', row['Close'])), 2) if pd.notna(row.get('Adj Close', row['Close'])) else 0
-                })
+                fetched = fetch_stock_data_bulk(missing_codes, period, interval, fmt)
             except Exception as e:
-                print(f"Error processing row for {date}: {e}")
-                continue
-        
-        print(f"Successfully converted {len(candle_data)} data points")
-        
-        # 응답 데이터 구성 (캐싱 포함)
-        response_data = {
-            'success': True,
-            'data': {
-                'symbol': yahoo_symbol,
-                'stock_code': stock_code,
-                'company_name': company_name,
-                'period': period,
-                'interval': interval,
-                'candles': candle_data,
-                'total_count': len(candle_data),
-                'server': 'Python Flask (Local Development)',
-                'yfinance_version': '0.2.64',
-                'timestamp': datetime.now().isoformat(),
-                'market_info': {
-                    'currency': info.get('currency', 'KRW') if 'info' in locals() else 'KRW',
-                    'market': info.get('market', 'KRX') if 'info' in locals() else 'KRX',
-                    'timezone': info.get('timeZoneFullName', 'Asia/Seoul') if 'info' in locals() else 'Asia/Seoul'
-                },
-                'cache_info': {
-                    'from_cache': False,
-                    'cached_at': datetime.now().isoformat()
-                }
-            }
-        }
-        
-        # 데이터를 캐시에 저장
-        stock_cache.set(stock_code, period, interval, response_data)
-        
-        # 만료된 캐시 정리 (요청이 올 때마다 정리)
-        stock_cache.clear_expired()
+                log.warning("Bulk download failed: %s", e)
+                fetched = {}
+                for stock_code in missing_codes:
+                    # 호출 한도로 조회하지 못한 종목은 stale 캐시가 있으면 그것으로 응답
+                    cached = get_cached_response(stock_code, period, interval, fmt, allow_stale=True) \
+                        if isinstance(e, UpstreamBusy) else None
+                    if cached:
+                        upstream_scheduler.record_stale_fallback()
+                        results[stock_code] = finish_cached_body(cached[0], cached[1])
+                        continue
+                    failed_codes.add(stock_code)
+                    results[stock_code] = dumps({
+                        'success': False,
+                        'error': {'code': 503 if isinstance(e, UpstreamBusy) else 500,
+                                  'message': f"데이터 조회 중 오류가 발생했습니다: {str(e)}"}
+                    })
+            for stock_code, result in fetched.items():
+                if result is None:
+                    failed_codes.add(stock_code)
+                    results[stock_code] = dumps(_not_found_error(stock_code))
+                else:
+                    refresher.record_access((stock_code, period, interval, fmt, ()))
+                    results[stock_code] = fresh_body(result[0])
         
-        return jsonify(response_data)
+        succeeded = len(stock_codes) - len(failed_codes)
+        return _json_body(raw_object([
+            ('success', b'true'),
+            ('data', raw_object([
+                ('period', dumps(period)),
+                ('interval', dumps(interval)),
+                ('format', dumps(fmt)),
+                ('requested', dumps(len(stock_codes))),
+                ('succeeded', dumps(succeeded)),
+                ('failed', dumps(len(failed_codes))),
+                ('from_cache', dumps(len(stock_codes) - len(missing_codes))),
+                ('results', raw_object([(stock_code, results[stock_code]) for stock_code in stock_codes])),
+                ('timestamp', dumps(datetime.now().isoformat())),
+            ])),
+        ]))
         
     except Exception as e:
         error_message = f"데이터 조회 중 오류가 발생했습니다: {str(e)}"
-        print(f"Error: {error_message}")
+        log.exception("Error: %s", error_message)
         return jsonify({
             'success': False,
             'error': {
@@ -256,14 +765,222 @@ def get_stock_data(stock_code):
             }
         }), 500
 
+# 회사 검색 - 회사 목록을 메모리 인덱스로 한 번 읽어 두고 목록이 바뀌면 다시 만들어 교체
+company_search = CompanySearch(
+    check_interval_seconds=float(os.getenv('STOCK_SEARCH_RELOAD_CHECK_SECONDS', 30)),
+    max_age_seconds=float(os.getenv('STOCK_SEARCH_MAX_AGE_MINUTES', 60)) * 60,
+)
+SEARCH_MAX_LIMIT = 50
+
+@app.route('/api/search-company')
+def search_company():
+    """회사명/영문명/종목코드 검색 (접두어, 부분 문자열, 초성, 오타 허용)"""
+    query = request.args.get('query', '').strip()
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': {'code': 400, 'message': '검색어(query)가 필요합니다'}
+        }), 400
+    try:
+        limit = min(SEARCH_MAX_LIMIT, max(1, int(request.args.get('limit', 10))))
+    except ValueError:
+        limit = 10
+    return jsonify({'success': True, 'results': company_search.search(query, limit)})
+
+@app.route('/api/company-by-code')
+def company_by_code():
+    """종목코드로 회사 조회"""
+    stock_code = request.args.get('stock_code', '').strip()
+    if not stock_code:
+        return jsonify({
+            'success': False,
+            'error': {'code': 400, 'message': '종목코드(stock_code)가 필요합니다'}
+        }), 400
+    company = company_search.by_stock_code(stock_code)
+    if company is None:
+        return jsonify({
+            'success': False,
+            'error': {'code': 404, 'message': f"종목코드 {stock_code}에 해당하는 회사를 찾을 수 없습니다"}
+        }), 404
+    return jsonify({'success': True, 'company': company})
+
+@app.route('/search/reload', methods=['POST'])
+def reload_company_search():
+    """회사 목록을 다시 읽어 검색 인덱스 교체"""
+    count = company_search.reload()
+    return jsonify({
+        'success': True,
+        'message': f'Company search index rebuilt with {count} companies',
+        'search_stats': company_search.get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+def download_screener_batch(symbols):
+    """스크리너 배치 조회 - 52주 지표용 1년 일봉, 사용자 요청보다 낮은 우선순위"""
+    with upstream_scheduler.priority('background'):
+        return _bulk_download(symbols, '1y', '1d')
+
+# 상장 종목 전체 스크리너 - 종목을 배치로 나눠 주기적으로 일괄 조회하고 지표를 배열 테이블로 보관
+# (갱신은 공유 저장소 잠금을 잡은 워커 하나만 하고, 다른 워커는 게시된 테이블을 읽음)
+screener = Screener(
+    download_screener_batch,
+    symbol_resolver,
+    batch_size=int(os.getenv('STOCK_SCREENER_BATCH_SIZE', 100)),
+    max_workers=int(os.getenv('STOCK_SCREENER_WORKERS', 4)),
+    refresh_interval_seconds=float(os.getenv('STOCK_SCREENER_REFRESH_MINUTES', 15)) * 60,
+    store=ScreenerStore(os.getenv(
+        'STOCK_SCREENER_STORE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'screener.sqlite')
+    )),
+    sync_interval_seconds=float(os.getenv('STOCK_SCREENER_SYNC_SECONDS', 30)),
+)
+SCREENER_MAX_LIMIT = 500
+
+def _parse_screener_filters():
+    """min_<지표> / max_<지표> 쿼리 파라미터 -> {지표: (최소, 최대)}, 숫자가 아니면 ValueError"""
+    filters = {}
+    for field in SCREENER_FIELDS:
+        bounds = []
+        for prefix in ('min_', 'max_'):
+            value = request.args.get(prefix + field)
+            try:
+                bounds.append(float(value) if value not in (None, '') else None)
+            except ValueError:
+                raise ValueError(f"{prefix}{field} 는 숫자여야 합니다")
+        if bounds != [None, None]:
+            filters[field] = tuple(bounds)
+    return filters
+
+@app.route('/api/screener')
+def screen_stocks():
+    """상장 종목 전체 필터/정렬 조회 (예: ?sort=change_pct&order=desc&market=KOSDAQ&min_volume=100000&limit=50)"""
+    sort = request.args.get('sort', 'change_pct')
+    order = request.args.get('order', 'desc').lower()
+    market = request.args.get('market', '').upper() or None
+    codes_param = request.args.get('codes', '')
+    codes = [code.strip() for code in codes_param.split(',') if code.strip()] or None
+    try:
+        if sort not in SCREENER_FIELDS:
+            raise ValueError(f"sort 는 {', '.join(SCREENER_FIELDS)} 중 하나여야 합니다")
+        if order not in ('asc', 'desc'):
+            raise ValueError("order 는 asc, desc 중 하나여야 합니다")
+        if market is not None and market not in MARKETS:
+            raise ValueError(f"market 은 {', '.join(MARKETS)} 중 하나여야 합니다")
+        try:
+            limit = min(SCREENER_MAX_LIMIT, max(1, int(request.args.get('limit', 50))))
+            offset = max(0, int(request.args.get('offset', 0)))
+        except ValueError:
+            raise ValueError("limit, offset 은 정수여야 합니다")
+        filters = _parse_screener_filters()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': {'code': 400, 'message': str(e)}}), 400
+
+    table = screener.table
+    if table is None:
+        # 첫 요청에서 주기적 갱신/동기화 시작, 다른 워커가 게시한 테이블이 있으면 바로 사용
+        screener.start()
+        table = screener.sync()
+    if table is None:
+        # 서버 전체에서 첫 갱신이 끝나기 전
+        response = jsonify({
+            'success': False,
+            'error': {'code': 503, 'message': '스크리너 데이터를 준비 중입니다. 잠시 후 다시 시도해주세요.'}
+        })
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    with stage('screener_query'):
+        total, positions = table.query(sort, order == 'desc', limit, offset, market, filters, codes)
+        results = table.rows(positions)
+    with stage('serialization'):
+        timestamp = datetime.now().isoformat()
+        body = dumps({
+            'success': True,
+            'data': {
+                'sort': sort,
+                'order': order,
+                'market': market,
+                'filters': {field: {'min': low, 'max': high} for field, (low, high) in filters.items()},
+                'total': total,
+                'offset': offset,
+                'limit': limit,
+                'count': len(results),
+                'results': results,
+                'universe': len(table),
+                'updated_at': datetime.fromtimestamp(table.built_at).isoformat(),
+                'timestamp': timestamp,
+            }
+        })
+        version = body_version(body, timestamp)
+    return _conditional_response(version, table.built_at, screener.next_refresh_in() or 0, lambda: body)
+
+@app.route('/screener/refresh', methods=['POST'])
+def refresh_screener():
+    """스크리너 즉시 갱신 (갱신 담당 워커가 아니면 담당 워커에 요청)"""
+    message = screener.request_refresh()
+    return jsonify({
+        'success': True,
+        'message': message,
+        'screener_stats': screener.get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+# 요청별 전체/단계별 소요 시간 (Server-Timing 헤더 + /metrics 히스토그램)
+METRICS_ENABLED = os.getenv('STOCK_METRICS_ENABLED', 'true').lower() == 'true'
+
+@app.before_request
+def start_request_timer():
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    g.request_timer = RequestTimer(route, **{'http.request.method': request.method})
+
+@app.after_request
+def finish_request_timer(response):
+    timer = g.pop('request_timer', None)
+    if timer is not None:
+        response.headers['Server-Timing'] = timer.finish(response.status_code)
+        response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+# 수집 시점에 읽는 상태 지표
+# Redis 캐시는 항목 수를 세려면 키 전체를 SCAN 해야 하므로 (수집마다 O(전체 키)) 프로세스 내 캐시에서만 수집
+if stock_cache.backend == 'memory':
+    Gauge('stock_api_cache_entries', 'Entries in the response cache', lambda: len(stock_cache))
+Gauge('stock_api_inflight_fetches', 'Upstream fetches currently in flight', lambda: inflight_fetches.get_stats()['in_flight'])
+Gauge('stock_api_scheduler_queue_depth', 'Upstream calls waiting for a rate limit token', lambda: {
+    (priority,): depth for priority, depth in upstream_scheduler.get_stats()['queue_depth_by_priority'].items()
+}, ('priority',))
+Gauge('stock_api_scheduler_tokens', 'Upstream rate limit tokens available', lambda: upstream_scheduler.get_stats()['tokens'])
+Gauge('stock_api_stream_subscribers', 'Connected intraday stream subscribers', lambda: stream_hub.total_subscribers)
+Gauge('stock_api_search_companies', 'Companies in the search index', lambda: company_search.get_stats()['companies'])
+Gauge('stock_api_screener_rows', 'Stocks in the screener table', lambda: screener.get_stats()['rows'])
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 형식 지표 (워커 프로세스별 값)"""
+    if not METRICS_ENABLED:
+        return jsonify({'success': False, 'error': {'code': 404, 'message': 'metrics are disabled'}}), 404
+    return Response(render_metrics(), mimetype=None, content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/health')
 def health_check():
-    cache_stats = stock_cache.get_stats()
+    cache_stats = stock_cache.get_stats(include_entries=False)
     return jsonify({
         'status': 'healthy',
         'server': 'Python Flask Stock API',
         'timestamp': datetime.now().isoformat(),
-        'cache_stats': cache_stats
+        'cache_stats': cache_stats,
+        'inflight_stats': inflight_fetches.get_stats(),
+        'refresh_stats': refresher.get_stats(),
+        'symbol_stats': symbol_resolver.get_stats(),
+        'metadata_stats': metadata_cache.get_stats(),
+        'candle_store_stats': candle_store.get_stats() if candle_store is not None else None,
+        'indicator_stats': indicator_store.get_stats() if indicator_store is not None else None,
+        'compression_stats': compressed_bodies.get_stats(),
+        'stream_stats': stream_hub.get_stats(),
+        'scheduler_stats': upstream_scheduler.get_stats(),
+        'search_stats': company_search.get_stats(),
+        'screener_stats': screener.get_stats(),
+        'upstream_stats': chart_client.get_stats() if chart_client is not None else {'mode': UPSTREAM_MODE}
     })
 
 @app.route('/cache/stats')
@@ -279,9 +996,7 @@ def cache_stats():
 @app.route('/cache/clear', methods=['POST'])
 def clear_cache():
     """캐시 전체 삭제"""
-    cleared_count = len(stock_cache.cache)
-    stock_cache.cache.clear()
-    stock_cache.timestamps.clear()
+    cleared_count = stock_cache.clear()
     
     return jsonify({
         'success': True,
@@ -292,10 +1007,9 @@ def clear_cache():
 @app.route('/cache/clear-expired', methods=['POST'])
 def clear_expired_cache():
     """만료된 캐시만 삭제"""
-    before_count = len(stock_cache.cache)
-    stock_cache.clear_expired()
-    after_count = len(stock_cache.cache)
-    cleared_count = before_count - after_count
+    cleared_count = stock_cache.clear_expired()
+    # Redis 는 키 만료를 직접 처리하고 항목 수 집계에 SCAN 이 필요하므로 남은 항목 수를 생략
+    after_count = len(stock_cache) if stock_cache.backend == 'memory' else None
     
     return jsonify({
         'success': True,
@@ -304,23 +1018,67 @@ def clear_expired_cache():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/symbols/preload', methods=['POST'])
+def preload_symbols():
+    """상장 종목 접미사(.KS/.KQ) 일괄 해석 시작"""
+    started = start_symbol_preload()
+    return jsonify({
+        'success': True,
+        'message': 'Symbol preload started' if started else 'Symbol preload already running',
+        'symbol_stats': symbol_resolver.get_stats(),
+        'metadata_stats': metadata_cache.get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
 if __name__ == '__main__':
     # 환경변수에서 포트 읽기, 기본값은 5001
     port = int(os.getenv('PYTHON_API_PORT', 5001))
     
     print("Starting Python Stock API Server...")
     print("Available endpoints:")
-    print("  - GET /api/stock-data/<stock_code>?period=3mo&interval=1d&force_refresh=false")
+    print("  - GET /api/stock-data/<stock_code>?period=3mo&interval=1d&force_refresh=false&format=candles|columnar&indicators=ma20,rsi,macd,bb")
+    print("  - GET /api/stock-data?codes=005930,035720&period=3mo&interval=1d&format=candles|columnar")
+    print("  - GET /api/stock-stream/<stock_code>?interval=1m (Server-Sent Events)")
+    print("  - GET /api/search-company?query=삼성&limit=10")
+    print("  - GET /api/company-by-code?stock_code=005930")
+    print("  - GET /api/screener?sort=change_pct&order=desc&market=KOSPI|KOSDAQ&min_volume=100000&max_position_52w=0.2&limit=50")
     print("  - GET /health")
+    print("  - GET /metrics (Prometheus)")
     print("  - GET /cache/stats")
     print("  - POST /cache/clear")
     print("  - POST /cache/clear-expired")
+    print("  - POST /symbols/preload")
+    print("  - POST /search/reload")
+    print("  - POST /screener/refresh")
     print(f"  - Server will run on http://localhost:{port}")
     print(f"  - Port from environment: PYTHON_API_PORT={os.getenv('PYTHON_API_PORT', 'not set, using default 5001')}")
     print("")
     print("📦 Cache Configuration:")
-    print("  - Default cache TTL: 15 minutes")
-    print("  - Auto cleanup: 60 minutes")
+    print(f"  - Backend: {os.getenv('STOCK_CACHE_BACKEND', 'memory')} (STOCK_CACHE_BACKEND=memory|redis, REDIS_URL)")
+    print(f"  - Cache TTL: {stock_cache.ttl_seconds / 60:g} minutes (STOCK_CACHE_TTL_MINUTES)")
+    if stock_cache.max_entries is not None:
+        print(f"  - Max entries: {stock_cache.max_entries} (STOCK_CACHE_MAX_ENTRIES)")
+        print(f"  - Max memory: {stock_cache.max_bytes // (1024 * 1024)} MB (STOCK_CACHE_MAX_MB)")
+    print(f"  - Serve stale while revalidating: {SERVE_STALE} (STOCK_SERVE_STALE, up to {stock_cache.stale_ttl_seconds / 60:g} minutes)")
+    print(f"  - Prefetch codes: {os.getenv('STOCK_PREFETCH_CODES', 'none')} + top {refresher.top_n} by access (STOCK_PREFETCH_CODES)")
+    print(f"  - Candle store: {candle_store.path if candle_store is not None else 'disabled'} (STOCK_CANDLE_STORE_PATH)")
+    print(f"  - Base daily series: {BASE_PERIOD} (STOCK_BASE_PERIOD, shorter periods and 1wk/1mo are derived)")
+    print(f"  - Known exchange suffixes: {symbol_resolver.get_stats()['known_codes']} (STOCK_SYMBOL_PRELOAD=true to preload)")
+    print(f"  - Upstream: {UPSTREAM_MODE} (STOCK_UPSTREAM=yfinance|async, STOCK_UPSTREAM_TIMEOUT_SECONDS, STOCK_UPSTREAM_DEADLINE_SECONDS)")
+    scheduler_stats = upstream_scheduler.get_stats()
+    print(f"  - Upstream rate limit: {scheduler_stats['total_rate_per_second']:g}/s server-wide ({scheduler_stats['limit_scope']}: {upstream_scheduler.rate:g}/s, burst {upstream_scheduler.burst} here), force_refresh once per {upstream_scheduler.force_refresh_interval_seconds:g}s per code (STOCK_UPSTREAM_RATE_PER_SECOND, STOCK_UPSTREAM_BURST, STOCK_FORCE_REFRESH_MIN_SECONDS)")
+    print(f"  - Company info: {INFO_MODE} mode, cached {metadata_cache.ttl_seconds / 3600:g} hours (STOCK_INFO_MODE, STOCK_INFO_TTL_HOURS)")
+    print(f"  - JSON encoder: {encoder_name()} (pip install orjson for faster encoding)")
+    print(f"  - Intraday stream: poll every {stream_hub.poll_interval_seconds:g}s per symbol, up to {stream_hub.max_subscribers} subscribers, {('redirected to ' + STREAM_URL) if STREAM_URL else 'served here'} (STOCK_STREAM_POLL_SECONDS, STOCK_STREAM_MAX_SUBSCRIBERS, STOCK_STREAM_URL - run stream_server.py in production)")
+    print(f"  - Company search: in-memory index, reloaded when corpCodes.json changes or every {company_search.max_age_seconds / 60:g} minutes (STOCK_SEARCH_MAX_AGE_MINUTES)")
+    print(f"  - Screener: {screener.batch_size} codes per batch, {screener.max_workers} batches at once, every {screener.refresh_interval_seconds / 60:g} minutes by one worker, shared via {screener.store.path} (STOCK_SCREENER_BATCH_SIZE, STOCK_SCREENER_WORKERS, STOCK_SCREENER_REFRESH_MINUTES, STOCK_SCREENER_STORE_PATH, STOCK_SCREENER_AUTOSTART=true to start at boot)")
+    print(f"  - Logging: {os.getenv('STOCK_LOG_LEVEL', 'INFO').upper()} level, {os.getenv('STOCK_LOG_FORMAT', 'text')} format, tracing {'on' if tracing_enabled() else 'off'} (STOCK_LOG_LEVEL, STOCK_LOG_FORMAT=text|json, STOCK_OTEL_ENABLED)")
     print("  - Force refresh: add ?force_refresh=true")
     
+    if os.getenv('STOCK_SYMBOL_PRELOAD', 'false').lower() == 'true':
+        start_symbol_preload()
+    if os.getenv('STOCK_SCREENER_AUTOSTART', 'false').lower() == 'true':
+        screener.start()
+    
+    # 개발용 단일 프로세스 서버 - 운영 환경은 gunicorn 사용 (gunicorn.conf.py 참고)
     app.run(debug=True, host='0.0.0.0', port=port) 
\ No newline at end of file
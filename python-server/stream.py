@@ -0,0 +1,326 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from candles import hist_to_columns
+from instrumentation import get_logger
+from response_body import dumps
+
+# 분봉 실시간 스트리밍 (Server-Sent Events)
+# - (종목, 간격) 채널마다 업스트림 폴러 스레드 하나만 실행하고 모든 구독자가 결과를 공유
+# - 폴링 결과를 직전 봉 목록과 비교해 새로 생기거나 값이 바뀐 봉만 이벤트로 전송
+# - 이벤트는 채널당 한 번만 인코딩해 순번(seq)과 함께 링 버퍼에 쌓고, 구독자는 자기 순번 이후 이벤트만 읽음
+#   (구독자별 큐가 없어 구독자가 수백 명이어도 발행 비용은 그대로)
+# - 링 버퍼보다 뒤처진 구독자(또는 Last-Event-ID 가 너무 오래된 재접속)는 전체 스냅샷부터 다시 받음
+# - 구독자가 모두 떠나면 idle_seconds 후 폴러 종료
+# - 처음부터 max_empty_polls 번 연속 데이터가 없거나 실패한 종목은 error 이벤트를 보내고 연결을 닫음
+# - subscribe() 는 구독자마다 스레드 하나가 기다리는 제너레이터 (Flask 개발 서버용),
+#   subscribe_async() 는 이벤트 루프에서 기다리는 비동기 제너레이터 (stream_server.py, 연결마다 스레드를 쓰지 않음)
+
+log = get_logger('stream')
+
+BAR_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def hist_to_bars(hist):
+    """history DataFrame 을 {봉 시각(epoch 초): (open, high, low, close, volume)} 로 변환"""
+    if hist is None or hist.empty:
+        return {}
+    columns = hist_to_columns(hist)
+    times = (pd.DatetimeIndex(hist.index).as_unit('ns').asi8 // 10**9).tolist()
+    return dict(zip(times, zip(*(columns[name] for name in BAR_FIELDS))))
+
+
+def diff_bars(previous, current):
+    """새로 생기거나 값이 바뀐 봉만 시각 순으로 반환"""
+    return sorted(t for t, bar in current.items() if previous.get(t) != bar)
+
+
+def _bars_json(bars, times):
+    return [dict(zip(('time', *BAR_FIELDS), (t, *bars[t]))) for t in times]
+
+
+def sse_event(event, data, event_id=None):
+    """SSE 이벤트 한 개를 bytes 로 인코딩"""
+    head = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{head}event: {event}\n".encode() + b'data: ' + dumps(data) + b'\n\n'
+
+
+class _Channel:
+    def __init__(self, key, backlog):
+        self.key = key
+        # 이벤트 ID 는 '채널 생성 시각-순번' (서버 재시작/채널 재생성 후의 Last-Event-ID 는 무시)
+        self.epoch = int(time.time() * 1000)
+        self.cond = threading.Condition()
+        self.events = deque(maxlen=backlog)  # (seq, 인코딩된 이벤트)
+        self.seq = 0
+        self.bars = {}
+        self.snapshot = None  # (seq, 인코딩된 스냅샷 이벤트)
+        self.subscribers = 0
+        self.idle_since = time.monotonic()
+        self.polls = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_poll = None
+        self.empty_polls = 0
+        self.failure = None  # 데이터 없이 종료할 때 보내는 인코딩된 error 이벤트
+        self.stop = threading.Event()
+        self.waiters = set()  # 비동기 구독자의 asyncio Future (발행/종료 시 깨움)
+
+    def notify(self):
+        """기다리는 구독자를 모두 깨움 (cond 를 잡은 상태에서 호출)"""
+        self.cond.notify_all()
+        for future in self.waiters:
+            try:
+                future.get_loop().call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                pass  # 이미 닫힌 이벤트 루프
+        self.waiters.clear()
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class StreamHub:
+    def __init__(self, fetch_fn, poll_interval_seconds=5, idle_seconds=30, backlog=256,
+                 heartbeat_seconds=15, max_subscribers=2000, max_empty_polls=3):
+        """fetch_fn(*key) 는 history DataFrame 을 반환해야 합니다 (예: key = (종목코드, 간격))"""
+        self.fetch_fn = fetch_fn
+        self.poll_interval_seconds = poll_interval_seconds
+        self.idle_seconds = idle_seconds
+        self.backlog = backlog
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_subscribers = max_subscribers
+        self.max_empty_polls = max_empty_polls
+        self._channels = {}
+        self._lock = threading.Lock()
+        self.total_subscribers = 0
+        self.events_published = 0
+        self.snapshots_resent = 0
+
+    def _channel(self, key):
+        """채널 조회, 없으면 만들고 폴러 스레드 시작 (구독자 수 증가 포함)"""
+        with self._lock:
+            if self.total_subscribers >= self.max_subscribers:
+                return None
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = _Channel(key, self.backlog)
+                self._channels[key] = channel
+                threading.Thread(
+                    target=self._poll_loop, args=(channel,), name=f"stream-{'-'.join(map(str, key))}", daemon=True
+                ).start()
+            channel.subscribers += 1
+            self.total_subscribers += 1
+            return channel
+
+    def _release(self, channel):
+        with self._lock:
+            channel.subscribers -= 1
+            self.total_subscribers -= 1
+            if channel.subscribers == 0:
+                channel.idle_since = time.monotonic()
+
+    def _poll_loop(self, channel):
+        """채널 폴러 - 주기적으로 업스트림을 조회해 바뀐 봉만 발행"""
+        while not channel.stop.is_set():
+            with self._lock:
+                if channel.subscribers == 0 and time.monotonic() - channel.idle_since >= self.idle_seconds:
+                    del self._channels[channel.key]
+                    channel.stop.set()
+                    break
+            try:
+                self.poll_once(channel)
+            except Exception as e:
+                channel.errors += 1
+                channel.last_error = str(e)
+                log.warning("Stream poll failed for %s: %s", channel.key, e)
+            if channel.snapshot is None:
+                channel.empty_polls += 1
+                if channel.empty_polls >= self.max_empty_polls:
+                    self._fail(channel)
+                    break
+            channel.stop.wait(self.poll_interval_seconds)
+
+        # 남아 있는 구독자 연결 종료
+        with channel.cond:
+            channel.notify()
+
+    def _fail(self, channel):
+        """한 번도 데이터를 받지 못한 채널 종료 - 구독자에게 error 이벤트를 보내고 연결을 닫게 함"""
+        code, interval = channel.key[0], channel.key[1]
+        message = channel.last_error or f"종목코드 {code}의 {interval} 분봉 데이터를 찾을 수 없습니다"
+        log.info("Closing stream %s after %d polls without data", channel.key, channel.empty_polls)
+        with self._lock:
+            if self._channels.get(channel.key) is channel:
+                del self._channels[channel.key]
+        with channel.cond:
+            channel.failure = sse_event('error', {
+                'stock_code': code, 'interval': interval,
+                'code': 502 if channel.last_error else 404, 'message': message,
+            })
+            channel.stop.set()
+            channel.notify()
+
+    def poll_once(self, channel):
+        """업스트림 한 번 조회 후 새로 생기거나 바뀐 봉을 이벤트로 발행"""
+        bars = hist_to_bars(self.fetch_fn(*channel.key))
+        channel.polls += 1
+        channel.last_poll = time.time()
+        changed = diff_bars(channel.bars, bars)
+        if not changed:
+            # 바뀐 봉이 없거나 아직 데이터가 없음 (빈 스냅샷은 보내지 않음 - 데이터 없는 종목은 _fail 로 종료)
+            return 0
+
+        code, interval = channel.key[0], channel.key[1]
+        with channel.cond:
+            channel.seq += 1
+            seq = channel.seq
+            channel.events.append((seq, sse_event('bars', {
+                'stock_code': code, 'interval': interval, 'bars': _bars_json(bars, changed),
+            }, f"{channel.epoch}-{seq}")))
+            channel.bars = bars
+            channel.snapshot = (seq, sse_event('snapshot', {
+                'stock_code': code, 'interval': interval, 'bars': _bars_json(bars, sorted(bars)),
+            }, f"{channel.epoch}-{seq}"))
+            channel.notify()
+        self.events_published += 1
+        return len(changed)
+
+    def subscribe(self, key, last_event_id=None):
+        """구독 시작 - SSE bytes 를 내보내는 제너레이터 반환, 구독자 한도를 넘으면 None
+
+        처음(또는 Last-Event-ID 이후 이벤트가 버퍼에 없으면)에는 전체 스냅샷을 보내고, 이후에는 바뀐 봉만 보냅니다.
+        """
+        if not self._has_room():
+            return None
+        return self._stream(key, last_event_id)
+
+    def subscribe_async(self, key, last_event_id=None):
+        """subscribe() 의 비동기 제너레이터 버전 - 이벤트 루프에서 기다리므로 연결마다 스레드를 쓰지 않음"""
+        if not self._has_room():
+            return None
+        return self._stream_async(key, last_event_id)
+
+    def _has_room(self):
+        with self._lock:
+            return self.total_subscribers < self.max_subscribers
+
+    @staticmethod
+    def _resume_seq(channel, last_event_id):
+        """Last-Event-ID 가 같은 채널의 이벤트면 그 순번, 아니면 None (스냅샷부터 전송)"""
+        epoch, _, seq = (last_event_id or '').partition('-')
+        if epoch != str(channel.epoch) or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def _ready(self, channel, last_seq):
+        return channel.stop.is_set() or (channel.snapshot is not None and channel.seq != last_seq)
+
+    def _next_chunk(self, channel, last_seq):
+        """last_seq 이후 보낼 (순번, bytes) - cond 를 잡은 상태에서 _ready() 일 때 호출"""
+        if last_seq is None or not channel.events or channel.events[0][0] > last_seq + 1 or last_seq > channel.seq:
+            # 처음 구독했거나 버퍼보다 뒤처졌으면 전체 스냅샷
+            if last_seq is not None:
+                self.snapshots_resent += 1
+            return channel.snapshot
+        return channel.seq, b''.join(event for seq, event in channel.events if seq > last_seq)
+
+    def _stream(self, key, last_event_id):
+        # 구독자 등록은 첫 전송 시점에 (응답이 시작되기 전에 끊긴 연결은 집계하지 않음)
+        channel = self._channel(key)
+        if channel is None:
+            # subscribe() 확인 이후 다른 연결이 먼저 자리를 차지한 경우
+            yield sse_event('error', {'code': 503, 'message': 'too many stream subscribers'})
+            return
+        try:
+            yield f"retry: {int(self.poll_interval_seconds * 1000)}\n\n".encode()
+            last_seq = self._resume_seq(channel, last_event_id)
+            while not channel.stop.is_set():
+                with channel.cond:
+                    ready = channel.cond.wait_for(lambda: self._ready(channel, last_seq), timeout=self.heartbeat_seconds)
+                    if channel.stop.is_set():
+                        break
+                    if ready:
+                        last_seq, chunk = self._next_chunk(channel, last_seq)
+                    else:
+                        chunk = b': keepalive\n\n'
+                # 소켓 쓰기는 잠금 밖에서 (느린 구독자가 다른 구독자를 막지 않도록)
+                yield chunk
+            if channel.failure is not None:
+                yield channel.failure
+        finally:
+            self._release(channel)
+
+    async def _stream_async(self, key, last_event_id):
+        channel = self._channel(key)
+        if channel is None:
+            yield sse_event('error', {'code': 503, 'message': 'too many stream subscribers'})
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            yield f"retry: {int(self.poll_interval_seconds * 1000)}\n\n".encode()
+            last_seq = self._resume_seq(channel, last_event_id)
+            while not channel.stop.is_set():
+                with channel.cond:
+                    ready = self._ready(channel, last_seq)
+                    if ready:
+                        if channel.stop.is_set():
+                            break
+                        last_seq, chunk = self._next_chunk(channel, last_seq)
+                    else:
+                        # 폴러 스레드가 발행할 때 notify() 로 깨움
+                        waiter = loop.create_future()
+                        channel.waiters.add(waiter)
+                if not ready:
+                    try:
+                        await asyncio.wait_for(waiter, self.heartbeat_seconds)
+                        continue
+                    except asyncio.TimeoutError:
+                        with channel.cond:
+                            channel.waiters.discard(waiter)
+                        chunk = b': keepalive\n\n'
+                yield chunk
+            if channel.failure is not None:
+                yield channel.failure
+        finally:
+            self._release(channel)
+
+    def close(self):
+        """모든 폴러 종료"""
+        with self._lock:
+            channels = list(self._channels.values())
+            self._channels.clear()
+        for channel in channels:
+            channel.stop.set()
+            with channel.cond:
+                channel.notify()
+
+    def get_stats(self):
+        """스트리밍 통계"""
+        with self._lock:
+            channels = {
+                ':'.join(map(str, key)): {
+                    'subscribers': channel.subscribers,
+                    'polls': channel.polls,
+                    'errors': channel.errors,
+                    'last_error': channel.last_error,
+                    'last_seq': channel.seq,
+                    'bars': len(channel.bars),
+                }
+                for key, channel in self._channels.items()
+            }
+            return {
+                'channels': len(channels),
+                'subscribers': self.total_subscribers,
+                'max_subscribers': self.max_subscribers,
+                'events_published': self.events_published,
+                'snapshots_resent': self.snapshots_resent,
+                'poll_interval_seconds': self.poll_interval_seconds,
+                'by_channel': channels,
+            }
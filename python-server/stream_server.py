@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import threading
+from datetime import datetime
+
+from aiohttp import web
+
+# 분봉 실시간 스트리밍(SSE) 전용 서버 - /api/stock-stream/<종목코드> 만 제공
+# 실행: cd python-server && python stream_server.py  (포트 STOCK_STREAM_PORT, 기본 5002)
+#
+# - gthread 워커에서 SSE 를 제공하면 연결마다 워커 스레드 하나를 점유하므로 스트리밍은 이벤트 루프 하나로 처리하는 별도 프로세스에서 제공
+#   (연결은 asyncio 태스크 - 스레드는 (종목, 간격)마다 업스트림 폴러 하나뿐)
+# - stock_api 의 StreamHub / 업스트림 호출 한도 / 접미사 해석기를 그대로 사용
+# - gunicorn 앱은 STOCK_STREAM_URL 이 설정되면 /api/stock-stream 요청을 이 서버로 리다이렉트(307)
+
+# 업스트림 호출 한도는 gunicorn 워커들과 이 프로세스가 나눠 씀 (워커 수 기본값은 gunicorn.conf.py 와 같음)
+os.environ.setdefault('STOCK_WORKER_PROCESSES', str(
+    int(os.getenv('GUNICORN_WORKERS', min(4, multiprocessing.cpu_count() * 2 + 1))) + 1
+))
+# 캐시 프리페치는 gunicorn 워커가 담당
+os.environ.setdefault('STOCK_PREFETCH_SCAN_SECONDS', '0')
+
+from response_body import dumps  # noqa: E402
+from stock_api import STREAM_INTERVALS, stream_hub  # noqa: E402
+from stream import StreamHub  # noqa: E402
+
+HUB = web.AppKey('stream_hub', StreamHub)
+
+# 다른 포트(출처)에서 EventSource 로 구독하므로 CORS 허용
+CORS_HEADERS = {'Access-Control-Allow-Origin': '*'}
+
+
+def _json_response(data, status=200):
+    return web.Response(body=dumps(data), status=status, content_type='application/json', headers=CORS_HEADERS)
+
+
+def _error(code, message):
+    return _json_response({'success': False, 'error': {'code': code, 'message': message}}, code)
+
+
+async def stream_stock_data(request):
+    """분봉 실시간 스트리밍 (text/event-stream) - 처음에 snapshot, 이후 새로 생기거나 바뀐 봉만 bars 이벤트로 전송"""
+    hub = request.app[HUB]
+    stock_code = request.match_info['stock_code']
+    interval = request.query.get('interval', '1m')
+    if interval not in STREAM_INTERVALS:
+        return _error(400, f"interval 은 {', '.join(STREAM_INTERVALS)} 중 하나여야 합니다")
+
+    # 재접속 시 브라우저가 보내는 Last-Event-ID 이후 이벤트만 전송 (버퍼에 없으면 스냅샷부터)
+    stream = hub.subscribe_async((stock_code, interval), request.headers.get('Last-Event-ID'))
+    if stream is None:
+        return _error(503, '스트리밍 구독자 수가 한도를 넘었습니다. 잠시 후 다시 시도해주세요.')
+
+    response = web.StreamResponse(headers={
+        **CORS_HEADERS,
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # 프록시(nginx) 버퍼링 해제
+    })
+    await response.prepare(request)
+    try:
+        async for chunk in stream:
+            await response.write(chunk)
+    except ConnectionResetError:
+        # 구독자가 연결을 끊음 (다음 이벤트/keepalive 전송 시 확인)
+        pass
+    finally:
+        await stream.aclose()
+    return response
+
+
+async def health_check(request):
+    return _json_response({
+        'status': 'healthy',
+        'server': 'Python Stock Stream Server',
+        'timestamp': datetime.now().isoformat(),
+        'threads': threading.active_count(),
+        'stream_stats': request.app[HUB].get_stats(),
+    })
+
+
+def make_app(hub=None):
+    """스트리밍 서버 aiohttp 앱 (hub 를 주지 않으면 stock_api 의 StreamHub 사용)"""
+    app = web.Application()
+    app[HUB] = hub if hub is not None else stream_hub
+    app.router.add_get('/api/stock-stream/{stock_code}', stream_stock_data)
+    app.router.add_get('/health', health_check)
+
+    async def close_hub(app):
+        app[HUB].close()
+
+    app.on_shutdown.append(close_hub)
+    return app
+
+
+if __name__ == '__main__':
+    port = int(os.getenv('STOCK_STREAM_PORT', 5002))
+    print("Starting Python Stock Stream Server...")
+    print("  - GET /api/stock-stream/<stock_code>?interval=1m (Server-Sent Events)")
+    print("  - GET /health")
+    print(f"  - Server will run on http://localhost:{port} (STOCK_STREAM_PORT)")
+    print(f"  - Poll every {stream_hub.poll_interval_seconds:g}s per symbol, up to {stream_hub.max_subscribers} subscribers (STOCK_STREAM_POLL_SECONDS, STOCK_STREAM_MAX_SUBSCRIBERS)")
+    print(f"  - Upstream rate limit share: 1 of {os.environ['STOCK_WORKER_PROCESSES']} processes (STOCK_WORKER_PROCESSES)")
+    web.run_app(make_app(), host='0.0.0.0', port=port, print=None)
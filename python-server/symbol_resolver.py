@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import SYMBOL_PROBES, get_logger, stage
+
+# 6자리 종목코드의 거래소 접미사(.KS 코스피 / .KQ 코스닥) 해석기
+# - 한 번 확인된 접미사는 메모리 + SQLite 에 저장해 재시작 후에도 재사용
+# - 모르는 종목은 .KS/.KQ 를 동시에 조회해 순차 재시도(.KS 실패 -> .KQ)를 없앰
+# - 상장 종목 목록을 yf.download 일괄 조회로 미리 해석(preload) 가능
+
+log = get_logger('symbol_resolver')
+
+KRX_SUFFIXES = ('.KS', '.KQ')
+
+
+def is_krx_code(stock_code):
+    """6자리 숫자 종목코드 여부"""
+    return stock_code.isdigit() and len(stock_code) == 6
+
+
+def has_rows(frame):
+    return frame is not None and not frame.empty
+
+
+class SymbolResolver:
+    def __init__(self, path=None):
+        self.path = path
+        self._suffixes = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self.resolved_hits = 0
+        self.probes = 0
+        self.preloaded = 0
+        self.preload_running = False
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS symbol_suffixes ('
+                ' stock_code TEXT PRIMARY KEY, suffix TEXT NOT NULL, updated_at REAL NOT NULL)'
+            )
+            for stock_code, suffix in self._conn.execute('SELECT stock_code, suffix FROM symbol_suffixes'):
+                self._suffixes[stock_code] = suffix
+
+    def known_suffix(self, stock_code):
+        """저장된 접미사 조회 (모르면 None)"""
+        return self._suffixes.get(stock_code)
+
+    def candidates(self, stock_code):
+        """조회할 yfinance 심볼 후보 목록 (접미사를 알면 1개, 모르면 .KS/.KQ 2개)"""
+        if not is_krx_code(stock_code):
+            return [stock_code]
+        suffix = self._suffixes.get(stock_code)
+        if suffix is not None:
+            self.resolved_hits += 1
+            return [f"{stock_code}{suffix}"]
+        return [f"{stock_code}{s}" for s in KRX_SUFFIXES]
+
+    def needs_probe(self, stock_code):
+        """접미사를 몰라 .KS/.KQ 를 동시에 조회(탐색)해야 하는지 여부"""
+        return is_krx_code(stock_code) and stock_code not in self._suffixes
+
+    def resolve(self, stock_code):
+        """가장 유력한 심볼 하나 반환 (모르면 .KS)"""
+        return self.candidates(stock_code)[0]
+
+    def remember_many(self, symbols):
+        """데이터가 확인된 심볼들의 접미사 저장"""
+        updates = []
+        with self._lock:
+            for symbol in symbols:
+                stock_code, dot, suffix = symbol.partition('.')
+                suffix = dot + suffix
+                if is_krx_code(stock_code) and suffix in KRX_SUFFIXES and self._suffixes.get(stock_code) != suffix:
+                    self._suffixes[stock_code] = suffix
+                    updates.append((stock_code, suffix, time.time()))
+            if updates and self._conn is not None:
+                self._conn.executemany('INSERT OR REPLACE INTO symbol_suffixes VALUES (?, ?, ?)', updates)
+        return len(updates)
+
+    def remember(self, symbol):
+        """데이터가 확인된 심볼의 접미사 저장"""
+        return self.remember_many([symbol])
+
+    def forget(self, stock_code):
+        """저장된 접미사가 더 이상 맞지 않을 때(이전 상장 등) 삭제"""
+        with self._lock:
+            if self._suffixes.pop(stock_code, None) is not None and self._conn is not None:
+                self._conn.execute('DELETE FROM symbol_suffixes WHERE stock_code = ?', (stock_code,))
+
+    def fetch_first_available(self, stock_code, fetch_fn):
+        """후보 심볼을 동시에 조회해 데이터가 있는 첫 후보의 (심볼, 결과) 반환
+
+        fetch_fn(symbol) 은 DataFrame 을 반환해야 하며, 모든 후보가 비어 있으면 (None, None),
+        모든 후보가 오류면 첫 오류를 다시 발생시킵니다.
+        탐색 중에는 빈 결과가 곧 '그 시장에 없음'이므로 fetch_fn 은 재시도하지 않아야 합니다 (needs_probe 참고).
+        """
+        symbols = self.candidates(stock_code)
+        if len(symbols) == 1:
+            result = fetch_fn(symbols[0])
+            if has_rows(result):
+                return symbols[0], result
+            # 저장된 접미사로 데이터가 없으면 다음 요청에서 다시 탐색
+            if is_krx_code(stock_code):
+                self.forget(stock_code)
+            return None, None
+
+        self.probes += 1
+        log.debug("Probing %s concurrently", ', '.join(symbols))
+        # 접미사를 모를 때의 .KS/.KQ 동시 조회 (예전의 .KS 실패 -> .KQ 재시도에 해당)
+        with stage('kq_fallback'), ThreadPoolExecutor(max_workers=len(symbols)) as executor:
+            futures = [executor.submit(fetch_fn, symbol) for symbol in symbols]
+            results = []
+            errors = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    log.warning("Probe failed: %s", e)
+                    results.append(None)
+                    errors.append(e)
+
+        for symbol, result in zip(symbols, results):
+            if has_rows(result):
+                self.remember(symbol)
+                SYMBOL_PROBES.inc(symbol[len(stock_code):] or 'other')
+                return symbol, result
+        # 모든 후보가 오류였으면 '데이터 없음'이 아니므로 오류를 그대로 전달
+        if len(errors) == len(symbols):
+            SYMBOL_PROBES.inc('error')
+            raise errors[0]
+        SYMBOL_PROBES.inc('none')
+        return None, None
+
+    def preload(self, stock_codes, download_fn, chunk_size=200):
+        """종목코드 목록의 접미사를 일괄 조회로 해석, 새로 해석한 개수 반환
+
+        download_fn(symbols) 는 yf.download(..., group_by='ticker') 형태의 DataFrame 을 반환해야 합니다.
+        """
+        unknown = [code for code in stock_codes if is_krx_code(code) and code not in self._suffixes]
+        resolved = 0
+        self.preload_running = True
+        try:
+            for i in range(0, len(unknown), chunk_size):
+                chunk = unknown[i:i + chunk_size]
+                remaining = chunk
+                for suffix in KRX_SUFFIXES:
+                    if not remaining:
+                        break
+                    symbols = [f"{code}{suffix}" for code in remaining]
+                    try:
+                        data = download_fn(symbols)
+                    except Exception as e:
+                        log.warning("Symbol preload failed for %d symbols: %s", len(symbols), e)
+                        continue
+                    found = [symbol for symbol in symbols if _bulk_has_rows(data, symbol)]
+                    resolved += self.remember_many(found)
+                    found_codes = {symbol.split('.')[0] for symbol in found}
+                    remaining = [code for code in remaining if code not in found_codes]
+        finally:
+            self.preload_running = False
+        self.preloaded += resolved
+        log.info("Symbol preload resolved %d of %d unknown codes", resolved, len(unknown))
+        return resolved
+
+    def get_stats(self):
+        """접미사 해석 통계 조회"""
+        with self._lock:
+            kospi = sum(1 for suffix in self._suffixes.values() if suffix == '.KS')
+            total = len(self._suffixes)
+        return {
+            'path': self.path,
+            'known_codes': total,
+            'kospi': kospi,
+            'kosdaq': total - kospi,
+            'resolved_hits': self.resolved_hits,
+            'probes': self.probes,
+            'preloaded': self.preloaded,
+            'preload_running': self.preload_running,
+        }
+
+
+def _bulk_has_rows(data, symbol):
+    """yf.download 다중 종목 결과에 해당 심볼의 값이 있는지 확인"""
+    if data is None or data.empty:
+        return False
+    try:
+        frame = data[symbol] if symbol in data.columns.get_level_values(0) else None
+    except (KeyError, AttributeError):
+        return False
+    return frame is not None and bool(frame['Close'].notna().any())
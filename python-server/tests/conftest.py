@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# python-server 모듈을 import 할 수 있도록 경로 추가
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# stock_api 는 import 시 SQLite 저장소와 백그라운드 스레드를 만들므로 테스트용 임시 경로/설정 사용
+_DATA_DIR = tempfile.mkdtemp(prefix='stock-api-tests-')
+os.environ.setdefault('STOCK_LOG_LEVEL', 'WARNING')
+os.environ.setdefault('STOCK_CANDLE_STORE_PATH', os.path.join(_DATA_DIR, 'candles.sqlite'))
+os.environ.setdefault('STOCK_SYMBOL_CACHE_PATH', os.path.join(_DATA_DIR, 'symbols.sqlite'))
+os.environ.setdefault('STOCK_INFO_CACHE_PATH', os.path.join(_DATA_DIR, 'metadata.sqlite'))
+os.environ.setdefault('STOCK_SCREENER_STORE_PATH', os.path.join(_DATA_DIR, 'screener.sqlite'))
+os.environ.setdefault('STOCK_PREFETCH_SCAN_SECONDS', '0')
+os.environ.setdefault('STOCK_UPSTREAM_RATE_PER_SECOND', '0')
@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import sys
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chart_arrays import DEFAULT_BASE_URL, USER_AGENT
+
+# 주봉/월봉 비교 테스트용 Yahoo chart API 응답 녹화 (네트워크 필요)
+#
+#   cd python-server && python tests/fixtures/record_yahoo.py 005930.KS --start 2024-08-01 --end 2024-11-01
+#
+# 같은 구간의 1d/1wk/1mo 원본 응답을 tests/fixtures/yahoo/<심볼>_<시작>_<끝>.json 으로 저장합니다.
+# 시작/끝은 월 경계로, 시작/끝 주가 일부만 포함되고 공휴일이 낀 주가 있는 구간을 고르세요.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yahoo')
+INTERVALS = ('1d', '1wk', '1mo')
+
+
+def fetch_chart(symbol, interval, start, end, timezone):
+    params = {
+        'interval': interval,
+        'period1': int(pd.Timestamp(start, tz=timezone).timestamp()),
+        'period2': int(pd.Timestamp(end, tz=timezone).timestamp()),
+        'includePrePost': 'false',
+        'events': 'div,splits',
+    }
+    url = f"{DEFAULT_BASE_URL}/v8/finance/chart/{symbol}?{urllib.parse.urlencode(params)}"
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT, 'Accept': 'application/json'})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record Yahoo 1d/1wk/1mo chart responses for the same range')
+    parser.add_argument('symbol')
+    parser.add_argument('--start', required=True, help='YYYY-MM-DD (inclusive)')
+    parser.add_argument('--end', required=True, help='YYYY-MM-DD (exclusive)')
+    parser.add_argument('--timezone', default='Asia/Seoul')
+    args = parser.parse_args()
+
+    fixture = {
+        'symbol': args.symbol,
+        'start': args.start,
+        'end': args.end,
+        'source': 'recorded from the Yahoo chart API',
+        'charts': {interval: fetch_chart(args.symbol, interval, args.start, args.end, args.timezone)
+                   for interval in INTERVALS},
+    }
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    output = os.path.join(FIXTURE_DIR, f"{args.symbol}_{args.start}_{args.end}.json")
+    with open(output, 'w') as f:
+        json.dump(fixture, f, separators=(',', ':'))
+    print(f"Recorded {args.symbol} {args.start}~{args.end} to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from candle_store import CandleStore
+from indicators import IndicatorStore
+
+SYMBOL = '005930.KS'
+
+
+class FakeTicker:
+    """history 호출을 기록하고 bars 를 (start 가 있으면 그 날짜부터) 돌려주는 ticker"""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def history(self, period=None, interval='1d', start=None, actions=True):
+        self.calls.append({'period': period, 'start': start, 'actions': actions})
+        if start is None:
+            return self.bars.copy()
+        return self.bars[self.bars.index >= pd.Timestamp(start, tz=self.bars.index.tz)].copy()
+
+
+def make_bars(days=20):
+    index = pd.bdate_range(end=pd.Timestamp.now(tz='Asia/Seoul').normalize(), periods=days, name='Date')
+    close = 70000 + np.arange(days) * 100.0
+    return pd.DataFrame({
+        'Open': close - 50, 'High': close + 100, 'Low': close - 100, 'Close': close,
+        'Volume': np.full(days, 1000.0), 'Dividends': 0.0, 'Stock Splits': 0.0,
+    }, index=index)
+
+
+@pytest.fixture
+def stores(tmp_path):
+    candle_store = CandleStore(str(tmp_path / 'candles.sqlite'))
+    indicator_store = IndicatorStore(candle_store)
+    return candle_store, indicator_store
+
+
+def seed(candle_store, indicator_store, bars):
+    """전체 조회로 저장소를 채우고 지표 하나를 계산해 둠"""
+    candle_store.load_history(FakeTicker(bars), SYMBOL, '1mo', '1d')
+    indicator_store.update(SYMBOL, '1d', 'sma5')
+    assert indicator_store.get_stats()['series'] == 1
+
+
+def test_incremental_fetch_requests_actions_and_keeps_series(stores):
+    candle_store, indicator_store = stores
+    bars = make_bars()
+    seed(candle_store, indicator_store, bars.iloc[:-1])
+
+    ticker = FakeTicker(bars)
+    hist = candle_store.load_history(ticker, SYMBOL, '1mo', '1d')
+
+    # 직전 완성 봉(겹치는 봉)부터 배당/분할 포함 조회
+    assert ticker.calls == [{'period': None, 'start': bars.index[-3].strftime('%Y-%m-%d'), 'actions': True}]
+    assert len(hist) == len(bars)
+    assert candle_store.adjustment_refetches == 0
+    assert indicator_store.get_stats()['series'] == 1
+
+
+def test_split_in_new_bars_refetches_full_series_and_drops_indicators(stores):
+    candle_store, indicator_store = stores
+    bars = make_bars()
+    seed(candle_store, indicator_store, bars.iloc[:-1])
+
+    # 마지막 새 봉에서 1:2 분할 - 과거 수정 주가가 모두 절반으로
+    adjusted = bars.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] /= 2
+    adjusted.iloc[-1, adjusted.columns.get_loc('Stock Splits')] = 2.0
+    ticker = FakeTicker(adjusted)
+    hist = candle_store.load_history(ticker, SYMBOL, '1mo', '1d')
+
+    assert [call['period'] for call in ticker.calls] == [None, '1mo']
+    assert candle_store.adjustment_refetches == 1
+    assert indicator_store.get_stats()['series'] == 0
+    stored = candle_store.read(SYMBOL, '1d')
+    np.testing.assert_allclose(stored['Close'].to_numpy(), adjusted['Close'].to_numpy())
+    assert len(hist) == len(adjusted)
+
+
+def test_changed_overlap_close_refetches_full_series(stores):
+    candle_store, indicator_store = stores
+    bars = make_bars()
+    seed(candle_store, indicator_store, bars.iloc[:-1])
+
+    # 배당락으로 과거 수정 종가가 조금씩 내려감 (새 봉에는 배당 표시 없음)
+    adjusted = bars.copy()
+    adjusted.iloc[:-1, adjusted.columns.get_indexer(['Open', 'High', 'Low', 'Close'])] *= 0.99
+    ticker = FakeTicker(adjusted)
+    candle_store.load_history(ticker, SYMBOL, '1mo', '1d')
+
+    assert [call['period'] for call in ticker.calls] == [None, '1mo']
+    assert candle_store.adjustment_refetches == 1
+    assert indicator_store.get_stats()['series'] == 0
+    np.testing.assert_allclose(candle_store.read(SYMBOL, '1d')['Close'].to_numpy(), adjusted['Close'].to_numpy())
+
+
+def test_action_on_already_stored_bar_does_not_refetch(stores):
+    candle_store, indicator_store = stores
+    bars = make_bars()
+    bars.iloc[-2, bars.columns.get_loc('Dividends')] = 361.0
+    seed(candle_store, indicator_store, bars)
+
+    # 이미 반영된 배당이 겹치는 봉에 다시 보여도 전체 조회하지 않음
+    ticker = FakeTicker(bars)
+    candle_store.load_history(ticker, SYMBOL, '1mo', '1d')
+
+    assert [call['period'] for call in ticker.calls] == [None]
+    assert candle_store.adjustment_refetches == 0
+    assert indicator_store.get_stats()['series'] == 1
@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from candles import hist_to_columns
+
+
+def test_time_column_uses_exchange_local_date():
+    # 자정(현지) 봉과 장중 분봉 모두 UTC 가 아닌 거래소 현지 날짜로 표시
+    index = pd.DatetimeIndex(['2024-01-02 00:00', '2024-01-02 15:20', '2024-12-31 09:00']).tz_localize('Asia/Seoul')
+    hist = pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1.0}, index=index)
+
+    assert hist_to_columns(hist)['time'] == ['2024-01-02', '2024-01-02', '2024-12-31']
+
+
+def test_time_column_matches_strftime():
+    index = pd.date_range('2020-01-01', periods=1000, freq='7h', tz='America/New_York')
+    hist = pd.DataFrame({name: np.arange(1000.0) for name in ('Open', 'High', 'Low', 'Close', 'Volume')}, index=index)
+
+    assert hist_to_columns(hist)['time'] == index.strftime('%Y-%m-%d').tolist()
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from screener import Screener
+from screener_store import ScreenerStore
+from symbol_resolver import SymbolResolver
+
+COMPANIES = [{'stock_code': f"{i:06d}", 'corp_name': f"회사{i}"} for i in range(1, 11)]
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class FakeDownload:
+    """호출한 심볼 목록을 기록하고 .KS 심볼마다 20일 일봉을 돌려주는 일괄 조회"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, symbols):
+        self.calls.append(list(symbols))
+        found = [symbol for symbol in symbols if symbol.endswith('.KS')]
+        if not found:
+            return pd.DataFrame()
+        index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=20).tz_localize('Asia/Seoul')
+        close = 10000 + np.arange(20, dtype=np.float64) * 10
+        values = np.hstack([np.column_stack([close, close + 50, close - 50, close, np.full(20, 1000.0)])
+                            for _ in found])
+        return pd.DataFrame(values, index=index, columns=pd.MultiIndex.from_product([found, FIELDS]))
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """같은 저장소 파일을 쓰는 워커 프로세스 두 개 흉내 (저장소 객체가 따로라 잠금도 따로)"""
+    path = str(tmp_path / 'screener.sqlite')
+    made = []
+
+    def make():
+        download = FakeDownload()
+        screener = Screener(download, SymbolResolver(None), loader=lambda: COMPANIES, batch_size=5,
+                            refresh_interval_seconds=900, store=ScreenerStore(path))
+        made.append(screener)
+        return screener, download
+
+    yield make
+    for screener in made:
+        screener.store.release()
+
+
+def test_only_leader_refreshes_and_followers_load_published_table(workers):
+    leader, leader_download = workers()
+    follower, follower_download = workers()
+
+    leader._tick()
+    follower._tick()
+
+    assert (leader.role, follower.role) == ('leader', 'follower')
+    assert len(leader_download.calls) == 2 and follower_download.calls == []
+    assert follower.table.version == leader.table.version
+    assert follower.table.rows(np.arange(3)) == leader.table.rows(np.arange(3))
+
+    # 주기 안에서는 다시 갱신하지 않음
+    leader._tick()
+    assert len(leader_download.calls) == 2
+
+
+def test_restarted_worker_serves_published_table_without_refreshing(workers):
+    first, _ = workers()
+    first._tick()
+    first.store.release()
+
+    restarted, download = workers()
+    restarted._tick()
+
+    # 잠금은 이어받지만 게시된 테이블이 아직 새로우므로 업스트림 조회 없음
+    assert restarted.role == 'leader'
+    assert download.calls == []
+    assert restarted.table.version == first.table.version
+
+
+def test_refresh_request_from_follower_runs_on_leader(workers):
+    leader, leader_download = workers()
+    follower, follower_download = workers()
+    leader._tick()
+    follower._tick()
+    built_at = leader.table.built_at
+
+    follower.stop()  # 백그라운드 스레드는 첫 확인 후 종료
+    assert follower.request_refresh() == 'Screener refresh requested from the refreshing worker'
+    leader._tick()
+    follower.sync()
+
+    assert len(leader_download.calls) == 4 and follower_download.calls == []
+    assert follower.table.built_at == leader.table.built_at > built_at
+
+
+def test_follower_takes_over_when_leader_exits(workers):
+    leader, _ = workers()
+    follower, download = workers()
+    leader._tick()
+    follower._tick()
+    leader.store.release()
+
+    follower._tick()
+
+    assert follower.role == 'leader'
+    assert download.calls == []
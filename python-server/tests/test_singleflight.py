@@ -0,0 +1,175 @@
+import threading
+
+import pytest
+
+from singleflight import JoinTimeout, SingleFlight
+
+CLIENTS = 16
+
+
+def run_concurrently(count, fn):
+    """count 개 스레드가 동시에 fn() 을 호출하고 (결과 목록, 예외 목록) 반환"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results, errors
+
+
+class CountingFetcher:
+    """호출 수를 세고, 모든 호출자가 대기열에 들어올 때까지 결과를 늦추는 업스트림 대역"""
+
+    def __init__(self, flight, waiters, result=None, error=None):
+        self.flight = flight
+        self.waiters = waiters
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        # 나머지 호출자가 모두 진행 중인 호출에 합류할 때까지 대기 (합류하지 못하면 따로 호출해 calls 가 늘어남)
+        for _ in range(1000):
+            if self.flight.get_stats()['shared_results'] >= self.waiters:
+                break
+            threading.Event().wait(0.005)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_misses_share_one_call():
+    flight = SingleFlight()
+    result = object()
+    fetcher = CountingFetcher(flight, CLIENTS - 1, result=result)
+
+    results, errors = run_concurrently(CLIENTS, lambda: flight.do(('005930', '3mo', '1d'), fetcher))
+
+    assert fetcher.calls == 1
+    assert errors == [None] * CLIENTS
+    assert all(r is result for r in results)
+    assert flight.get_stats() == {'in_flight': 0, 'executions': 1, 'shared_results': CLIENTS - 1, 'join_timeouts': 0}
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    error = RuntimeError('upstream failed')
+    fetcher = CountingFetcher(flight, CLIENTS - 1, error=error)
+
+    results, errors = run_concurrently(CLIENTS, lambda: flight.do('key', fetcher))
+
+    assert fetcher.calls == 1
+    assert all(e is error for e in errors)
+    # 실패한 키는 남지 않으므로 다음 호출은 다시 실행
+    assert flight.in_flight() == 0
+    with pytest.raises(RuntimeError):
+        flight.do('key', fetcher)
+    assert fetcher.calls == 2
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(key):
+        with lock:
+            calls.append(key)
+        return key
+
+    results, _ = run_concurrently(CLIENTS, lambda: flight.do(threading.get_ident(), lambda: fetch(threading.get_ident())))
+
+    assert len(calls) == CLIENTS
+    assert len(set(results)) == CLIENTS
+
+
+def test_load_stock_data_coalesces_concurrent_misses(monkeypatch):
+    import stock_api
+
+    result = (b'{"success":true', 'version', 0.0)
+    baseline = stock_api.inflight_fetches.get_stats()['shared_results']
+    fetcher = CountingFetcher(stock_api.inflight_fetches, baseline + CLIENTS - 1, result=result)
+    requested = []
+
+    def fake_fetch(*key):
+        requested.append(key)
+        return fetcher()
+
+    monkeypatch.setattr(stock_api, 'fetch_stock_data', fake_fetch)
+
+    results, errors = run_concurrently(CLIENTS, lambda: stock_api.load_stock_data('005930', '3mo', '1d'))
+
+    assert fetcher.calls == 1
+    assert requested == [('005930', '3mo', '1d', 'candles', ())]
+    assert errors == [None] * CLIENTS
+    assert all(r is result for r in results)
+
+
+def test_load_stock_data_propagates_error_to_waiters(monkeypatch):
+    import stock_api
+
+    error = RuntimeError('yfinance down')
+    baseline = stock_api.inflight_fetches.get_stats()['shared_results']
+    fetcher = CountingFetcher(stock_api.inflight_fetches, baseline + CLIENTS - 1, error=error)
+    monkeypatch.setattr(stock_api, 'fetch_stock_data', lambda *key: fetcher())
+
+    results, errors = run_concurrently(CLIENTS, lambda: stock_api.load_stock_data('000660', '1y', '1d'))
+
+    assert fetcher.calls == 1
+    assert all(e is error for e in errors)
+
+
+def test_joiner_gives_up_after_its_own_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=('key', lambda: release.wait(5)))
+    leader.start()
+    while not flight.in_flight():
+        threading.Event().wait(0.001)
+
+    # 합류한 쪽은 자기 timeout 만큼만 기다리고, leader 의 호출은 그대로 진행
+    with pytest.raises(JoinTimeout):
+        flight.do('key', lambda: None, timeout=0.05)
+    assert flight.in_flight() == 1
+    release.set()
+    leader.join()
+    assert flight.get_stats()['join_timeouts'] == 1
+
+
+def test_user_request_joining_background_fetch_is_bounded(monkeypatch):
+    import stock_api
+    from upstream_scheduler import UpstreamBusy
+
+    release = threading.Event()
+    monkeypatch.setattr(stock_api, 'fetch_stock_data', lambda *args: release.wait(5))
+    monkeypatch.setattr(stock_api, 'JOIN_FETCH_SECONDS', 0)
+    monkeypatch.setitem(stock_api.upstream_scheduler.max_wait_seconds, 'user', 0.05)
+
+    def background():
+        with stock_api.upstream_scheduler.priority('background'):
+            stock_api.load_stock_data('005930', '3mo', '1d')
+
+    leader = threading.Thread(target=background)
+    leader.start()
+    while not stock_api.inflight_fetches.in_flight():
+        threading.Event().wait(0.001)
+
+    with pytest.raises(UpstreamBusy) as raised:
+        stock_api.load_stock_data('005930', '3mo', '1d')
+    assert raised.value.priority == 'user'
+    release.set()
+    leader.join()
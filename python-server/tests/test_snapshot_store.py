@@ -0,0 +1,65 @@
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from vercel_client import VercelClient, load_handler_module
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+@pytest.fixture
+def vercel(tmp_path, monkeypatch):
+    monkeypatch.setenv('STOCK_SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    monkeypatch.setenv('STOCK_SYMBOL_CACHE_PATH', str(tmp_path / 'symbols.sqlite'))
+    monkeypatch.setenv('STOCK_INFO_CACHE_PATH', str(tmp_path / 'metadata.sqlite'))
+    module = load_handler_module('vercel_snapshot_test')
+    metadata = {'company_name': '삼성전자', 'currency': 'KRW', 'market': 'KOSPI', 'timezone': 'Asia/Seoul'}
+    candles = [{'time': f'2024-01-{day:02d}', 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 100}
+               for day in range(1, 29)] * 20
+    monkeypatch.setattr(module, 'fetch_chart_data', lambda *args: ('005930.KS', metadata, candles, len(candles), None))
+
+    compressions = []
+    compress = module.snapshot_store.compressed.get.__globals__['compress']
+
+    def counting_compress(body, encoding):
+        compressions.append(encoding)
+        return compress(body, encoding)
+
+    monkeypatch.setitem(module.snapshot_store.compressed.get.__globals__, 'compress', counting_compress)
+    return module, compressions
+
+
+def test_snapshot_hits_reuse_stored_compressed_body(vercel):
+    module, compressions = vercel
+    client = VercelClient(module)
+
+    client.get('/api/stock-data/005930')  # 업스트림 조회 + 스냅샷 저장
+    responses = [client.get('/api/stock-data/005930', GZIP) for _ in range(3)]
+
+    assert [status for status, _, _ in responses] == [200] * 3
+    assert all(headers['Content-Encoding'] == 'gzip' for _, headers, _ in responses)
+    assert len({body for _, _, body in responses}) == 1
+    assert b'"from_cache":true' in gzip.decompress(responses[0][2])
+    # 스냅샷 버전당 한 번만 압축
+    assert compressions == ['gzip']
+    stats = module.snapshot_store.get_stats()
+    assert (stats['compressed_misses'], stats['compressed_hits']) == (1, 2)
+
+
+def test_new_snapshot_version_replaces_compressed_body(vercel):
+    module, compressions = vercel
+    client = VercelClient(module)
+    store = module.snapshot_store
+
+    client.get('/api/stock-data/005930')
+    client.get('/api/stock-data/005930', GZIP)
+    client.get('/api/stock-data/005930?force_refresh=true')  # 같은 키의 스냅샷을 다시 저장
+    variants = [name for name in os.listdir(store.directory) if not name.endswith('.body')]
+
+    assert variants == []
+    client.get('/api/stock-data/005930', GZIP)
+    assert compressions == ['gzip', 'gzip']
@@ -0,0 +1,74 @@
+import json
+
+import pandas as pd
+
+from stream import StreamHub
+
+
+def _events(stream):
+    """SSE 제너레이터를 끝까지 읽어 (이벤트 이름, 데이터) 목록으로 반환 (retry/keepalive 제외)"""
+    events = []
+    for chunk in stream:
+        for block in chunk.decode().split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and line.startswith(('event', 'data')))
+            if 'event' in lines:
+                events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_stream_without_data_sends_error_and_closes():
+    hub = StreamHub(lambda code, interval: pd.DataFrame(), poll_interval_seconds=0.01,
+                    heartbeat_seconds=0.05, max_empty_polls=3)
+
+    events = _events(hub.subscribe(('999999', '1m')))
+
+    assert events == [('error', {
+        'stock_code': '999999', 'interval': '1m', 'code': 404,
+        'message': '종목코드 999999의 1m 분봉 데이터를 찾을 수 없습니다',
+    })]
+    assert hub.total_subscribers == 0
+    assert hub.get_stats()['channels'] == 0
+
+
+def test_stream_upstream_failure_reports_error():
+    def fetch(code, interval):
+        raise RuntimeError('upstream down')
+
+    hub = StreamHub(fetch, poll_interval_seconds=0.01, heartbeat_seconds=0.05, max_empty_polls=2)
+
+    events = _events(hub.subscribe(('005930', '1m')))
+
+    assert [(name, data['code'], data['message']) for name, data in events] == [('error', 502, 'upstream down')]
+
+
+def test_stream_subscriber_limit():
+    hub = StreamHub(lambda code, interval: pd.DataFrame(), poll_interval_seconds=60, max_subscribers=1)
+    first = hub.subscribe(('005930', '1m'))
+    next(first)  # 첫 전송 시점에 구독자로 등록
+
+    assert hub.subscribe(('000660', '1m')) is None
+
+    first.close()
+    assert hub.total_subscribers == 0
+    assert hub.subscribe(('000660', '1m')) is not None
+    hub.close()
+
+
+def test_stream_endpoint_rejects_over_limit(monkeypatch):
+    import stock_api
+
+    monkeypatch.setattr(stock_api.stream_hub, 'max_subscribers', 0)
+    response = stock_api.app.test_client().get('/api/stock-stream/005930')
+
+    assert response.status_code == 503
+    assert response.get_json()['error']['code'] == 503
+
+
+def test_stream_endpoint_redirects_to_stream_server(monkeypatch):
+    import stock_api
+
+    monkeypatch.setattr(stock_api, 'STREAM_URL', 'http://localhost:5002')
+    response = stock_api.app.test_client().get('/api/stock-stream/005930?interval=5m')
+
+    assert response.status_code == 307
+    assert response.headers['Location'] == 'http://localhost:5002/api/stock-stream/005930?interval=5m'
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from aiohttp import ClientSession, TCPConnector
+from aiohttp.test_utils import TestClient, TestServer
+
+from stream import StreamHub
+from stream_server import make_app
+
+
+def fetch_bars(code, interval):
+    index = pd.date_range('2024-01-02 09:00', periods=30, freq='min', tz='Asia/Seoul')
+    close = 70000 + np.arange(30.0)
+    return pd.DataFrame({'Open': close, 'High': close + 10, 'Low': close - 10, 'Close': close,
+                         'Volume': np.full(30, 100.0)}, index=index)
+
+
+async def _read_snapshot(client):
+    async with client.get('/api/stock-stream/005930?interval=1m') as response:
+        assert response.status == 200
+        buffer = b''
+        while b'event: snapshot' not in buffer:
+            buffer += await response.content.readany()
+        return buffer
+
+
+def test_subscribers_do_not_take_a_thread_each():
+    hub = StreamHub(fetch_bars, poll_interval_seconds=0.05, idle_seconds=0, heartbeat_seconds=0.2)
+
+    async def run():
+        # 기본 커넥터는 연결 100개까지만 열므로 제한 없는 세션 사용
+        async with TestServer(make_app(hub)) as server, ClientSession(connector=TCPConnector(limit=0)) as session:
+            before = threading.active_count()
+            url = server.make_url('/api/stock-stream/005930?interval=1m')
+            responses = [await session.get(url) for _ in range(200)]
+            # 모든 구독자가 스냅샷을 받을 때까지
+            for response in responses:
+                buffer = b''
+                while b'event: snapshot' not in buffer:
+                    buffer += await response.content.readany()
+            during = threading.active_count()
+            stats = hub.get_stats()
+            for response in responses:
+                response.close()
+            return before, during, stats
+
+    before, during, stats = asyncio.run(run())
+    hub.close()
+
+    assert stats['subscribers'] == 200 and stats['channels'] == 1
+    # 폴러 스레드 하나만 늘어남 (연결마다 스레드를 쓰지 않음)
+    assert during - before <= 2
+
+
+def test_stream_server_rejects_over_limit_and_bad_interval():
+    hub = StreamHub(fetch_bars, poll_interval_seconds=0.05, max_subscribers=0)
+
+    async def run():
+        async with TestClient(TestServer(make_app(hub))) as client:
+            busy = await client.get('/api/stock-stream/005930')
+            bad = await client.get('/api/stock-stream/005930?interval=1d')
+            return busy.status, await busy.json(), bad.status
+
+    busy_status, busy_body, bad_status = asyncio.run(run())
+
+    assert busy_status == 503 and busy_body['error']['code'] == 503
+    assert bad_status == 400
+
+
+def test_disconnected_subscriber_is_released():
+    hub = StreamHub(fetch_bars, poll_interval_seconds=0.05, idle_seconds=0, heartbeat_seconds=0.05)
+
+    async def run():
+        async with TestClient(TestServer(make_app(hub))) as client:
+            await _read_snapshot(client)
+            # 연결 종료 후 다음 keepalive 전송에서 구독 해제
+            for _ in range(100):
+                if hub.total_subscribers == 0:
+                    break
+                await asyncio.sleep(0.02)
+
+    asyncio.run(run())
+    hub.close()
+
+    assert hub.total_subscribers == 0
@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import stock_api
+
+
+class ProbeTicker:
+    """.KS 에만 데이터가 있는 업스트림 대역 (history 호출을 심볼별로 셈)"""
+
+    calls = {}
+    lock = threading.Lock()
+
+    def __init__(self, symbol, priority=None):
+        self.symbol = symbol
+        self.info = {'longName': 'Test'}
+
+    def history(self, period=None, interval='1d', start=None, **kwargs):
+        with self.lock:
+            self.calls[self.symbol] = self.calls.get(self.symbol, 0) + 1
+        if not self.symbol.endswith('.KS'):
+            return pd.DataFrame()
+        index = pd.bdate_range(end=pd.Timestamp.now(tz='Asia/Seoul').normalize(), periods=5, name='Date')
+        return pd.DataFrame({name: np.arange(5.0) + 1 for name in ('Open', 'High', 'Low', 'Close', 'Volume')}, index=index)
+
+
+def test_first_lookup_probes_each_suffix_once(monkeypatch):
+    ProbeTicker.calls = {}
+    monkeypatch.setattr(stock_api, 'make_ticker', ProbeTicker)
+    code = '990001'
+    stock_api.symbol_resolver.forget(code)
+
+    assert stock_api.fetch_stock_data(code, '1mo', '1d') is not None
+    # 잘못된 접미사(.KQ)의 빈 결과는 다시 조회하지 않음 - 첫 조회는 history 2회
+    assert ProbeTicker.calls == {f'{code}.KS': 1, f'{code}.KQ': 1}
+
+    # 접미사를 알게 된 뒤에는 그 심볼 하나만 조회
+    ProbeTicker.calls = {}
+    stock_api.fetch_stock_data(code, '3mo', '1d')
+    assert ProbeTicker.calls == {f'{code}.KS': 1}
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from upstream_scheduler import UpstreamBusy, UpstreamScheduler
+
+
+def test_limit_is_divided_between_worker_processes():
+    scheduler = UpstreamScheduler(rate_per_second=8, burst=8, processes=4)
+
+    assert (scheduler.rate, scheduler.burst) == (2, 2)
+    stats = scheduler.get_stats()
+    assert stats['limit_scope'] == 'process' and stats['total_rate_per_second'] == 8
+
+
+def test_redis_bucket_is_shared_between_processes():
+    client = pytest.importorskip('fakeredis').FakeRedis()
+    # 워커 두 개 - 버킷 하나(burst 4)를 함께 씀
+    workers = [UpstreamScheduler(rate_per_second=1, burst=4, processes=2, redis_client=client,
+                                 max_wait_seconds={'user': 0}) for _ in range(2)]
+
+    for i in range(4):
+        workers[i % 2].acquire()
+    for worker in workers:
+        with pytest.raises(UpstreamBusy):
+            worker.acquire()
+    assert workers[0].get_stats()['limit_scope'] == 'redis'
+    assert workers[0].get_stats()['tokens'] < 1
+
+
+def test_redis_bucket_refills_at_total_rate():
+    client = pytest.importorskip('fakeredis').FakeRedis()
+    scheduler = UpstreamScheduler(rate_per_second=20, burst=1, redis_client=client)
+
+    scheduler.acquire()
+    started = time.monotonic()
+    scheduler.acquire()
+    assert 0.02 <= time.monotonic() - started < 0.5
+
+
+def test_redis_failure_falls_back_to_process_share():
+    class BrokenRedis:
+        def transaction(self, *args, **kwargs):
+            raise ConnectionError('redis down')
+
+        def hmget(self, *args):
+            raise ConnectionError('redis down')
+
+    scheduler = UpstreamScheduler(rate_per_second=2, burst=2, processes=2, redis_client=BrokenRedis(),
+                                  max_wait_seconds={'user': 0})
+
+    scheduler.acquire()
+    with pytest.raises(UpstreamBusy):
+        scheduler.acquire()
+    assert scheduler.get_stats()['shared_limit_errors'] == 2
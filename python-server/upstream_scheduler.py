@@ -0,0 +1,291 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from instrumentation import get_logger
+
+# 업스트림(Yahoo) 호출 스케줄러
+# - 모든 업스트림 호출은 토큰 버킷(초당 rate 개, 최대 burst 개)에서 토큰을 받은 뒤 실행
+# - 한도는 서버 전체 기준: Redis 가 있으면 모든 워커 프로세스가 Redis 의 버킷 하나를 공유하고,
+#   없으면 워커마다 rate/burst 를 워커 수(processes)로 나눈 버킷을 사용
+# - 토큰을 기다리는 호출은 우선순위 큐에서 대기: 사용자 요청(user) > 스트리밍 폴러(stream) > 백그라운드 갱신(background)
+# - 우선순위별 최대 대기 시간을 넘으면 UpstreamBusy - 호출한 쪽은 stale 캐시로 대신 응답
+# - force_refresh 는 종목별로 일정 시간에 한 번만 허용
+# - 호출 스레드의 우선순위는 scheduler.priority('background') 컨텍스트로 지정 (기본 user)
+#   다른 스레드에서 실행할 작업은 제출할 때 current_priority() 를 넘겨 같은 우선순위로 실행
+
+log = get_logger('upstream_scheduler')
+
+PRIORITIES = {'user': 0, 'stream': 1, 'background': 2}
+
+
+class UpstreamBusy(Exception):
+    """토큰 대기 시간이 한도를 넘어 업스트림 호출을 포기함"""
+
+    def __init__(self, priority, waited):
+        super().__init__(f"Upstream rate limit: gave up after waiting {waited:.1f}s ({priority})")
+        self.priority = priority
+        self.waited = waited
+
+
+class LocalTokenBucket:
+    """프로세스 내 토큰 버킷"""
+
+    shared = False
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, cost):
+        """토큰 cost 개를 가져가면 0, 모자라면 가져가지 않고 다 찰 때까지 남은 시간(초) 반환"""
+        self._refill()
+        if self._tokens >= cost:
+            self._tokens -= cost
+            return 0.0
+        return (cost - self._tokens) / self.rate
+
+    def tokens(self):
+        self._refill()
+        return self._tokens
+
+
+class RedisTokenBucket:
+    """여러 워커 프로세스가 Redis 해시 하나를 공유하는 토큰 버킷 (WATCH/MULTI 로 원자적으로 갱신)
+
+    Redis 오류 시에는 fallback(프로세스 몫으로 나눈 로컬 버킷)으로 대신 제한합니다.
+    """
+
+    shared = True
+
+    def __init__(self, client, rate, burst, key='stock-upstream:bucket', fallback=None):
+        self.client = client
+        self.rate = rate
+        self.burst = burst
+        self.key = key
+        self.fallback = fallback or LocalTokenBucket(rate, burst)
+        self.errors = 0
+
+    def _current(self, tokens, updated, now):
+        """저장된 (토큰, 갱신 시각) 에 now 까지 채운 토큰 수와 갱신 시각"""
+        tokens = self.burst if tokens is None else float(tokens)
+        updated = now if updated is None else float(updated)
+        # 워커 간 시계가 조금 어긋나도 토큰이 줄지 않도록 뒤로 가는 시각은 무시
+        return min(self.burst, tokens + max(0.0, now - updated) * self.rate), max(now, updated)
+
+    def _take(self, cost):
+        def update(pipe):
+            tokens, updated = self._current(*pipe.hmget(self.key, 'tokens', 'updated'), time.time())
+            wait = 0.0 if tokens >= cost else (cost - tokens) / self.rate
+            if not wait:
+                tokens -= cost
+            pipe.multi()
+            pipe.hset(self.key, mapping={'tokens': repr(tokens), 'updated': repr(updated)})
+            # 키가 없으면 가득 찬 버킷과 같으므로 다 찰 시간이 지나면 지움
+            pipe.expire(self.key, max(1, int(self.burst / self.rate) + 1))
+            return wait
+
+        return self.client.transaction(update, self.key, value_from_callable=True)
+
+    def take(self, cost):
+        try:
+            return self._take(cost)
+        except Exception as e:
+            self.errors += 1
+            # 장애가 이어지는 동안 호출마다 경고하지 않도록 첫 오류만 warning
+            (log.warning if self.errors == 1 else log.debug)(
+                "Shared upstream rate limit unavailable, using per-process limit: %s", e)
+            return self.fallback.take(cost)
+
+    def tokens(self):
+        try:
+            return self._current(*self.client.hmget(self.key, 'tokens', 'updated'), time.time())[0]
+        except Exception:
+            return self.fallback.tokens()
+
+
+class UpstreamScheduler:
+    def __init__(self, rate_per_second=5, burst=10, max_wait_seconds=None, force_refresh_interval_seconds=30,
+                 processes=1, redis_client=None):
+        """rate_per_second 가 0 이하이면 제한 없이 바로 통과
+
+        rate_per_second/burst 는 서버 전체 한도 - redis_client 가 있으면 Redis 버킷 하나를 모든 워커가 공유하고,
+        없으면 processes(워커 프로세스 수)로 나눈 몫만큼을 이 프로세스의 한도로 사용합니다.
+        """
+        self.total_rate = rate_per_second
+        self.processes = max(1, processes)
+        local = LocalTokenBucket(rate_per_second / self.processes, max(1, burst // self.processes))
+        if redis_client is not None and rate_per_second > 0:
+            self._bucket = RedisTokenBucket(redis_client, rate_per_second, max(1, burst), fallback=local)
+        else:
+            self._bucket = local
+        self.rate = self._bucket.rate
+        self.burst = self._bucket.burst
+        self.max_wait_seconds = {'user': 3, 'stream': 10, 'background': 60, **(max_wait_seconds or {})}
+        self.force_refresh_interval_seconds = force_refresh_interval_seconds
+
+        self._cond = threading.Condition()
+        self._queue = []  # [우선순위, 순번, 토큰 수] (같은 우선순위는 도착 순)
+        self._sequence = itertools.count()
+        self._local = threading.local()
+        self._force_refresh_at = {}
+        self._waits = deque(maxlen=1000)
+
+        self.granted = {name: 0 for name in PRIORITIES}
+        self.timeouts = {name: 0 for name in PRIORITIES}
+        self.force_refresh_denied = 0
+        self.stale_fallbacks = 0
+
+    @contextmanager
+    def priority(self, name):
+        """현재 스레드에서 실행하는 업스트림 호출의 우선순위 지정"""
+        previous = getattr(self._local, 'priority', None)
+        self._local.priority = name
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self):
+        return getattr(self._local, 'priority', None) or 'user'
+
+    def acquire(self, cost=1, priority=None):
+        """토큰을 받을 때까지 대기 후 대기 시간(초) 반환, 최대 대기 시간을 넘으면 UpstreamBusy"""
+        if self.rate <= 0:
+            return 0.0
+        priority = priority or self.current_priority()
+        cost = max(1, cost)
+        if cost > self.burst:
+            # 버킷에 한 번에 담을 수 없는 비용은 burst 개씩 나눠 모두 지불
+            waited = 0.0
+            while cost > 0:
+                waited += self.acquire(min(cost, self.burst), priority)
+                cost -= self.burst
+            return waited
+        started = time.monotonic()
+        deadline = started + self.max_wait_seconds[priority]
+
+        with self._cond:
+            entry = [PRIORITIES[priority], next(self._sequence), cost]
+            heapq.heappush(self._queue, entry)
+            while True:
+                now = time.monotonic()
+                head = self._queue[0] is entry
+                # 맨 앞 대기자만 버킷에서 토큰을 가져감 (모자라면 다 찰 때까지 남은 시간)
+                refill_wait = self._bucket.take(cost) if head else None
+                if refill_wait == 0:
+                    heapq.heappop(self._queue)
+                    waited = now - started
+                    self.granted[priority] += 1
+                    self._waits.append(waited)
+                    # 다음 대기자가 맨 앞이 되었으므로 깨움
+                    self._cond.notify_all()
+                    return waited
+                if now >= deadline:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self.timeouts[priority] += 1
+                    self._cond.notify_all()
+                    raise UpstreamBusy(priority, now - started)
+                # 맨 앞이면 토큰이 찰 때까지, 아니면 앞 순서가 빠질 때까지 대기
+                timeout = deadline - now
+                if head:
+                    timeout = min(timeout, refill_wait)
+                self._cond.wait(timeout)
+
+    def allow_force_refresh(self, key):
+        """같은 종목의 force_refresh 는 force_refresh_interval_seconds 에 한 번만 허용"""
+        if self.force_refresh_interval_seconds <= 0:
+            return True
+        now = time.monotonic()
+        with self._cond:
+            last = self._force_refresh_at.get(key)
+            if last is not None and now - last < self.force_refresh_interval_seconds:
+                self.force_refresh_denied += 1
+                return False
+            self._force_refresh_at[key] = now
+            if len(self._force_refresh_at) > 10000:
+                self._force_refresh_at = {
+                    k: t for k, t in self._force_refresh_at.items()
+                    if now - t < self.force_refresh_interval_seconds
+                }
+            return True
+
+    def record_stale_fallback(self):
+        with self._cond:
+            self.stale_fallbacks += 1
+
+    def get_stats(self):
+        """스케줄러 통계 (대기열 깊이, 대기 시간 분포, 토큰 잔량)"""
+        with self._cond:
+            depth = {name: 0 for name in PRIORITIES}
+            names = {value: name for name, value in PRIORITIES.items()}
+            for entry in self._queue:
+                depth[names[entry[0]]] += 1
+            waits = sorted(self._waits)
+        tokens = self._bucket.tokens()
+
+        def percentile(p):
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 1) if waits else None
+
+        return {
+            'rate_per_second': self.rate,
+            'burst': self.burst,
+            'total_rate_per_second': self.total_rate,
+            'limit_scope': 'redis' if self._bucket.shared else 'process',
+            'processes': self.processes,
+            'shared_limit_errors': getattr(self._bucket, 'errors', 0),
+            'tokens': round(tokens, 2),
+            'queue_depth': sum(depth.values()),
+            'queue_depth_by_priority': depth,
+            'granted': dict(self.granted),
+            'timeouts': dict(self.timeouts),
+            'wait_ms': {
+                'samples': len(waits),
+                'mean': round(sum(waits) / len(waits) * 1000, 1) if waits else None,
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'max': round(waits[-1] * 1000, 1) if waits else None,
+            },
+            'max_wait_seconds': dict(self.max_wait_seconds),
+            'force_refresh_interval_seconds': self.force_refresh_interval_seconds,
+            'force_refresh_denied': self.force_refresh_denied,
+            'stale_fallbacks': self.stale_fallbacks,
+        }
+
+
+class ScheduledTicker:
+    """ticker 의 업스트림 호출(history, info) 전에 스케줄러 토큰을 받는 래퍼
+
+    우선순위는 만들 때의 스레드 우선순위로 고정 - 호출이 executor 스레드(.KS/.KQ 동시 조회,
+    info 동시 조회)에서 실행되어도 백그라운드 갱신은 background 우선순위로 대기
+    """
+
+    def __init__(self, ticker, scheduler, schedule_info=True, priority=None):
+        self._ticker = ticker
+        self._scheduler = scheduler
+        self._schedule_info = schedule_info
+        self._priority = priority or scheduler.current_priority()
+
+    def history(self, *args, **kwargs):
+        self._scheduler.acquire(priority=self._priority)
+        return self._ticker.history(*args, **kwargs)
+
+    @property
+    def info(self):
+        if self._schedule_info:
+            self._scheduler.acquire(priority=self._priority)
+        return self._ticker.info
+
+    def __getattr__(self, name):
+        return getattr(self._ticker, name)
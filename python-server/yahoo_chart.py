@@ -0,0 +1,285 @@
+import asyncio
+import json
+import os
+import random
+import threading
+
+import numpy as np
+import pandas as pd
+
+from chart_arrays import DAILY_INTERVALS, DEFAULT_BASE_URL, USER_AGENT, chart_params, meta_to_info
+
+# Yahoo chart API(v8) 비동기 조회 계층
+# - 하나의 이벤트 루프 스레드 + 커넥션 풀(aiohttp)로 여러 업스트림 요청을 동시에 처리
+# - 요청별 타임아웃 + 전체 마감 시간(deadline), 지터가 있는 지수 백오프 재시도 (blocking sleep 없음)
+# - 응답 JSON 을 yfinance history 와 같은 형태의 DataFrame 으로 변환
+
+
+class ChartNotFound(Exception):
+    """심볼에 대한 데이터가 없음 (재시도하지 않음)"""
+
+
+def _event_column(events, index, interval, value):
+    """chart API events(dividends/splits) 를 index 에 맞춘 값 배열로 변환 (이벤트가 없는 봉은 0)"""
+    column = np.zeros(len(index))
+    if not events:
+        return column
+    dates = pd.to_datetime([int(event['date']) for event in events.values()], unit='s', utc=True).tz_convert(index.tz)
+    if interval in DAILY_INTERVALS:
+        dates = dates.normalize()
+    positions = index.get_indexer(dates)
+    for position, event in zip(positions, events.values()):
+        if position >= 0:
+            column[position] += value(event)
+    return column
+
+
+def chart_to_history(payload, interval='1d', auto_adjust=True):
+    """chart API 응답을 yfinance history 형태의 DataFrame 과 meta 로 변환"""
+    chart = payload.get('chart') or {}
+    results = chart.get('result') or []
+    if not results:
+        return pd.DataFrame(), {}
+
+    result = results[0]
+    meta = result.get('meta') or {}
+    timestamps = result.get('timestamp') or []
+    quotes = ((result.get('indicators') or {}).get('quote') or [{}])[0]
+    if not timestamps or not quotes:
+        return pd.DataFrame(), meta
+
+    def column(name):
+        # None(거래 없는 봉)은 float 배열 변환 시 NaN 이 됨
+        return np.array(quotes.get(name) or [None] * len(timestamps), dtype=np.float64)
+
+    opens, highs, lows, closes, volumes = (column(n) for n in ('open', 'high', 'low', 'close', 'volume'))
+    adjclose_list = ((result.get('indicators') or {}).get('adjclose') or [{}])[0].get('adjclose')
+    adj_closes = np.array(adjclose_list, dtype=np.float64) if adjclose_list else closes
+
+    tz = meta.get('exchangeTimezoneName') or 'UTC'
+    index = pd.to_datetime(np.asarray(timestamps, dtype=np.int64), unit='s', utc=True).tz_convert(tz)
+    if interval in DAILY_INTERVALS:
+        index = index.normalize()
+    index.name = 'Date'
+
+    if auto_adjust:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = adj_closes / closes
+        data = {
+            'Open': opens * ratio,
+            'High': highs * ratio,
+            'Low': lows * ratio,
+            'Close': adj_closes,
+            'Volume': volumes,
+        }
+    else:
+        data = {
+            'Open': opens,
+            'High': highs,
+            'Low': lows,
+            'Close': closes,
+            'Adj Close': adj_closes,
+            'Volume': volumes,
+        }
+
+    hist = pd.DataFrame(data, index=index)
+    # 값이 모두 비어있는 행(거래 없는 봉)은 yfinance 와 같이 제거
+    hist = hist.dropna(subset=['Open', 'High', 'Low', 'Close'], how='all')
+    hist = hist[~hist.index.duplicated(keep='last')].sort_index()
+    events = result.get('events')
+    if events and not hist.empty:
+        # yfinance history(actions=True) 와 같이 배당/분할을 봉별 컬럼으로 (캔들 저장소의 수정 주가 변경 감지용)
+        hist['Dividends'] = _event_column(events.get('dividends'), hist.index, interval,
+                                          lambda event: event.get('amount') or 0.0)
+        hist['Stock Splits'] = _event_column(events.get('splits'), hist.index, interval,
+                                             lambda event: event['numerator'] / event['denominator']
+                                             if event.get('denominator') else 0.0)
+    if not hist.empty:
+        hist['Volume'] = hist['Volume'].fillna(0).astype(np.int64)
+    return hist, meta
+
+
+class AsyncChartClient:
+    def __init__(self, base_url=None, request_timeout=5.0, total_deadline=15.0,
+                 max_retries=3, backoff_base=0.2, backoff_max=2.0, max_connections=32):
+        self.base_url = (base_url or os.getenv('STOCK_CHART_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.request_timeout = request_timeout
+        self.total_deadline = total_deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_connections = max_connections
+
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.deadline_exceeded = 0
+        self.in_flight = 0
+
+    # --- 이벤트 루프 스레드 관리 ---
+
+    def start(self):
+        """이벤트 루프 스레드 시작 (여러 번 호출해도 한 번만 시작)"""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name='chart-client-loop', daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+
+    def run(self, coro):
+        """동기 코드(Flask 핸들러)에서 코루틴을 실행하고 결과를 기다림"""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return future.result(timeout=self.total_deadline + 5)
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'User-Agent': USER_AGENT, 'Accept': 'application/json'},
+            )
+        return self._session
+
+    # --- 업스트림 조회 ---
+
+    def _backoff(self, attempt):
+        # full jitter: 0 ~ min(max, base * 2^attempt)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _fetch_json(self, symbol, params):
+        import aiohttp
+
+        session = await self._get_session()
+        url = f"{self.base_url}/v8/finance/chart/{symbol}"
+        last_error = None
+        for attempt in range(self.max_retries):
+            with self._stats_lock:
+                self.requests += 1
+                self.in_flight += 1
+            try:
+                timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+                async with session.get(url, params=params, timeout=timeout) as response:
+                    body = await response.read()
+                    if response.status == 404:
+                        raise ChartNotFound(f"No data found for {symbol}")
+                    if response.status == 429 or response.status >= 500:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, response.history,
+                            status=response.status, message=f"upstream status {response.status}")
+                    response.raise_for_status()
+                    return json.loads(body)
+            except ChartNotFound:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                last_error = e
+                if attempt == self.max_retries - 1:
+                    break
+                with self._stats_lock:
+                    self.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+            finally:
+                with self._stats_lock:
+                    self.in_flight -= 1
+        with self._stats_lock:
+            self.failures += 1
+        raise RuntimeError(f"chart request failed for {symbol}: {last_error}")
+
+    async def fetch_history_async(self, symbol, period=None, interval='1d', start=None):
+        """심볼 하나의 history DataFrame 과 meta 조회 (데이터가 없으면 빈 DataFrame)"""
+        try:
+            payload = await asyncio.wait_for(
+                self._fetch_json(symbol, chart_params(period, interval, start)),
+                timeout=self.total_deadline,
+            )
+        except ChartNotFound:
+            return pd.DataFrame(), {}
+        except asyncio.TimeoutError:
+            with self._stats_lock:
+                self.deadline_exceeded += 1
+            raise RuntimeError(f"chart request for {symbol} exceeded {self.total_deadline}s deadline")
+        return chart_to_history(payload, interval)
+
+    async def fetch_many_async(self, symbols, period=None, interval='1d'):
+        """여러 심볼을 동시에 조회, {심볼: DataFrame 또는 예외} 반환"""
+        results = await asyncio.gather(
+            *(self.fetch_history_async(symbol, period, interval) for symbol in symbols),
+            return_exceptions=True,
+        )
+        return {
+            symbol: result if isinstance(result, Exception) else result[0]
+            for symbol, result in zip(symbols, results)
+        }
+
+    def fetch_history(self, symbol, period=None, interval='1d', start=None):
+        """fetch_history_async 의 동기 버전"""
+        return self.run(self.fetch_history_async(symbol, period, interval, start))
+
+    def fetch_many(self, symbols, period=None, interval='1d'):
+        """fetch_many_async 의 동기 버전"""
+        return self.run(self.fetch_many_async(symbols, period, interval))
+
+    def close(self):
+        """세션을 닫고 이벤트 루프 스레드 종료"""
+        if self._loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(timeout=5)
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    def get_stats(self):
+        """비동기 조회 통계"""
+        with self._stats_lock:
+            return {
+                'base_url': self.base_url,
+                'running': self._loop is not None,
+                'requests': self.requests,
+                'retries': self.retries,
+                'failures': self.failures,
+                'deadline_exceeded': self.deadline_exceeded,
+                'in_flight': self.in_flight,
+                'request_timeout': self.request_timeout,
+                'total_deadline': self.total_deadline,
+            }
+
+
+class ChartTicker:
+    """yf.Ticker 대신 쓸 수 있는 최소 어댑터 (history + meta 기반 info)"""
+
+    def __init__(self, client, symbol):
+        self.client = client
+        self.ticker = symbol
+        self.meta = {}
+
+    def history(self, period=None, interval='1d', start=None, **kwargs):
+        hist, meta = self.client.fetch_history(self.ticker, period, interval, start)
+        if meta:
+            self.meta = meta
+        return hist
+
+    @property
+    def info(self):
+        # chart meta 에 회사명/통화/시간대가 들어있으므로 별도 요청 없이 사용
+        if not self.meta:
+            self.history(period='5d', interval='1d')
+        return meta_to_info(self.meta, self.ticker)
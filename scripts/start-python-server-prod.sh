@@ -0,0 +1,43 @@
+#!/bin/bash
+
+echo "🐍 Starting Python Stock API Server (production, gunicorn)..."
+
+# Python 서버 디렉토리로 이동
+cd python-server
+
+# 가상환경이 있는지 확인
+if [ ! -d "venv" ]; then
+    echo "📦 Creating Python virtual environment..."
+    python3 -m venv venv
+fi
+
+# 가상환경 활성화
+echo "🔧 Activating virtual environment..."
+source venv/bin/activate
+
+# 의존성 설치
+echo "📚 Installing Python dependencies..."
+pip install -r requirements.txt
+
+# 환경변수 설정
+export PYTHON_API_PORT=${PYTHON_API_PORT:-5001}
+export STOCK_STREAM_PORT=${STOCK_STREAM_PORT:-5002}
+# gunicorn 워커는 /api/stock-stream 구독을 스트리밍 서버로 리다이렉트
+export STOCK_STREAM_URL=${STOCK_STREAM_URL:-http://localhost:$STOCK_STREAM_PORT}
+
+# 분봉 스트리밍(SSE) 서버 - 연결마다 스레드를 쓰지 않도록 gunicorn 과 별도 프로세스로 실행
+echo "📡 Starting stream server on http://0.0.0.0:$STOCK_STREAM_PORT"
+python stream_server.py &
+STREAM_PID=$!
+trap 'kill $STREAM_PID 2>/dev/null' EXIT
+
+# 서버 시작
+echo "🚀 Starting gunicorn on http://0.0.0.0:$PYTHON_API_PORT"
+echo "🔧 Environment:"
+echo "   - GUNICORN_WORKERS=${GUNICORN_WORKERS:-auto}"
+echo "   - GUNICORN_THREADS=${GUNICORN_THREADS:-8}"
+echo "   - STOCK_CACHE_BACKEND=${STOCK_CACHE_BACKEND:-memory}"
+echo "   - STOCK_STREAM_URL=$STOCK_STREAM_URL"
+echo ""
+
+gunicorn -c gunicorn.conf.py stock_api:app